@@ -0,0 +1,49 @@
+# 큰 프로그램을 파싱했을 때 AST가 차지하는 메모리를 잰다
+# 실행: python bench/ast_memory.py [반복 횟수]
+import sys, os, tracemalloc
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from kol.tokenstream import TokenStream
+from kol.parser import Parser
+from kol.ast import AST
+
+PROGRAM = """
+함수 더하기는 가와 나로 다음
+    결과 값은 가와 나를 더한 것이 된다. 그리고 끝난다.
+문단을 실행한다.
+목록은 [1 다음 2 다음 3]이 된다.
+사전은 {"가"는 1 또 "나"는 2}가 된다.
+만약 목록에서 0번째 원소가 1이랑 같다면 다음
+    (1과 2로 더하기한 것)을 출력한다.
+문단을 실행한다.
+"""
+
+
+def count_nodes(obj) -> int:
+    if isinstance(obj, AST):
+        return 1 + sum(count_nodes(getattr(obj, name))
+                       for cls in type(obj).__mro__
+                       for name in getattr(cls, "__slots__", ())
+                       if name != "ast_id" and hasattr(obj, name))
+    if isinstance(obj, list):
+        return sum(count_nodes(item) for item in obj)
+    if isinstance(obj, dict):
+        return sum(count_nodes(k) + count_nodes(v) for k, v in obj.items())
+    return 0
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    src = PROGRAM * repeat
+    tokens = TokenStream(src)
+    tracemalloc.start()
+    program = Parser(tokens).parse()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    nodes = count_nodes(program)
+    print(f"소스 크기: {len(src)} 문자, 노드 수: {nodes}")
+    print(f"AST 메모리: {current} 바이트 (최대 {peak}), 노드당 {current / nodes:.1f} 바이트")
+
+
+if __name__ == "__main__":
+    main()
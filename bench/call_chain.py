@@ -0,0 +1,29 @@
+# 와/과로 길게 이어진 매개변수와 호출이 연달아 붙은 식의 파싱 시간을 잰다
+# 길이를 두 배로 늘릴 때 시간도 두 배 정도로만 늘어나야 함
+# 실행: python bench/call_chain.py [길이...]
+import sys, os, time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from kol.tokenstream import TokenStream
+from kol.parser import Parser
+
+
+def make_source(length: int) -> str:
+    return ("가는 " + "가와 " * length + "나로 함수한 것이 된다.\n"
+            + "나는 1" + "과 2를 더한 것" * length + "이 된다.\n"
+            + "(가와 나로 함수한 것)을 출력한다.\n" * length)
+
+
+def main():
+    lengths = [int(arg) for arg in sys.argv[1:]] or [1000, 2000, 4000, 8000, 16000]
+    for length in lengths:
+        tokens = TokenStream(make_source(length))
+        start = time.perf_counter()
+        Parser(tokens).parse()
+        elapsed = time.perf_counter() - start
+        print(f"길이 {length}: 토큰 {len(tokens)}개, 파싱 {elapsed:.3f}초, "
+              f"토큰당 {elapsed / len(tokens) * 1e6:.2f}μs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# 세는 반복문과 범위 반복문을 -O0(합치지 않음)과 -O1(합침)로 실행해 시간을 비교한다
+# 실행: python bench/counted_loop.py [반복_횟수...]
+import sys, os, io, time, contextlib
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from kol.session import CompilationSession
+from kol.aot import compile_ahead
+from kol.vm import VM
+
+PROGRAMS = {
+    "최상위 계속": """횟수는 0이 된다.
+합은 0이 된다.
+계속 횟수가 {n}보다 작다인 동안 다음
+    합은 합과 횟수를 더한 것이 된다.
+    횟수는 횟수와 1을 더한 것이 된다.
+문단을 반복한다.
+합을 출력한다.
+""",
+    "함수 안 계속": """함수 합을_구한다는 끝수로 다음
+    횟수는 0이 된다.
+    합은 0이 된다.
+    계속 횟수가 끝수보다 작다인 동안 다음
+        합은 합과 횟수를 더한 것이 된다.
+        횟수는 횟수와 1을 더한 것이 된다.
+    문단을 반복한다.
+    결과 값은 합이 된다. 그리고 끝난다.
+문단을 실행한다.
+{n}으로 합을_구한 것을 출력한다.
+""",
+    "범위 반복": """합은 0이 된다.
+(0과 {n}로 범위를_만든 것)에 있는 각 항목들을 숫자로 가져와 다음
+    합은 합과 숫자를 더한 것이 된다.
+문단을 반복한다.
+합을 출력한다.
+""",
+}
+
+
+def run_time(src: str, opt_level: int) -> tuple[float, str]:
+    program = CompilationSession(opt_level).compile_source(src)
+    compile_ahead(program[1], max_workers=1)
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        start = time.perf_counter()
+        VM(*program).run()
+        elapsed = time.perf_counter() - start
+    return elapsed, out.getvalue()
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [100000]
+    for count in counts:
+        for name, template in PROGRAMS.items():
+            src = template.format(n=count)
+            slow, slow_out = run_time(src, 0)
+            fast, fast_out = run_time(src, 1)
+            assert slow_out == fast_out
+            print(f"{name} {count}회: {slow * 1e3:.1f} -> {fast * 1e3:.1f}ms "
+                  f"({(fast - slow) / slow * 100:+.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
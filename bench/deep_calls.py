@@ -0,0 +1,38 @@
+# 꼬리 호출이 아닌 재귀를 깊이별로 실행해 시간을 잰다
+# 호출할 때 값 스택을 복사하지 않으므로 깊이를 네 배로 늘리면 시간도
+# 네 배 정도로만 늘어나야 함
+# 실행: python bench/deep_calls.py [깊이...]
+import sys, os, io, time, contextlib
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from kol.session import CompilationSession
+from kol.aot import compile_ahead
+from kol.vm import VM
+
+SOURCE = """함수 세기는 수로 다음
+    만약 수가 0이랑 같다면 다음
+        결과 값은 0이 된다. 그리고 끝난다.
+    문단을 실행한다.
+    결과 값은 1과 ((수와 1을 뺀 것)으로 세기한 것)을 더한 것이 된다.
+    그리고 끝난다.
+문단을 실행한다.
+{n}으로 세기한 것을 출력한다.
+"""
+
+
+def main():
+    depths = [int(arg) for arg in sys.argv[1:]] or [2000, 8000, 32000]
+    for depth in depths:
+        program = CompilationSession().compile_source(SOURCE.format(n=depth))
+        compile_ahead(program[1], max_workers=1)
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            start = time.perf_counter()
+            VM(*program).run()
+            elapsed = time.perf_counter() - start
+        assert out.getvalue() == f"{depth}\n"
+        print(f"깊이 {depth}: {elapsed * 1e3:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
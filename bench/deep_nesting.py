@@ -0,0 +1,32 @@
+# 깊게 중첩된 식을 파싱하고 컴파일하는 시간을 잰다
+# 실행: python bench/deep_nesting.py [깊이...]
+import sys, os, time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from kol.tokenstream import TokenStream
+from kol.parser import Parser
+from kol.compiler import Compiler
+
+
+def make_source(depth: int) -> str:
+    return ("가는 " + "(1과 " * depth + "1" + "을 더한 것)" * depth + "이 된다.\n"
+            + "나는 " + "[" * depth + "]" * depth + "이 된다.\n")
+
+
+def main():
+    depths = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 20000, 40000]
+    for depth in depths:
+        src = make_source(depth)
+        start = time.perf_counter()
+        tokens = TokenStream(src)
+        lexed = time.perf_counter()
+        program = Parser(tokens).parse()
+        parsed = time.perf_counter()
+        Compiler().compile_main(program)
+        compiled = time.perf_counter()
+        print(f"깊이 {depth}: 렉싱 {lexed - start:.3f}초, "
+              f"파싱 {parsed - lexed:.3f}초, 컴파일 {compiled - parsed:.3f}초")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# 예제 프로그램들을 기본 실행기(VM)와 빠른 실행기(FastVM)로 여러 번 실행해
+# 실행 시간을 비교한다. 입력을 받는 예제에는 정해진 입력을 넣음
+# 예제는 짧아서 정수 코드로 바꾸는 시간도 크게 잡히므로, 명령을 많이
+# 실행하는 긴 반복 프로그램도 같이 잰다
+# 실행: python bench/engines.py [반복_횟수]
+import sys, os, io, time, glob, contextlib
+from unittest import mock
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from kol.session import CompilationSession
+from kol.aot import compile_ahead
+from kol.vm import VM
+from kol.fastvm import FastVM
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(__file__), '..', 'example')
+STDIN = "5\n3\n1\n2\n"
+
+LONG_LOOP = """함수 제곱은 수로 다음
+    결과 값은 수와 수를 곱한 것이 된다. 그리고 끝난다.
+문단을 실행한다.
+함수 합을_구한다는 끝수로 다음
+    횟수는 0이 된다.
+    합은 0이 된다.
+    계속 횟수가 끝수보다 작다인 동안 다음
+        만약 횟수가 (끝수와 2를 나눈 것)보다 작다면 다음
+            합은 합과 (횟수로 제곱한 것)을 더한 것이 된다.
+        문단을 실행한다.
+        횟수는 횟수와 1을 더한 것이 된다.
+    문단을 반복한다.
+    결과 값은 합이 된다. 그리고 끝난다.
+문단을 실행한다.
+50000으로 합을_구한 것을 출력한다.
+"""
+
+
+def run_time(src: str, vm_class, repeat: int) -> tuple[float, str]:
+    elapsed = 0.0
+    for _ in range(repeat):
+        program = CompilationSession().compile_source(src)
+        compile_ahead(program[1], max_workers=1)
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out), \
+                mock.patch('sys.stdin', io.StringIO(STDIN)), \
+                contextlib.suppress(SystemExit):
+            start = time.perf_counter()
+            try:
+                vm_class(*program).run()
+            finally:
+                elapsed += time.perf_counter() - start
+    return elapsed, out.getvalue()
+
+
+def compare(name: str, src: str, repeat: int) -> tuple[float, float]:
+    slow, slow_out = run_time(src, VM, repeat)
+    fast, fast_out = run_time(src, FastVM, repeat)
+    assert slow_out == fast_out
+    print(f"{name} {repeat}회: {slow * 1e3:.1f} -> {fast * 1e3:.1f}ms "
+          f"({(fast - slow) / slow * 100:+.1f}%)")
+    return slow, fast
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    total_slow = total_fast = 0.0
+    for path in sorted(glob.glob(os.path.join(EXAMPLE_DIR, "*.콜"))):
+        with open(path) as f:
+            slow, fast = compare(os.path.basename(path), f.read(), repeat)
+        total_slow += slow
+        total_fast += fast
+    print(f"예제 전체: {total_slow * 1e3:.1f} -> {total_fast * 1e3:.1f}ms "
+          f"({(total_fast - total_slow) / total_slow * 100:+.1f}%)")
+    compare("긴 반복", LONG_LOOP, 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# 작은 함수를 반복해서 부르는 프로그램을 함수 펼치기 없이/있이 실행해 시간을 비교한다
+# 펼치기를 끌 때는 INLINE_MAX_NODES를 0으로 둠
+# 실행: python bench/inline.py [반복_횟수...]
+import sys, os, io, time, contextlib
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from kol import compiler
+from kol.session import CompilationSession
+from kol.aot import compile_ahead
+from kol.vm import VM
+
+SOURCE = """함수 제곱은 가로 다음
+    결과 값은 가와 가를 곱한 것이 된다. 그리고 끝난다.
+문단을 실행한다.
+함수 제곱합은 가와 나로 다음
+    결과 값은 (가로 제곱한 것)과 (나로 제곱한 것)을 더한 것이 된다. 그리고 끝난다.
+문단을 실행한다.
+함수 합을_구한다는 끝수로 다음
+    횟수는 0이 된다.
+    합은 0이 된다.
+    계속 횟수가 끝수보다 작다인 동안 다음
+        합은 합과 (횟수와 1로 제곱합한 것)을 더한 것이 된다.
+        횟수는 횟수와 1을 더한 것이 된다.
+    문단을 반복한다.
+    결과 값은 합이 된다. 그리고 끝난다.
+문단을 실행한다.
+{n}으로 합을_구한 것을 출력한다.
+"""
+
+
+def run_time(src: str, inline: bool) -> tuple[float, str]:
+    max_nodes = compiler.INLINE_MAX_NODES
+    if not inline:
+        compiler.INLINE_MAX_NODES = 0
+    try:
+        program = CompilationSession().compile_source(src)
+        compile_ahead(program[1], max_workers=1)
+    finally:
+        compiler.INLINE_MAX_NODES = max_nodes
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        start = time.perf_counter()
+        VM(*program).run()
+        elapsed = time.perf_counter() - start
+    return elapsed, out.getvalue()
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [50000]
+    for count in counts:
+        src = SOURCE.format(n=count)
+        slow, slow_out = run_time(src, False)
+        fast, fast_out = run_time(src, True)
+        assert slow_out == fast_out
+        print(f"작은 함수 호출 {count * 3}번: {slow * 1e3:.1f} -> "
+              f"{fast * 1e3:.1f}ms ({(fast - slow) / slow * 100:+.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
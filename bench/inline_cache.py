@@ -0,0 +1,68 @@
+# 객체의 필드를 읽고 쓰고 메서드를 부르는 프로그램을 두 실행기로 실행해
+# 시간과 인라인 캐시가 맞은 수/틀린 수를 보여준다. 반복마다 새 객체도
+# 만들어서 메서드를 부름
+# 실행: python bench/inline_cache.py [반복_횟수...]
+import sys, os, io, time, contextlib
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from kol.session import CompilationSession
+from kol.aot import compile_ahead
+from kol.vm import VM
+from kol.fastvm import FastVM
+
+SOURCE = """유형 점은 다음
+    변수 가로가 있다.
+    변수 세로가 있다.
+    함수 옮긴다는 자신과 거리로 다음
+        자신의 가로는 자신의 가로와 거리를 더한 것이 된다.
+        자신의 세로는 자신의 세로와 거리를 뺀 것이 된다.
+    문단을 실행한다.
+값을 가진다.
+유형 큰점은 점의 자식이고 다음
+    함수 옮긴다는 자신과 거리로 다음
+        자신의 가로는 자신의 가로와 (거리와 2를 곱한 것)을 더한 것이 된다.
+    문단을 실행한다.
+값을 가진다.
+첫점은 점이 된다.
+첫점의 가로는 0이 된다.
+첫점의 세로는 0이 된다.
+둘점은 큰점이 된다.
+둘점의 가로는 0이 된다.
+둘점의 세로는 0이 된다.
+횟수는 0이 된다.
+계속 횟수가 {n}보다 작다인 동안 다음
+    첫점 안에서 1로 옮긴다.
+    둘점 안에서 1로 옮긴다.
+    새점은 점이 된다.
+    새점의 가로는 횟수가 된다.
+    새점의 세로는 0이 된다.
+    새점 안에서 1로 옮긴다.
+    횟수는 횟수와 1을 더한 것이 된다.
+문단을 반복한다.
+첫점의 가로를 출력한다.
+둘점의 가로를 출력한다.
+새점의 가로를 출력한다.
+"""
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [20000]
+    for count in counts:
+        for vm_class in (VM, FastVM):
+            program = CompilationSession().compile_source(SOURCE.format(n=count))
+            compile_ahead(program[1], max_workers=1)
+            vm = vm_class(*program)
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                start = time.perf_counter()
+                vm.run()
+                elapsed = time.perf_counter() - start
+            assert out.getvalue() == f"{count}\n{count * 2}\n{count}\n"
+            stats = ", ".join(f"{name} {hits}/{misses}" for name, (hits, misses)
+                              in sorted(vm.inline_cache_stats().items()))
+            print(f"{vm_class.__name__} {count}회: {elapsed * 1e3:.1f}ms "
+                  f"(맞음/틀림: {stats})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# 예제 프로그램을 핍홀 최적화 없이/있이 컴파일해서 명령 개수와 실행 시간을 비교한다
+# 명령 개수는 최상위 코드와 모든 함수, 메서드의 바이트코드를 더한 값
+# 실행: python bench/peephole.py [반복_횟수] [예제_파일...]
+import sys, os, io, glob, time, contextlib
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from kol.tokenstream import TokenStream
+from kol.parser import Parser
+from kol.compiler import Compiler
+from kol.func import Func
+from kol.struct import Class
+from kol.vm import VM
+from kol.aot import compile_ahead
+
+INPUT = "5\n3\n1\n2\n"
+
+
+def compile_program(src: str, peephole: bool):
+    compiler = Compiler(peephole=peephole)
+    compiler.compile_main(Parser(TokenStream(src)).parse())
+    compile_ahead(compiler.const_pool, max_workers=1)
+    return compiler
+
+
+def count_instructions(compiler: Compiler) -> int:
+    count = len(compiler.bytecode)
+    for const in compiler.const_pool:
+        funcs = []
+        if isinstance(const, Func):
+            funcs = [const]
+        elif isinstance(const, Class):
+            funcs = const.funcs.values()
+        count += sum(len(func.code) for func in funcs
+                     if isinstance(func.code, list))
+    return count
+
+
+def run_time(src: str, peephole: bool, repeat: int) -> float:
+    total = 0.0
+    for _ in range(repeat):
+        compiler = compile_program(src, peephole)
+        vm = VM(compiler.assign, compiler.const_pool, compiler.bytecode)
+        stdin = sys.stdin
+        sys.stdin = io.StringIO(INPUT)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                try:
+                    vm.run()
+                except SystemExit:
+                    pass
+                total += time.perf_counter() - start
+        finally:
+            sys.stdin = stdin
+    return total / repeat
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    paths = sys.argv[2:] or sorted(glob.glob(
+        os.path.join(os.path.dirname(__file__), '..', 'example', '*.콜')))
+    for path in paths:
+        with open(path, "r") as f:
+            src = f.read()
+        before = count_instructions(compile_program(src, False))
+        after = count_instructions(compile_program(src, True))
+        slow = run_time(src, False, repeat)
+        fast = run_time(src, True, repeat)
+        print(f"{os.path.basename(path)}: 명령 {before} -> {after}개 "
+              f"({after - before:+d}), 실행 {slow * 1e3:.3f} -> "
+              f"{fast * 1e3:.3f}ms ({(fast - slow) / slow * 100:+.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+# 전역 변수 N개와 함수 N개가 있는 프로그램의 컴파일 시간을 잰다
+# 함수마다 전역 스코프를 복사하지 않으므로 N을 두 배로 늘리면 시간도 두 배 정도로만 늘어나야 함
+# 실행: python bench/scope_scaling.py [N...]
+import sys, os, time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from kol.tokenstream import TokenStream
+from kol.parser import Parser
+from kol.compiler import Compiler
+from kol.aot import compile_ahead
+
+
+def make_source(count: int) -> str:
+    lines = []
+    for i in range(count):
+        lines.append(f"값{i}는 {i}이 된다.\n")
+        lines.append(f"함수 셈{i}은 가로 다음\n"
+                     f"    결과 값은 가와 값{i}를 더한 것이 된다. 그리고 끝난다.\n"
+                     f"문단을 실행한다.\n")
+    return "".join(lines)
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [1000, 2000, 4000, 8000]
+    for count in counts:
+        ast = Parser(TokenStream(make_source(count))).parse()
+        start = time.perf_counter()
+        compiler = Compiler()
+        compiler.compile_main(ast)
+        compile_ahead(compiler.const_pool, max_workers=1)
+        elapsed = time.perf_counter() - start
+        print(f"전역 {count}개, 함수 {count}개: 컴파일 {elapsed:.3f}초, "
+              f"함수당 {elapsed / count * 1e6:.1f}μs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# 같은 CompilationSession으로 프로그램을 여러 번 컴파일하면서 RSS를 잰다
+# 세션이 이전 프로그램의 상수 풀과 스코프를 버리므로 RSS가 거의 그대로여야 함
+# 실행: python bench/session_soak.py [컴파일_횟수] [예제_파일]
+import sys, os, gc, time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from kol.session import CompilationSession
+
+SOURCE = """함수 두배는 가로 다음
+    결과 값은 가와 2를 곱한 것이 된다. 그리고 끝난다.
+문단을 실행한다.
+
+유형 상자는 다음
+    변수 내용이 있다.
+값을 가진다.
+
+21로 두배한 것을 출력한다.
+"""
+
+
+def rss() -> int:
+    # 리눅스에서는 현재 RSS를, 아니면 최대 RSS를 바이트로 반환함
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    src = SOURCE
+    if len(sys.argv) > 2:
+        with open(sys.argv[2], "r") as f:
+            src = f.read()
+
+    session = CompilationSession()
+    step = max(count // 10, 1)
+    start = time.perf_counter()
+    for i in range(1, count + 1):
+        session.compile_source(src)
+        if i % step == 0:
+            gc.collect()
+            print(f"{i}번 컴파일: RSS {rss() / 1024:.0f}KB, "
+                  f"상수 풀 {len(session.const_pool)}개")
+    print(f"전체 {time.perf_counter() - start:.2f}초")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# 꼬리 재귀로 합을 구하는 프로그램을 -O0(꼬리 호출 없음)과 -O1로 실행해
+# 가장 깊을 때의 프레임 수, 메모리 최대 사용량, 시간을 비교한다
+# 실행: python bench/tail_call.py [깊이...]
+import sys, os, io, time, tracemalloc, contextlib
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from kol.session import CompilationSession
+from kol.aot import compile_ahead
+from kol.vm import VM
+
+SOURCE = """함수 합을_구한다는 남은수와 합으로 다음
+    만약 남은수가 0이랑 같다면 다음
+        결과 값은 합이 된다. 그리고 끝난다.
+    문단을 실행한다.
+    결과 값은 (남은수와 1을 뺀 것)과 (합과 남은수를 더한 것)으로 합을_구한 것이 된다.
+    그리고 끝난다.
+문단을 실행한다.
+{n}과 0으로 합을_구한 것을 출력한다.
+"""
+
+
+class DepthVM(VM):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.max_frames = 0
+
+    def execute_func(self):
+        # 최상위 코드의 프레임은 빼고 함수 프레임만 셈
+        if len(self.frames) - 1 > self.max_frames:
+            self.max_frames = len(self.frames) - 1
+        super().execute_func()
+
+
+def measure(src: str, opt_level: int) -> tuple[int, int, float, str]:
+    program = CompilationSession(opt_level).compile_source(src)
+    compile_ahead(program[1], max_workers=1)
+    vm = DepthVM(*program)
+    out = io.StringIO()
+    tracemalloc.start()
+    with contextlib.redirect_stdout(out):
+        start = time.perf_counter()
+        vm.run()
+        elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return vm.max_frames, peak, elapsed, out.getvalue()
+
+
+def main():
+    depths = [int(arg) for arg in sys.argv[1:]] or [10000, 100000]
+    for depth in depths:
+        src = SOURCE.format(n=depth)
+        before = measure(src, 0)
+        after = measure(src, 1)
+        assert before[3] == after[3]
+        print(f"깊이 {depth}: 프레임 {before[0]} -> {after[0]}개, "
+              f"최대 메모리 {before[1] / 1e6:.1f} -> {after[1] / 1e6:.1f}MB, "
+              f"실행 {before[2] * 1e3:.1f} -> {after[2] * 1e3:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
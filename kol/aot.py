@@ -0,0 +1,103 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from .ast import FuncAST, BodyAST, ClassAST, StructAST, WhileAST, ForAST, CondAST
+from .compiler import Compiler
+from .func import Func
+from .struct import Class
+from .constpool import ConstPool
+from .bytecode import LoadConst, LoadConstCopy
+
+# 실행하기 전에 상수 풀의 모든 함수와 메서드를 컴파일함
+# 함수가 많으면 안에서 다른 함수/유형을 정의하지 않는 함수들을 프로세스 풀에서
+# 나눠 컴파일함. 그런 함수는 상수 풀에 아무것도 더하지 않으므로 따로 컴파일해도
+# 상수 번호가 어긋나지 않음. 나머지는 이 프로세스에서 차례로 컴파일함
+MIN_PARALLEL_FUNCS = 256
+
+
+def uncompiled_funcs(const_pool: list, start: int = 0) -> list[Func]:
+    funcs = []
+    seen = set()
+    for const in const_pool[start:]:
+        if isinstance(const, Func):
+            candidates = [const]
+        elif isinstance(const, Class):
+            candidates = const.funcs.values()
+        else:
+            continue
+        for func in candidates:
+            if not func.is_compiled() and id(func) not in seen:
+                seen.add(id(func))
+                funcs.append(func)
+    return funcs
+
+
+def has_definitions(body: BodyAST) -> bool:
+    stack = [body]
+    while stack:
+        ast = stack.pop()
+        if isinstance(ast, (FuncAST, ClassAST, StructAST)):
+            return True
+        if isinstance(ast, BodyAST):
+            stack.extend(ast.stmts)
+        elif isinstance(ast, (WhileAST, ForAST)):
+            stack.append(ast.body)
+        elif isinstance(ast, CondAST):
+            stack.append(ast.then_body)
+            if ast.else_cond:
+                stack.append(ast.else_cond)
+    return False
+
+
+def _compile_chunk(jobs: list) -> list:
+    results = []
+    for ident, args, body, scope, class_scope, builtin_names, opt_level, \
+        inline_funcs in jobs:
+        func = Func(FuncAST(ident, args, body), scope, class_scope)
+        func.builtin_names = builtin_names
+        func.opt_level = opt_level
+        func.inline_funcs = inline_funcs
+        Compiler.compile_func(func, [])
+        results.append((func.code, func.local_count))
+    return results
+
+
+def _compile_parallel(funcs: list[Func], max_workers: int, const_pool: list):
+    chunk_size = -(-len(funcs) // (max_workers * 4))
+    chunks = [funcs[i:i + chunk_size]
+              for i in range(0, len(funcs), chunk_size)]
+    jobs = [[(func.ast.ident, func.args, func.ast.body, func.current_scope,
+              func.class_scope, func.builtin_names, func.opt_level,
+              func.inline_funcs) for func in chunk]
+            for chunk in chunks]
+    with ProcessPoolExecutor(max_workers) as executor:
+        for chunk, results in zip(chunks, executor.map(_compile_chunk, jobs)):
+            for func, (code, local_count) in zip(chunk, results):
+                if isinstance(const_pool, ConstPool):
+                    # 다른 프로세스에서 만든 상수를 이 프로그램의 상수 풀로 합침
+                    for inst in code:
+                        if isinstance(inst, (LoadConst, LoadConstCopy)):
+                            inst.const = const_pool.intern(inst.const)
+                func.code = code
+                func.local_count = local_count
+
+
+def compile_ahead(const_pool: list, max_workers: int|None = None):
+    # 상수 풀의 모든 Func와 Class.funcs를 컴파일함. 끝나면 VM이
+    # 함수를 처음 호출할 때 컴파일하는 일이 없음
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    start = 0
+    while start < len(const_pool):
+        funcs = uncompiled_funcs(const_pool, start)
+        start = len(const_pool)
+        leaves = [func for func in funcs if not has_definitions(func.ast.body)]
+        if max_workers > 1 and len(leaves) >= MIN_PARALLEL_FUNCS:
+            try:
+                _compile_parallel(leaves, max_workers, const_pool)
+            except Exception:
+                # 피클할 수 없을 만큼 깊은 본문 등은 여기서 차례로 컴파일함
+                pass
+        for func in funcs:
+            if not func.is_compiled():
+                Compiler.compile_func(func, const_pool)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 from enum import Enum, auto
+from typing import Callable
 
 def _ast_repr(obj, indent=0):
     """Helper function for pretty-printing AST nodes."""
@@ -14,17 +15,19 @@ def _ast_repr(obj, indent=0):
     return repr(obj)
 
 class AST:
+    # 노드가 많으므로 모든 노드는 __slots__만 써서 인스턴스 __dict__를 없앰
+    __slots__ = ("ast_id",)
     _next_id_ = 0
     def __init__(self):
-        self.ast_id = self._next_id_
-        self._next_id_ += 1
+        self.ast_id = AST._next_id_
+        AST._next_id_ += 1
 
 
 class StmtAST(AST):
-    pass
+    __slots__ = ()
 
 class ExprAST(AST):
-    pass
+    __slots__ = ()
 
 def _repr_maker(name, fields):
     def __repr__(self, indent=0):
@@ -40,18 +43,21 @@ def _repr_maker(name, fields):
 
 
 class ProgramAST(AST):
+    __slots__ = ("body",)
     def __init__(self, body: BodyAST):
         super().__init__()
         self.body = body
     __repr__ = _repr_maker("ProgramAST", ["body"])
 
 class BodyAST(StmtAST):
+    __slots__ = ("stmts",)
     def __init__(self, stmts:list[StmtAST]):
         super().__init__()
         self.stmts = stmts
     __repr__ = _repr_maker("BodyAST", ["stmts"])
 
 class StructAST(StmtAST):
+    __slots__ = ("ident", "vars")
     def __init__(self, ident: str, vars: list[str]):
         super().__init__()
         self.ident = ident
@@ -59,6 +65,7 @@ class StructAST(StmtAST):
     __repr__ = _repr_maker("StructAST", ["ident", "vars"])
 
 class ClassAST(StmtAST):
+    __slots__ = ("ident", "vars", "funcs", "parent", "initial")
     def __init__(self, ident: str, vars: list[str], 
                 funcs: list[FuncAST], parent: str|None, initial: FuncAST|None):
         super().__init__()
@@ -70,15 +77,37 @@ class ClassAST(StmtAST):
     __repr__ = _repr_maker("ClassAST", ["ident", "vars", "funcs", "parent", "initial"])
 
 class FuncAST(StmtAST):
+    # 지연 파싱 때는 body 대신 본문 토큰 범위와 본문을 파싱하는 함수를 받고
+    # body에 처음 접근할 때 본문을 파싱함
+    __slots__ = ("ident", "params", "_body", "body_range", "body_loader")
     def __init__(self, ident: str, params: list[str],
-                    body: BodyAST):
+                    body: BodyAST|None,
+                    body_range: tuple[int, int]|None = None,
+                    body_loader: Callable[[], BodyAST]|None = None):
         super().__init__()
         self.ident = ident
         self.params = params
-        self.body = body
+        self._body = body
+        self.body_range = body_range
+        self.body_loader = body_loader
+
+    @property
+    def body(self) -> BodyAST:
+        if self._body is None:
+            self._body = self.body_loader()
+            self.body_loader = None
+        return self._body
+
+    @body.setter
+    def body(self, body: BodyAST):
+        self._body = body
+
+    def is_body_parsed(self) -> bool:
+        return self._body is not None
     __repr__ = _repr_maker("FuncAST", ["ident", "params", "body"])
 
 class WhileAST(StmtAST):
+    __slots__ = ("cond", "body")
     def __init__(self, cond: ExprAST, body: BodyAST):
         super().__init__()
         self.cond = cond
@@ -86,6 +115,7 @@ class WhileAST(StmtAST):
     __repr__ = _repr_maker("WhileAST", ["cond", "body"])
         
 class ForAST(StmtAST):
+    __slots__ = ("iter", "ident", "body")
     def __init__(self, iter: ExprAST, ident: str, body: BodyAST):
         super().__init__()
         self.iter = iter
@@ -94,6 +124,7 @@ class ForAST(StmtAST):
     __repr__ = _repr_maker("ForAST", ["iter", "ident", "body"])
 
 class CondAST(StmtAST):
+    __slots__ = ("cond", "then_body", "else_cond")
     def __init__(self, cond: ExprAST, then_body: BodyAST, else_cond: CondAST|None):
         super().__init__()
         self.cond = cond
@@ -102,22 +133,26 @@ class CondAST(StmtAST):
     __repr__ = _repr_maker("CondAST", ["cond", "then_body", "else_cond"])
 
 class ContinueAST(StmtAST):
+    __slots__ = ()
     def __init__(self):
         super().__init__()
     def __repr__(self, indent=0): return f"{'  ' * indent}ContinueAST()"
 
 class BreakAST(StmtAST):
+    __slots__ = ()
     def __init__(self):
         super().__init__()
     def __repr__(self, indent=0): return f"{'  ' * indent}BreakAST()"
 
 class ReturnAST(StmtAST):
+    __slots__ = ("value",)
     def __init__(self, value: ExprAST):
         super().__init__()
         self.value = value
     __repr__ = _repr_maker("ReturnAST", ["value"])
 
 class AssignAST(StmtAST):
+    __slots__ = ("lvalue", "rvalue")
     def __init__(self, lvalue: ExprAST, rvalue: ExprAST):
         super().__init__()
         self.lvalue = lvalue
@@ -125,19 +160,22 @@ class AssignAST(StmtAST):
     __repr__ = _repr_maker("AssignAST", ["lvalue", "rvalue"])
 
 class CallStmtAST(StmtAST):
-    def __init__(self, callee: ExprAST, params: list[ExprAST] = []):
+    __slots__ = ("callee", "params")
+    def __init__(self, callee: ExprAST, params: list[ExprAST]|None = None):
         super().__init__()
         self.callee = callee
-        self.params = params
+        self.params = params if params is not None else []
     __repr__ = _repr_maker("CallStmtAST", ["callee", "params"])
 
 class ExprStmtAST(StmtAST):
+    __slots__ = ("expr",)
     def __init__(self, expr: ExprAST):
         super().__init__()
         self.expr = expr
     __repr__ = _repr_maker("ExprStmtAST", ["expr"])
 
 class BinAST(ExprAST):
+    __slots__ = ("op", "left", "right")
     class OpKind(Enum):
         OP_AND = auto()
         OP_OR = auto()
@@ -160,6 +198,7 @@ class BinAST(ExprAST):
     __repr__ = _repr_maker("BinAST", ["op", "left", "right"])
 
 class FieldAccessAST(ExprAST):
+    __slots__ = ("target", "field")
     def __init__(self, target: ExprAST, field: str):
         super().__init__()
         self.target = target
@@ -167,6 +206,7 @@ class FieldAccessAST(ExprAST):
     __repr__ = _repr_maker("FieldAccessAST", ["target", "field"])
     
 class MethodAccessAST(ExprAST):
+    __slots__ = ("target", "method")
     def __init__(self, target: ExprAST, method: str):
         super().__init__()
         self.target = target
@@ -174,6 +214,7 @@ class MethodAccessAST(ExprAST):
     __repr__ = _repr_maker("MethodAccessAST", ["target", "method"])
 
 class IndexAccessAST(ExprAST):
+    __slots__ = ("target", "idx")
     def __init__(self, target: ExprAST, idx: ExprAST):
         super().__init__()
         self.target = target
@@ -182,56 +223,65 @@ class IndexAccessAST(ExprAST):
 
 
 class CallExprAST(ExprAST):
-    def __init__(self, callee: ExprAST, params: list[ExprAST] = []):
+    __slots__ = ("callee", "params")
+    def __init__(self, callee: ExprAST, params: list[ExprAST]|None = None):
         super().__init__()
         self.callee = callee
-        self.params = params
+        self.params = params if params is not None else []
     __repr__ = _repr_maker("CallExprAST", ["callee", "params"])
 
 class IntegerAST(ExprAST):
+    __slots__ = ("num",)
     def __init__(self, num: int):
         super().__init__()
         self.num = num
     def __repr__(self, indent=0): return f"{'  ' * indent}IntegerAST({self.num!r})"
 
 class FloatAST(ExprAST):
+    __slots__ = ("num",)
     def __init__(self, num: float):
         super().__init__()
         self.num = num
     def __repr__(self, indent=0): return f"{'  ' * indent}FloatAST({self.num!r})"
 
 class StringAST(ExprAST):
+    __slots__ = ("str",)
     def __init__(self, str: str):
         super().__init__()
         self.str = str
     def __repr__(self, indent=0): return f"{'  ' * indent}StringAST({self.str!r})"
 
 class BoolAST(ExprAST):
+    __slots__ = ("value",)
     def __init__(self, value: bool):
         super().__init__()
         self.value = value
     def __repr__(self, indent=0): return f"{'  ' * indent}BoolAST({self.value!r})"
 
 class IdentifierAST(ExprAST):
+    __slots__ = ("ident",)
     def __init__(self, ident: str):
         super().__init__()
         self.ident = ident
     def __repr__(self, indent=0): return f"{'  ' * indent}IdentifierAST({self.ident!r})"
 
 class DictAST(ExprAST):
-    def __init__(self, dict_values: dict = {}):
+    __slots__ = ("dict_values",)
+    def __init__(self, dict_values: dict|None = None):
         super().__init__()
-        self.dict_values = dict_values
+        self.dict_values = dict_values if dict_values is not None else {}
     __repr__ = _repr_maker("DictAST", ["dict_values"])
 
 class ArrayAST(ExprAST):
-    def __init__(self, elems: list = []):
+    __slots__ = ("elems",)
+    def __init__(self, elems: list|None = None):
         super().__init__()
-        self.elems = elems
+        self.elems = elems if elems is not None else []
     __repr__ = _repr_maker("ArrayAST", ["elems"])
 
 
 class NoneAST(ExprAST):
+    __slots__ = ()
     def __init__(self):
         super().__init__()
     def __repr__(self, indent=0): return f"{'  ' * indent}NoneAST()"
@@ -139,4 +139,13 @@ builtins = {
     "합친": build_func_object(builtin_join, 2),
     "종료": build_func_object(builtin_exit, 1),
     "문제가_발생": build_func_object(builtin_error, 1)
-}
\ No newline at end of file
+}
+
+# 같은 인자에 항상 같은 값을 돌려주고 부작용이 없는 내장 함수
+# 컴파일러가 인자가 모두 상수일 때 미리 계산해 상수로 바꿀 수 있음
+pure_builtins = frozenset({
+    "더", "뺀", "곱", "나눈", "나머지를_구",
+    "문자열으로_변환", "정수로_변환", "정수_16진수로_변환", "소수로_변환",
+    "진리값으로_변환", "길이를_구", "문자로_만든", "정수로_만든", "자른",
+    "에_포함된", "부정", "반전", "논리곱", "논리합", "베타적_논리합",
+})
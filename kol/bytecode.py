@@ -1,9 +1,8 @@
-from .vm import VM
-from .frame import Frame
+from .vm import VM, ProgramEnd
 from .func import Func
-from .ast import FuncAST
 from .struct import Class, Struct
 import types
+import operator
 function = types.FunctionType
 
 
@@ -23,11 +22,9 @@ class StoreFromConstPool(Bytecode):
         self.scope_index = scope_index
 
     def __call__(self, vm: VM):
-        if vm.frames:
-            vm.frames[-1].local_list[self.scope_index] = \
-                vm.const_pool[self.const_index]
-        else:
-            vm.global_list[self.scope_index] = vm.const_pool[self.const_index]
+        frame = vm.frame
+        frame.local_list[frame.base + self.scope_index] = \
+            vm.const_pool[self.const_index]
 
     def __repr__(self):
         return f"LoadConstPool(const_index={self.const_index!r})"
@@ -43,6 +40,19 @@ class LoadConst(Bytecode):
         return f"LoadConst(const={self.const!r})"
 
 
+class LoadConstCopy(Bytecode):
+    # 원소가 모두 상수인 배열/사전. 불러올 때마다 얕은 복사를 해서
+    # 프로그램이 값을 바꿔도 상수는 그대로 남음
+    def __init__(self, const):
+        self.const = const
+
+    def __call__(self, vm: VM):
+        vm.stack.append(self.const.copy())
+
+    def __repr__(self):
+        return f"LoadConstCopy(const={self.const!r})"
+
+
 class LoadGlobal(Bytecode):
     def __init__(self, index):
         self.index = index
@@ -58,7 +68,8 @@ class LoadLocal(Bytecode):
         self.index = index
 
     def __call__(self, vm: VM):
-        vm.stack.append(vm.frames[-1].local_list[self.index])
+        frame = vm.frame
+        vm.stack.append(frame.local_list[frame.base + self.index])
 
     def __repr__(self):
         return f"LoadLocal(index={self.index!r})"
@@ -84,32 +95,82 @@ class StoreLocal(Bytecode):
         top = vm.stack.pop()
         if isinstance(top, (Struct, Class)):
             top = top.copy()
-        vm.frames[-1].local_list[self.index] = top
+        frame = vm.frame
+        frame.local_list[frame.base + self.index] = top
 
     def __repr__(self):
         return f"StoreLocal(index={self.index!r})"
 
-class StoreField(Bytecode):
+# 인라인 캐시가 처음 본 종류 말고 더 기억하는 받는 객체 종류의 수
+# 이보다 많은 종류가 오면 캐시에 넣지 않고 느린 경로로 감
+MAX_CACHE_ENTRIES = 4
+
+class InlineCache(Bytecode):
+    # 받는 객체를 만든 구조/유형(origin)마다 찾은 결과를 기억하는 인라인 캐시
+    # 처음 본 origin은 cache_origin에 두고 명령에서 바로 확인하며, 다른
+    # origin은 entries에 둠. 캐시와 맞은 수/틀린 수는 한 번 실행하는 동안만
+    # 쓰므로 .콜c 캐시에는 저장하지 않음
+    CACHE_STATE = ("cache_origin", "entries", "hits", "misses")
+
+    def __init__(self):
+        self.reset_cache()
+
+    def reset_cache(self):
+        self.cache_origin = None
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __getstate__(self):
+        return {name: value for name, value in self.__dict__.items()
+                if name not in self.CACHE_STATE}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.reset_cache()
+
+class FieldCache(InlineCache):
+    # LoadField/StoreField의 인라인 캐시. 구조/유형에서 만든 객체의 필드는
+    # var 사전에 있으므로 origin이 맞으면 __getitem__을 거치지 않고 사전에
+    # 바로 접근함. 구조/유형이 아닌 객체(사전 등)는 캐시하지 않음
     def __init__(self, field:str):
         self.field = field
-
+        super().__init__()
+
+    def target(self, obj):
+        # cache_origin에서 만들지 않은 객체에서 필드가 들어 있는 곳
+        if not isinstance(obj, Struct):
+            return obj
+        origin = obj.origin
+        if origin in self.entries:
+            self.hits += 1
+        else:
+            self.misses += 1
+            if self.cache_origin is None:
+                self.cache_origin = origin
+            elif len(self.entries) < MAX_CACHE_ENTRIES:
+                self.entries[origin] = True
+        return obj.var
+
+class StoreField(FieldCache):
     def __call__(self, vm: VM):
         obj = vm.stack.pop()
         rvalue = vm.stack.pop()
-        obj[self.field] = rvalue
+        if isinstance(obj, Struct) and obj.origin is self.cache_origin:
+            self.hits += 1
+            obj.var[self.field] = rvalue
+        else:
+            self.target(obj)[self.field] = rvalue
 
     def __repr__(self):
         return f"StoreField(field={self.field!r})"
 
 class StoreIndex(Bytecode):
+    # 스택에 [값, 대상, 번호] 순서로 있음. 대상의 번호 자리에 값을 넣음
     def __call__(self, vm: VM):
-        top = vm.stack.pop()
-        if len(vm.frames[-1].local_list) == self.index:
-            vm.frames[-1].local_list.append(top)
-        elif len(vm.frames[-1].local_list) > self.index:
-            vm.frames[-1].local_list[self.index] = top
-        else:
-            raise Exception("에러")
+        index = vm.stack.pop()
+        obj = vm.stack.pop()
+        obj[index] = vm.stack.pop()
 
 class BuildArray(Bytecode):
     def __init__(self, array_len):
@@ -121,7 +182,7 @@ class BuildArray(Bytecode):
             return
         
         arr = vm.stack[-self.array_len:]
-        vm.stack = vm.stack[:-self.array_len]
+        del vm.stack[-self.array_len:]
         vm.stack.append(arr)
 
     def __repr__(self):
@@ -159,107 +220,218 @@ class JumpCode(Bytecode):
 class Jmp(JumpCode):
 
     def __call__(self, vm: VM):
-        if vm.frames:
-            vm.frames[-1].ip = self.ip - 1
-        else:
-            vm.ip = self.ip -1
-        
+        vm.frame.ip = self.ip - 1
+
 
 class JmpIfTrue(JumpCode):
 
     def __call__(self, vm: VM):
         if vm.stack.pop():
-            if vm.frames:
-                vm.frames[-1].ip = self.ip - 1
-            else:
-                vm.ip = self.ip - 1
+            vm.frame.ip = self.ip - 1
         
 class JmpIfFalse(JumpCode):
 
     def __call__(self, vm: VM):
         if not vm.stack.pop():
-            if vm.frames:
-                vm.frames[-1].ip = self.ip - 1
-            else:
-                vm.ip = self.ip - 1
+            vm.frame.ip = self.ip - 1
 
-class ForInPrepare(Bytecode):
-    def __init__(self):
-        pass
+_EXHAUSTED = object()
+
+class ForIter(JumpCode):
+    # 반복자의 다음 값을 index 변수에 넣음. 반복이 끝나면 ip로 점프함
+    def __init__(self, index, ip = None):
+        super().__init__(ip)
+        self.index = index
 
     def __call__(self, vm: VM):
-        if vm.frames:
-            vm.frames[-1].for_iter.append(iter(vm.stack.pop()))
+        frame = vm.frame
+        obj = next(frame.for_iter[-1], _EXHAUSTED)
+        if obj is _EXHAUSTED:
+            frame.ip = self.ip - 1
         else:
-            vm.for_iter.append(iter(vm.stack.pop()))
+            frame.local_list[frame.base + self.index] = obj
 
-class ForInStep(Bytecode):
-    def __init__(self, index):
-        self.index = index
+    def __repr__(self):
+        return f"ForIter(index={self.index!r}, ip={self.ip!r})"
+
+class InlineGuard(JumpCode):
+    # 펼친 함수 앞에 두는 확인. 전역 변수 slot에 아직 컴파일할 때의 함수가
+    # 들어 있지 않으면(다시 묶였거나 아직 정의되지 않음) ip의 보통 호출로 감
+    def __init__(self, slot, const_index, ip = None):
+        super().__init__(ip)
+        self.slot = slot
+        self.const_index = const_index
+
+    def __call__(self, vm: VM):
+        if vm.global_list[self.slot] is not vm.const_pool[self.const_index]:
+            vm.frame.ip = self.ip - 1
 
     def __repr__(self):
-        return f"ForInStep(index={self.index!r})"
+        return (f"InlineGuard(slot={self.slot!r}, "
+                f"const_index={self.const_index!r}, ip={self.ip!r})")
+
+class BindArgs(Bytecode):
+    # 펼친 함수의 인자를 스택에서 꺼내 매개변수 슬롯에 넣음
+    # 호출할 때처럼 구조/유형을 복사하지 않음
+    def __init__(self, slots: tuple):
+        self.slots = slots
+
+    def __call__(self, vm: VM):
+        frame = vm.frame
+        values = frame.local_list
+        for slot in reversed(self.slots):
+            values[frame.base + slot] = vm.stack.pop()
+
+    def __repr__(self):
+        return f"BindArgs(slots={self.slots!r})"
+
+def push_iter(vm: VM, values):
+    # 프레임의 반복자 목록은 처음 반복문을 시작할 때 만듦
+    frame = vm.frame
+    if frame.for_iter is None:
+        frame.for_iter = []
+    frame.for_iter.append(values)
+
+class ForInPrepare(Bytecode):
+    def __init__(self):
+        pass
 
     def __call__(self, vm: VM):
-        try:
-            if vm.frames:
-                obj = next(vm.frames[-1].for_iter[-1])
-                vm.frames[-1].local_list[self.index] = obj
-            else:
-                obj = next(vm.for_iter[-1])
-                vm.global_list[self.index] = obj
-            vm.stack.append(True)
-        except StopIteration:
-            vm.stack.append(False)
+        push_iter(vm, iter(vm.stack.pop()))
+
+class RangePrepare(Bytecode):
+    # "시작과 끝으로 범위를_만든 것에 있는 각 항목들을" 반복할 때 배열을
+    # 만들지 않고 range 반복자를 바로 for_iter에 넣음
+    def __call__(self, vm: VM):
+        end = vm.stack.pop()
+        start = vm.stack.pop()
+        push_iter(vm, iter(range(start, end)))
+
+def count_values(value, bound, compare, advance, step):
+    # 정수가 아닌 값으로 세는 반복문이 차례로 갖는 값
+    while compare(value, bound):
+        yield value
+        value = advance(value, step)
+
+class CountPrepare(Bytecode):
+    # "계속 i가 n보다 작다인 동안 ... i는 i와 1을 더한 것이 된다." 모양의
+    # 반복문에서 i가 가질 값들의 반복자를 for_iter에 넣음
+    # compare는 operator.lt/le/gt/ge, advance는 operator.add/sub
+    # 둘 다 정수면 range를 쓰고, 아니면 원래 반복문과 같은 연산으로 셈
+    def __init__(self, compare, advance, step):
+        self.compare = compare
+        self.advance = advance
+        self.step = step
+
+    def values(self, value, bound):
+        if type(value) is int and type(bound) is int:
+            step = self.step if self.advance is operator.add else -self.step
+            if self.compare is operator.le:
+                bound += 1
+            elif self.compare is operator.ge:
+                bound -= 1
+            return iter(range(value, bound, step))
+        return count_values(value, bound, self.compare, self.advance, self.step)
+
+    def __call__(self, vm: VM):
+        bound = vm.stack.pop()
+        value = vm.stack.pop()
+        push_iter(vm, self.values(value, bound))
+
+    def __repr__(self):
+        return (f"CountPrepare(compare={self.compare.__name__}, "
+                f"advance={self.advance.__name__}, step={self.step!r})")
 
 class ForInDone(Bytecode):
     def __call__(self, vm):
-        if vm.frames:
-            vm.frames[-1].for_iter.pop()
-        else:
-            vm.for_iter.pop()
+        vm.frame.for_iter.pop()
 
 class Call(Bytecode):
     def __init__(self, param_count):
         self.param_count = param_count
 
     def __call__(self, vm: VM):
-        from .compiler import Compiler
         func: Func = vm.stack.pop()
         if self.param_count != len(func.args):
             raise Exception("실행 에러: 호출된 매개변수와 함수의 매개변수가 다름")
         
-        if isinstance(func.code, FuncAST):
-            Compiler.compile_func(func, vm.const_pool)
-        args = vm.stack[-len(func.args):]
-        vm.stack = vm.stack[:-len(func.args)]
-        
-        
-        if isinstance(func.code, function):
-            ret = func.code(*args)
-            vm.stack.append(ret)
+        if not isinstance(func.code, function):
+            vm.push_frame(func, self.param_count)
+        elif self.param_count:
+            args = vm.stack[-self.param_count:]
+            del vm.stack[-self.param_count:]
+            vm.stack.append(func.code(*args))
         else:
-            vm.frames.append(Frame(func, args))
+            vm.stack.append(func.code())
 
     def __repr__(self):
         return f"Call(param_count={self.param_count!r})"
 
+class LazyCompile(Bytecode):
+    # 아직 컴파일하지 않은 함수의 코드. 처음 실행될 때 함수를 컴파일하고
+    # 현재 프레임을 컴파일된 코드의 처음으로 돌림
+    # 미리 컴파일하면(compile_ahead) 호출할 때 이 명령을 만날 일이 없음
+    def __call__(self, vm: VM):
+        from .compiler import Compiler
+        frame = vm.frame
+        func: Func = frame.func
+        if not func.is_compiled():
+            Compiler.compile_func(func, vm.const_pool)
+        frame.code = func.code
+        missing = func.local_count - (len(vm.stack) - frame.base)
+        if missing > 0:
+            vm.stack.extend([None]*missing)
+        frame.ip = -1
+
+LAZY_CODE = [LazyCompile()]
+
+class End(Bytecode):
+    # VM이 최상위 코드 끝에 붙이는 명령. 실행 루프를 끝냄
+    def __call__(self, vm: VM):
+        raise ProgramEnd()
+
 class Ret(Bytecode):
     def __init__(self):
         pass
 
     def __call__(self, vm: VM):
-        vm.frames.pop()
-        
+        vm.pop_frame()
 
-        
-class LoadField(Bytecode):
-    def __init__(self, field):
-        self.field = field
+class TailCall(Ret):
+    # "결과 값은 ...한 것이 된다. 그리고 끝난다."처럼 호출 결과를 바로
+    # 돌려줄 때 쓰는 호출. 새 프레임을 쌓지 않고 지금 프레임을 다시 씀
+    # Ret처럼 함수를 끝내므로 Ret을 상속해 최적화 패스에서 블록의 끝으로 봄
+    def __init__(self, param_count):
+        self.param_count = param_count
 
+    def __call__(self, vm: VM):
+        func: Func = vm.stack.pop()
+        if self.param_count != len(func.args):
+            raise Exception("실행 에러: 호출된 매개변수와 함수의 매개변수가 다름")
+
+        if not isinstance(func.code, function):
+            vm.tail_call(func, self.param_count)
+            return
+        if self.param_count:
+            args = vm.stack[-self.param_count:]
+            del vm.stack[-self.param_count:]
+            vm.stack.append(func.code(*args))
+        else:
+            vm.stack.append(func.code())
+        vm.pop_frame()
+
+    def __repr__(self):
+        return f"TailCall(param_count={self.param_count!r})"
+
+        
+class LoadField(FieldCache):
     def __call__(self, vm: VM):
         obj = vm.stack.pop()
-        vm.stack.append(obj[self.field])
+        if isinstance(obj, Struct) and obj.origin is self.cache_origin:
+            self.hits += 1
+            vm.stack.append(obj.var[self.field])
+        else:
+            vm.stack.append(self.target(obj)[self.field])
 
     def __repr__(self):
         return f"LoadField(field={self.field!r})"
@@ -273,13 +445,44 @@ class LoadIndex(Bytecode):
         obj = vm.stack.pop()
         vm.stack.append(obj[index])
 
-class LoadMethod(Bytecode):
+class LoadMethod(InlineCache):
+    # 유형마다 찾은 메서드를 기억하는 인라인 캐시. 같은 유형에서 만든 객체는
+    # 모두 같은 메서드를 가지므로, 객체를 만든 유형(origin)이 맞으면 유형의
+    # 메서드를 바로 씀. 메서드는 캐시에 넣을 때 컴파일해서 객체마다 따로
+    # 컴파일하지 않음
+    CACHE_STATE = InlineCache.CACHE_STATE + ("cache_func",)
+
     def __init__(self, method):
         self.method = method
+        super().__init__()
+
+    def reset_cache(self):
+        super().reset_cache()
+        self.cache_func = None
 
     def __call__(self, vm: VM):
-        obj:Class = vm.stack.pop()
-        vm.stack.append(obj.get_method(self.method))
+        origin = vm.stack[-1].origin
+        if origin is self.cache_origin:
+            self.hits += 1
+            vm.stack[-1] = self.cache_func
+        else:
+            vm.stack[-1] = self.lookup(origin, vm.const_pool)
+
+    def lookup(self, origin: Class, const_pool) -> Func:
+        func = self.entries.get(origin)
+        if func is not None:
+            self.hits += 1
+            return func
+        self.misses += 1
+        func = origin.get_method(self.method)
+        if not func.is_compiled():
+            from .compiler import Compiler
+            Compiler.compile_func(func, const_pool)
+        if self.cache_origin is None:
+            self.cache_origin, self.cache_func = origin, func
+        elif len(self.entries) < MAX_CACHE_ENTRIES:
+            self.entries[origin] = func
+        return func
 
     def __repr__(self):
         return f"LoadMethod(method={self.method!r})"
@@ -306,6 +509,28 @@ class NotEqualOp(Bytecode):
 
         vm.stack.append(obj1 != obj2)
 
+def like(obj1, obj2) -> bool:
+    # "비슷하다" 비교. 없음은 거짓/0/빈 문자열과, 문자열은 숫자로 바꿔서 숫자와 비교함
+    if obj1 is None:
+        if obj2 is False or obj2 == 0 or obj2 == "":
+            return True
+    if obj2 is None:
+        if obj1 is False or obj1 == 0 or obj1 == "":
+            return True
+
+    try:
+        if isinstance(obj1, str) and isinstance(obj2, (int, float)):
+            return float(obj1) == obj2
+        if isinstance(obj1, (int, float)) and isinstance(obj2, str):
+            return obj1 == float(obj2)
+    except ValueError:
+        if isinstance(obj1, str) and isinstance(obj2, (int, float)):
+            return 0.0 == obj2
+        if isinstance(obj1, (int, float)) and isinstance(obj2, str):
+            return obj1 == 0.0
+
+    return obj1 == obj2
+
 class LikeOp(Bytecode):
     def __init__(self):
         pass
@@ -313,32 +538,7 @@ class LikeOp(Bytecode):
     def __call__(self, vm: VM):
         obj2 = vm.stack.pop()
         obj1 = vm.stack.pop()
-            
-        if obj1 is None:
-            if obj2 is False or obj2 == 0 or obj2 == "":
-                vm.stack.append(True)
-                return
-        if obj2 is None:
-            if obj1 is False or obj1 == 0 or obj1 == "":
-                vm.stack.append(True)
-                return
-            
-        try:
-            if isinstance(obj1, str) and isinstance(obj2, (int, float)):
-                vm.stack.append(float(obj1) == obj2)
-                return
-            if isinstance(obj1, (int, float)) and isinstance(obj2, str):
-                vm.stack.append(obj1 == float(obj2))
-                return
-        except ValueError:
-            if isinstance(obj1, str) and isinstance(obj2, (int, float)):
-                vm.stack.append(0.0 == obj2)
-                return
-            if isinstance(obj1, (int, float)) and isinstance(obj2, str):
-                vm.stack.append(obj1 == 0.0)
-                return
-
-        vm.stack.append(obj1 == obj2)
+        vm.stack.append(like(obj1, obj2))
 
 class NotLikeOp(Bytecode):
     def __init__(self):
@@ -347,32 +547,7 @@ class NotLikeOp(Bytecode):
     def __call__(self, vm: VM):
         obj2 = vm.stack.pop()
         obj1 = vm.stack.pop()
-            
-        if obj1 is None:
-            if obj2 is False or obj2 == 0 or obj2 == "":
-                vm.stack.append(False)
-                return
-        if obj2 is None:
-            if obj1 is False or obj1 == 0 or obj1 == "":
-                vm.stack.append(False)
-                return
-            
-        try:
-            if isinstance(obj1, str) and isinstance(obj2, (int, float)):
-                vm.stack.append(float(obj1) != obj2)
-                return
-            if isinstance(obj1, (int, float)) and isinstance(obj2, str):
-                vm.stack.append(obj1 != float(obj2))
-                return
-        except ValueError:
-            if isinstance(obj1, str) and isinstance(obj2, (int, float)):
-                vm.stack.append(0.0 != obj2)
-                return
-            if isinstance(obj1, (int, float)) and isinstance(obj2, str):
-                vm.stack.append(obj1 != 0.0)
-                return
-
-        vm.stack.append(obj1 != obj2)
+        vm.stack.append(not like(obj1, obj2))
     
 
 class GEOp(Bytecode):
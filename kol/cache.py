@@ -0,0 +1,110 @@
+import os
+import pickle
+import hashlib
+import copyreg
+from .compiler import DEFAULT_OPT_LEVEL
+from .struct import Struct, Class
+
+# 컴파일한 프로그램을 소스 옆의 .콜c 파일에 저장해 두고
+# 다음 실행에서 렉싱/파싱/컴파일을 건너뜀
+# 바이트코드 형식이 바뀌면 MAGIC을 올려서 예전 캐시를 무효로 만듦
+# 다른 최적화 단계로 컴파일했거나 지연 파싱 여부가 다른 캐시는 쓰지 않음
+MAGIC = 9
+CACHE_SUFFIX = "c"
+
+try:
+    from importlib.metadata import version, PackageNotFoundError
+    try:
+        KOL_VERSION = version("korean-lang")
+    except PackageNotFoundError:
+        KOL_VERSION = "dev"
+except ImportError:
+    KOL_VERSION = "dev"
+
+
+def cache_path(file_path: str, cache_dir: str|None = None) -> str:
+    if cache_dir is None:
+        return file_path + CACHE_SUFFIX
+    return os.path.join(cache_dir, os.path.basename(file_path) + CACHE_SUFFIX)
+
+
+def source_hash(file_path: str) -> str:
+    with open(file_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _header(file_path: str, digest: str, opt_level: int, lazy: bool) -> dict:
+    stat = os.stat(file_path)
+    return {
+        "magic": MAGIC,
+        "version": KOL_VERSION,
+        "opt_level": opt_level,
+        "lazy": lazy,
+        "size": stat.st_size,
+        "mtime": stat.st_mtime_ns,
+        "hash": digest,
+    }
+
+
+def load(file_path: str, cache_dir: str|None = None,
+         opt_level: int = DEFAULT_OPT_LEVEL,
+         lazy: bool = False) -> tuple[int, list, list]|None:
+    # 캐시가 있고 소스와 맞으면 (전역 변수 개수, 상수 풀, 바이트코드)를 반환
+    # 크기와 수정 시각이 같으면 그대로 쓰고, 다르면 소스 해시로 한 번 더 확인함
+    path = cache_path(file_path, cache_dir)
+    try:
+        with open(path, "rb") as f:
+            header = pickle.load(f)
+            if header.get("magic") != MAGIC or \
+                header.get("version") != KOL_VERSION or \
+                header.get("opt_level") != opt_level or \
+                header.get("lazy") != lazy:
+                return None
+            stat = os.stat(file_path)
+            if header["size"] != stat.st_size or \
+                header["mtime"] != stat.st_mtime_ns:
+                if header["hash"] != source_hash(file_path):
+                    return None
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError,
+            AttributeError, KeyError, ImportError):
+        return None
+
+
+def _reduce_struct(obj: Struct):
+    # 캐시는 실행이 끝난 뒤 저장하므로 실행 중에 구조/유형에 넣은 필드 값은
+    # 빼고 컴파일했을 때처럼 비워서 저장함
+    state = obj.__dict__.copy()
+    if obj.is_type:
+        state["var"] = dict.fromkeys(obj.var)
+    return object.__new__, (type(obj),), state
+
+
+_dispatch_table = copyreg.dispatch_table.copy()
+_dispatch_table[Struct] = _reduce_struct
+_dispatch_table[Class] = _reduce_struct
+
+
+def save(file_path: str, assign: int, const_pool: list, bytecode: list,
+         cache_dir: str|None = None,
+         opt_level: int = DEFAULT_OPT_LEVEL, lazy: bool = False) -> bool:
+    # 실행이 끝난 뒤 저장하므로 실행 중에 컴파일한 함수는 바이트코드로 저장됨
+    # 호출되지 않은 함수는 AST째로 저장해서 읽은 뒤 처음 호출될 때 컴파일함
+    # 지연 파싱한 본문은 본문 소스로 저장됨(parser.LazyBody)
+    path = cache_path(file_path, cache_dir)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            pickle.dump(_header(file_path, source_hash(file_path),
+                                opt_level, lazy), f)
+            pickler = pickle.Pickler(f)
+            pickler.dispatch_table = _dispatch_table
+            pickler.dump((assign, const_pool, bytecode))
+        os.replace(tmp_path, path)
+    except (OSError, pickle.PicklingError, RecursionError):
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+    return True
@@ -1,12 +1,45 @@
 #!/usr/bin/env python3
 import sys, os
-from .lexer import Lexer
+from .lexer import WordCache, StreamLexer
+from .tokenstream import TokenStream
 from .parser import Parser
-from .compiler import Compiler
+from .parallel import parse_parallel
+from .session import CompilationSession
 from .vm import VM
+from .fastvm import FastVM
+from . import cache
+from .aot import compile_ahead
+from .ast import ProgramAST
+from .compiler import DEFAULT_OPT_LEVEL, MAX_OPT_LEVEL
+
+STREAM_THRESHOLD = 1 << 20
 
 def usage():
-    print("콜 [소스코드_파일] [--디버그|-디]")
+    print("콜 [소스코드_파일] [--디버그|-디] [--병렬|-병] [--캐시없이|-캐] [--미리컴파일|-미] [--빠른실행|-빠] [--통계|-통] [--지연파싱|-지] [-O0|-O1|-O2]")
+
+def parse_file(file_path: str, is_debug: bool = False,
+               is_parallel: bool = False, is_lazy: bool = False) -> ProgramAST:
+    if is_parallel:
+        with open(file_path, "r") as f:
+            return parse_parallel(f.read(), lazy=is_lazy)
+
+    word_cache = WordCache()
+    if os.path.getsize(file_path) > STREAM_THRESHOLD:
+        # 큰 파일은 통째로 읽지 않고 조각 단위로 읽으면서 토큰을 만듦
+        tokens = StreamLexer(file_path, word_cache)
+        if is_debug:
+            tokens.print()
+            tokens = StreamLexer(file_path, word_cache)
+    else:
+        with open(file_path, "r") as f:
+            tokens = TokenStream(f.read(), word_cache)
+        if is_debug:
+            tokens.print()
+    if is_debug:
+        print(word_cache)
+    # 지연 파싱은 함수 본문을 처음 컴파일할 때 파싱하므로, 호출되지 않는
+    # 함수 본문의 문법 에러는 보고되지 않을 수 있음
+    return Parser(tokens, lazy=is_lazy).parse()
 
 def main():
     argv = sys.argv
@@ -14,28 +47,56 @@ def main():
         usage()
         return
     
-    is_debug: bool = False
-    if len(argv) >= 3 and argv[2] in ["--디버그","-디"]:
-        is_debug = True
+    options = argv[2:]
+    is_debug: bool = "--디버그" in options or "-디" in options
+    is_parallel: bool = "--병렬" in options or "-병" in options
+    is_ahead: bool = "--미리컴파일" in options or "-미" in options
+    is_fast: bool = "--빠른실행" in options or "-빠" in options
+    is_stats: bool = "--통계" in options or "-통" in options
+    is_lazy: bool = "--지연파싱" in options or "-지" in options
     file_path = argv[1]
-    
-    try:
-        with open(file_path, "r") as f:
-            code = f.read()
-    except FileNotFoundError:
-        print(f"{file_path}에서 코드를 찾을 수 없습니다.")
+
+    # -O0은 최적화 없이, -O1은 상수 접기와 핍홀 최적화, -O2는 그 위에
+    # 제어 흐름 그래프 최적화까지 함. 여러 번 주면 마지막 것을 씀
+    opt_level = DEFAULT_OPT_LEVEL
+    for option in options:
+        if option.startswith("-O") and option[2:].isdigit():
+            opt_level = int(option[2:])
+    if opt_level > MAX_OPT_LEVEL:
+        usage()
         return
     
-    lexer = Lexer(code)
-    if is_debug:
-        lexer.print()
-        lexer.__init__(code)
-    parser = Parser(lexer)
-    ast = parser.parse()
-    if is_debug:
-        print(ast)
-    main_compiler = Compiler()
-    main_compiler.compile_main(ast)
-    vm = VM(main_compiler.assign, main_compiler.const_pool,
-            main_compiler.bytecode)
-    vm.run()
+    # 디버그 모드에서는 토큰과 AST를 보여줘야 하므로 캐시를 쓰지 않음
+    use_cache: bool = not is_debug and \
+        "--캐시없이" not in options and "-캐" not in options
+
+    program = cache.load(file_path, opt_level=opt_level, lazy=is_lazy) \
+        if use_cache else None
+    save_cache: bool = use_cache and program is None
+    if program is None:
+        try:
+            ast = parse_file(file_path, is_debug, is_parallel, is_lazy)
+        except FileNotFoundError:
+            print(f"{file_path}에서 코드를 찾을 수 없습니다.")
+            return
+
+        if is_debug:
+            print(ast)
+        program = CompilationSession(opt_level).compile(ast)
+        if is_ahead:
+            compile_ahead(program[1])
+
+    # 빠른 실행은 바이트코드를 정수 코드로 바꿔서 실행함
+    vm = FastVM(*program) if is_fast else VM(*program)
+    try:
+        vm.run()
+    finally:
+        # 실행 중에 처음 호출되어 컴파일된 함수까지 바이트코드로 저장하려고
+        # 실행이 끝난 뒤(종료나 실행 에러로 끝나도) 캐시를 씀
+        if save_cache:
+            cache.save(file_path, *program, opt_level=opt_level,
+                       lazy=is_lazy)
+    if is_stats:
+        # 필드/메서드 인라인 캐시가 맞은 수와 틀린 수를 보여줌
+        for name, (hits, misses) in sorted(vm.inline_cache_stats().items()):
+            print(f"{name}: 맞음 {hits}, 틀림 {misses}", file=sys.stderr)
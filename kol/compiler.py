@@ -2,16 +2,164 @@ from .ast import *
 from .bytecode import *
 from .func import Func
 from .struct import Struct, Class
-from .builtin import builtins
+from .builtin import builtins, pure_builtins
+from .peephole import optimize as peephole_optimize
+from .ir import optimize as ir_optimize
+from .symtable import Scope
+from .constpool import ConstPool
+from types import SimpleNamespace
+import operator
+
+# 상수 접기로 만들 수 있는 문자열 길이와 정수 비트 수의 상한
+MAX_FOLD_SIZE = 1 << 12
+
+# 최적화 단계
+#  0: 방문 함수가 만든 코드를 그대로 씀
+#  1: 상수 접기, 상수 배열/사전, 핍홀 최적화 (기본)
+#  2: 1에 더해 기본 블록 그래프에서 도달 불가 블록 제거, 복사 전파,
+#     쓰이지 않는 저장 제거
+DEFAULT_OPT_LEVEL = 1
+MAX_OPT_LEVEL = 2
+
+# 호출하는 곳에 펼칠 함수의 크기 상한. 결과 식의 AST 노드 수와,
+# 지연 파싱할 때 본문을 파싱하기 전에 보는 본문 토큰 수
+INLINE_MAX_NODES = 16
+INLINE_MAX_TOKENS = 64
+
+def bound_names(body: BodyAST) -> set:
+    # 본문에서 이름을 새로 묶는 문장을 모두 찾음
+    # 함수 본문은 자기 스코프를 따로 가지므로 들어가지 않음
+    names = set()
+    stack = [body]
+    while stack:
+        ast = stack.pop()
+        if isinstance(ast, BodyAST):
+            stack.extend(ast.stmts)
+        elif isinstance(ast, AssignAST):
+            if isinstance(ast.lvalue, IdentifierAST):
+                names.add(ast.lvalue.ident)
+        elif isinstance(ast, (FuncAST, ClassAST, StructAST)):
+            names.add(ast.ident)
+        elif isinstance(ast, ForAST):
+            names.add(ast.ident)
+            stack.append(ast.body)
+        elif isinstance(ast, WhileAST):
+            stack.append(ast.body)
+        elif isinstance(ast, CondAST):
+            stack.append(ast.then_body)
+            if ast.else_cond:
+                stack.append(ast.else_cond)
+    return names
+
+# 세는 반복문의 조건과 증가문에 쓰는 연산
+COUNT_COMPARE = {
+    BinAST.OpKind.OP_LT: operator.lt,
+    BinAST.OpKind.OP_LE: operator.le,
+    BinAST.OpKind.OP_GT: operator.gt,
+    BinAST.OpKind.OP_GE: operator.ge,
+}
+COUNT_ADVANCE = {"더": operator.add, "뺀": operator.sub}
+
+def has_continue(body: BodyAST) -> bool:
+    # 이 반복문으로 돌아가는 계속하기가 있는지 찾음
+    # 안쪽 반복문의 계속하기는 그 반복문으로 가므로 들어가지 않음
+    stack = [body]
+    while stack:
+        ast = stack.pop()
+        if isinstance(ast, ContinueAST):
+            return True
+        if isinstance(ast, BodyAST):
+            stack.extend(ast.stmts)
+        elif isinstance(ast, CondAST):
+            stack.append(ast.then_body)
+            if ast.else_cond:
+                stack.append(ast.else_cond)
+    return False
+
+def expr_children(ast: ExprAST) -> list:
+    if isinstance(ast, BinAST):
+        return [ast.left, ast.right]
+    if isinstance(ast, (CallExprAST, CallStmtAST)):
+        return [ast.callee, *ast.params]
+    if isinstance(ast, (FieldAccessAST, MethodAccessAST)):
+        return [ast.target]
+    if isinstance(ast, IndexAccessAST):
+        return [ast.target, ast.idx]
+    if isinstance(ast, ArrayAST):
+        return list(ast.elems)
+    if isinstance(ast, DictAST):
+        return [*ast.dict_values.keys(), *ast.dict_values.values()]
+    return []
+
+class InlineFunc:
+    # 호출하는 곳에 펼칠 수 있는 전역 함수
+    # slot은 함수가 들어 있는 전역 변수, const_index는 상수 풀의 함수 위치,
+    # free_names는 결과 식에서 매개변수가 아닌(전역) 이름들
+    def __init__(self, ident: str, slot: int, const_index: int,
+                 params: list[str], expr: ExprAST, free_names: frozenset,
+                 builtin_names: frozenset):
+        self.ident = ident
+        self.slot = slot
+        self.const_index = const_index
+        self.params = params
+        self.expr = expr
+        self.free_names = free_names
+        self.builtin_names = builtin_names
+
+def inline_candidate(ast: FuncAST, slot: int, const_index: int,
+                     builtin_names: frozenset) -> InlineFunc|None:
+    # 본문이 "결과 값은 ...가 된다. 그리고 끝난다." 한 문장뿐이고 자기 자신을
+    # 부르지 않는 작은 함수만 펼침
+    if ast.body_range is not None and not ast.is_body_parsed() and \
+        ast.body_range[1] - ast.body_range[0] > INLINE_MAX_TOKENS:
+        return None
+    stmts = ast.body.stmts
+    if len(stmts) != 1 or not isinstance(stmts[0], ReturnAST):
+        return None
+    names = set()
+    count = 0
+    stack = [stmts[0].value]
+    while stack:
+        node = stack.pop()
+        count += 1
+        if count > INLINE_MAX_NODES:
+            return None
+        if isinstance(node, IdentifierAST):
+            names.add(node.ident)
+        stack.extend(expr_children(node))
+    if ast.ident in names:
+        return None
+    return InlineFunc(ast.ident, slot, const_index, ast.params,
+                      stmts[0].value, frozenset(names - set(ast.params)),
+                      builtin_names)
+
+def apply_op(op: Bytecode, *args):
+    # 연산 바이트코드를 작은 가짜 VM 위에서 실행해 VM과 똑같은 결과를 얻음
+    vm = SimpleNamespace(stack=list(args))
+    op(vm)
+    return vm.stack.pop()
+
+def is_small_const(value) -> bool:
+    if value is None or isinstance(value, (bool, float)):
+        return True
+    if isinstance(value, int):
+        return value.bit_length() <= MAX_FOLD_SIZE
+    if isinstance(value, str):
+        return len(value) <= MAX_FOLD_SIZE
+    return False
 
 class Compiler:
-    def __init__(self, global_scope:dict = {}, const_pool:list = [], 
-                 class_scope: dict = {}):
-        self.scope = {}
+    def __init__(self, global_scope: Scope|None = None,
+                 const_pool: list|None = None, class_scope: dict|None = None,
+                 peephole: bool = True, opt_level: int|None = None):
+        # 함수를 컴파일할 때는 global_scope가 함수를 정의한 스코프이고
+        # 자기 스코프는 그것을 부모로 이어서 바깥 이름을 찾음
+        # 상수 풀과 유형 스코프를 넘기지 않으면 컴파일러마다 새로 만듦
+        self.scope = Scope(global_scope)
         self.global_scope = global_scope
         self.bytecode = []
-        self.class_scope = class_scope
-        self.const_pool = const_pool
+        self.class_scope = {} if class_scope is None else class_scope
+        self.const_pool = ConstPool() if const_pool is None else const_pool
         self.cont_binds = []
         self.brek_binds = []
         self.visit_map = {
@@ -45,6 +193,20 @@ class Compiler:
         }
         self.is_global = False
         self.assign = 0
+        # 다시 묶이지 않아 상수 접기나 반복문 합치기에 써도 되는 내장 함수 이름들
+        self.builtin_names = frozenset()
+        # peephole을 끄면 최적화 단계와 상관없이 핍홀 최적화를 하지 않음
+        self.peephole = peephole
+        self.opt_level = DEFAULT_OPT_LEVEL if opt_level is None else opt_level
+        # 펼칠 수 있는 전역 함수들. 최상위 코드를 컴파일하면서 채우고
+        # 함수를 컴파일할 때 넘겨 줌
+        self.inline_funcs: dict[str, InlineFunc] = {}
+        # 지금 펼치고 있는 함수들과, 그 매개변수 이름이 가리키는 슬롯
+        self.inlining: list[str] = []
+        self.inline_names: dict[str, int]|None = None
+        # 펼친 함수의 매개변수에 쓰고 다시 쓰는 슬롯
+        self.inline_slots: list[int] = []
+        self.inline_depth = 0
 
     def get_global_scope(self):
         if self.is_global:
@@ -54,8 +216,12 @@ class Compiler:
 
     @staticmethod
     def compile_func(func: Func, const_pool):
-        compiler = Compiler(func.current_scope, const_pool, func.class_scope)
-        compiler.do_compile_func(func.args, func.code.body)
+        compiler = Compiler(func.current_scope, const_pool, func.class_scope,
+                            opt_level=func.opt_level)
+        compiler.builtin_names = func.builtin_names - set(func.args) \
+            - bound_names(func.ast.body)
+        compiler.inline_funcs = func.inline_funcs
+        compiler.do_compile_func(func.args, func.ast.body)
         func.code = compiler.bytecode
         func.local_count = compiler.assign
 
@@ -67,15 +233,41 @@ class Compiler:
         if not isinstance(self.bytecode[-1], Ret):
             self.bytecode.append(LoadConst(None))
             self.bytecode.append(Ret())
+        self.optimize(len(args))
+
+    def optimize(self, param_count: int|None = None):
+        if self.opt_level >= 2:
+            self.bytecode = ir_optimize(self.bytecode, param_count)
+        if self.opt_level >= 1 and self.peephole:
+            self.bytecode = peephole_optimize(self.bytecode)
 
     def compile_main(self, ast):
         self.assign = len(builtins)
         for i, ident in enumerate(builtins):
             self.scope[ident] = i        
+        # 프로그램 어디에서도 다시 묶이지 않는 내장 함수만 미리 계산함
+        if self.opt_level >= 1:
+            self.builtin_names = frozenset(builtins) - bound_names(ast.body)
         self.visit(ast)
+        self.optimize()
 
     def visit(self, ast):
-        self.visit_map[type(ast)](ast)
+        # 식 방문 함수들은 제너레이터로, 자식 노드를 yield하면 여기서
+        # 명시적인 스택에 쌓아 방문함. 식이 아무리 깊게 중첩되어도
+        # 파이썬 스택을 더 쓰지 않음. 제너레이터가 아닌 방문 함수는 바로 끝남
+        step = self.visit_map[type(ast)](ast)
+        if step is None:
+            return
+        stack = [step]
+        while stack:
+            try:
+                child = stack[-1].send(None)
+            except StopIteration:
+                stack.pop()
+                continue
+            step = self.visit_map[type(child)](child)
+            if step is not None:
+                stack.append(step)
 
     def visit_program(self, ast: ProgramAST):
         self.is_global = True
@@ -102,8 +294,11 @@ class Compiler:
 
         funcs = {}
         for func_ast in ast.funcs:
-            funcs[func_ast.ident] = Func(func_ast, self.scope|self.global_scope, 
+            funcs[func_ast.ident] = Func(func_ast, self.scope,
                                          class_scope=self.class_scope)
+            funcs[func_ast.ident].builtin_names = self.builtin_names
+            funcs[func_ast.ident].opt_level = self.opt_level
+            funcs[func_ast.ident].inline_funcs = self.inline_funcs
 
         self.class_scope[ast.ident] = len(self.const_pool)
         self.bytecode.append(StoreFromConstPool(
@@ -119,40 +314,129 @@ class Compiler:
             self.scope[ast.ident] = self.assign
             self.assign += 1
 
+        const_index = len(self.const_pool)
         self.bytecode.append(StoreFromConstPool(
-            len(self.const_pool), self.scope[ast.ident]))
-        self.const_pool.append(Func(ast, self.scope|self.global_scope,
-                                    class_scope=self.class_scope))
+            const_index, self.scope[ast.ident]))
+        func = Func(ast, self.scope, class_scope=self.class_scope)
+        func.builtin_names = self.builtin_names
+        func.opt_level = self.opt_level
+        func.inline_funcs = self.inline_funcs
+        self.const_pool.append(func)
+        if self.is_global and self.opt_level >= 1:
+            target = inline_candidate(ast, self.scope[ast.ident], const_index,
+                                      self.builtin_names)
+            if target:
+                self.inline_funcs[ast.ident] = target
+            else:
+                self.inline_funcs.pop(ast.ident, None)
         if ast.ident in self.class_scope:
             self.class_scope.pop(ast.ident)
 
     def visit_while(self, ast: WhileAST):
         tmp_cont, tmp_brek = self.cont_binds, self.brek_binds
         self.cont_binds, self.brek_binds = [], []
+        count = self.counted_loop(ast)
+        if count:
+            self.visit_count_loop(ast, *count)
+        else:
+            repeat_ip = len(self.bytecode)
+            self.visit(ast.cond)
+            end = self.label()
+            self.bytecode.append(JmpIfFalse())
+            self.visit(ast.body)
+            self.bytecode.append(Jmp(repeat_ip))
+            self.bind(end)
+            self.loop_finish(repeat_ip, len(self.bytecode))
+        self.cont_binds, self.brek_binds = tmp_cont, tmp_brek
+
+    def counted_loop(self, ast: WhileAST) -> tuple|None:
+        # "계속 i가 n보다 작다인 동안 ... i는 i와 1을 더한 것이 된다." 모양이면
+        # (비교 연산, 증가 연산, 증가량)을 반환함
+        # i는 이미 있는 변수여야 하고, 마지막 증가문 말고는 i와 n을 다시
+        # 묶거나 계속하기로 증가문을 건너뛰면 안 됨
+        cond, stmts = ast.cond, ast.body.stmts
+        if not isinstance(cond, BinAST) or cond.op not in COUNT_COMPARE or \
+            not isinstance(cond.left, IdentifierAST) or \
+            cond.left.ident not in self.scope or not stmts:
+            return None
+        ident = cond.left.ident
+        if not isinstance(cond.right, (IntegerAST, IdentifierAST)) or \
+            getattr(cond.right, "ident", None) == ident:
+            return None
+
+        last = stmts[-1]
+        if not isinstance(last, AssignAST) or \
+            not isinstance(last.lvalue, IdentifierAST) or \
+            last.lvalue.ident != ident or \
+            not isinstance(last.rvalue, CallExprAST):
+            return None
+        call = last.rvalue
+        if not isinstance(call.callee, IdentifierAST) or \
+            call.callee.ident not in COUNT_ADVANCE or \
+            call.callee.ident not in self.builtin_names or \
+            len(call.params) != 2 or \
+            not isinstance(call.params[0], IdentifierAST) or \
+            call.params[0].ident != ident or \
+            type(call.params[1]) is not IntegerAST:
+            return None
+
+        compare = COUNT_COMPARE[cond.op]
+        advance = COUNT_ADVANCE[call.callee.ident]
+        step = call.params[1].num
+        delta = step if advance is operator.add else -step
+        if delta == 0 or (delta > 0) != (compare in (operator.lt, operator.le)):
+            return None
+
+        rest = BodyAST(stmts[:-1])
+        names = bound_names(rest)
+        if ident in names or getattr(cond.right, "ident", None) in names or \
+            has_continue(rest):
+            return None
+        return compare, advance, step
+
+    def visit_count_loop(self, ast: WhileAST, compare, advance, step):
+        # 증가문 대신 반복자가 i에 차례로 값을 넣음
+        # 반복이 끝나면 조건과 증가문을 한 번 실행해서, i가 원래 반복문이
+        # 끝났을 때와 같은 값을 갖게 함. 멈추기는 이것을 건너뜀
+        self.visit(ast.cond.left)
+        self.visit(ast.cond.right)
+        self.bytecode.append(CountPrepare(compare, advance, step))
         repeat_ip = len(self.bytecode)
+        self.bytecode.append(ForIter(self.scope[ast.cond.left.ident]))
+        for stmt in ast.body.stmts[:-1]:
+            self.visit(stmt)
+        self.bytecode.append(Jmp(repeat_ip))
+        self.bind(repeat_ip)
         self.visit(ast.cond)
         end = self.label()
         self.bytecode.append(JmpIfFalse())
-        self.visit(ast.body)
-        self.bytecode.append(Jmp(repeat_ip))
+        self.visit(ast.body.stmts[-1])
         self.bind(end)
         self.loop_finish(repeat_ip, len(self.bytecode))
-        self.cont_binds, self.brek_binds = tmp_cont, tmp_brek
+        self.bytecode.append(ForInDone())
 
     def visit_for(self, ast: ForAST):
         tmp_cont, tmp_brek = self.cont_binds, self.brek_binds
         self.cont_binds, self.brek_binds = [], []
         self.scope[ast.ident] = self.assign
         self.assign += 1
-        self.visit(ast.iter)
-        self.bytecode.append(ForInPrepare())
+        if isinstance(ast.iter, CallExprAST) and \
+            isinstance(ast.iter.callee, IdentifierAST) and \
+            ast.iter.callee.ident == "범위를_만든" and \
+            ast.iter.callee.ident in self.builtin_names and \
+            len(ast.iter.params) == 2:
+            # 범위 배열을 만들지 않고 range를 바로 돌림
+            for param in ast.iter.params:
+                self.visit(param)
+            self.bytecode.append(RangePrepare())
+        else:
+            self.visit(ast.iter)
+            self.bytecode.append(ForInPrepare())
         repeat_ip = len(self.bytecode)
-        self.bytecode.append(ForInStep(self.scope[ast.ident]))
-        end = self.label()
-        self.bytecode.append(JmpIfFalse())
+        self.bytecode.append(ForIter(self.scope[ast.ident]))
         self.visit(ast.body)
         self.bytecode.append(Jmp(repeat_ip))
-        self.bind(end)
+        self.bind(repeat_ip)
         self.loop_finish(repeat_ip, len(self.bytecode))
         self.bytecode.append(ForInDone())
         self.cont_binds, self.brek_binds = tmp_cont, tmp_brek
@@ -181,6 +465,11 @@ class Compiler:
 
     def visit_return(self, ast: ReturnAST):
         self.visit(ast.value)
+        # 호출 결과를 바로 돌려주면 꼬리 호출로 바꿈. 펼친 함수라면
+        # 다시 묶였을 때 쓰는 보통 호출만 바뀜
+        if isinstance(ast.value, CallExprAST) and not self.is_global and \
+            self.opt_level >= 1 and type(self.bytecode[-1]) is Call:
+            self.bytecode[-1] = TailCall(self.bytecode[-1].param_count)
         self.bytecode.append(Ret())
 
     def visit_assign(self, ast: AssignAST):
@@ -215,11 +504,12 @@ class Compiler:
         self.bytecode.append(Pop())
 
     def visit_bin(self, ast: BinAST):
+        start = len(self.bytecode)
         if ast.op == BinAST.OpKind.OP_AND:
-            self.visit(ast.left)
+            yield ast.left
             left_false = self.label()
             self.bytecode.append(JmpIfFalse())
-            self.visit(ast.right)
+            yield ast.right
             right_false = self.label()
             self.bytecode.append(JmpIfFalse())
             self.bytecode.append(LoadConst(True))
@@ -229,11 +519,12 @@ class Compiler:
             self.bind(right_false)
             self.bytecode.append(LoadConst(False))
             self.bind(end)
+            self.fold_logical(start, lambda a, b: bool(a) and bool(b))
         elif ast.op == BinAST.OpKind.OP_OR:
-            self.visit(ast.left)
+            yield ast.left
             left_true = self.label()
             self.bytecode.append(JmpIfTrue())
-            self.visit(ast.right)
+            yield ast.right
             right_true = self.label()
             self.bytecode.append(JmpIfTrue())
             self.bytecode.append(LoadConst(False))
@@ -243,101 +534,248 @@ class Compiler:
             self.bind(right_true)
             self.bytecode.append(LoadConst(True))
             self.bind(end)
+            self.fold_logical(start, lambda a, b: bool(a) or bool(b))
         else:
-            self.visit(ast.left)
-            self.visit(ast.right)
+            yield ast.left
+            yield ast.right
             match ast.op:
                 case BinAST.OpKind.OP_EQUAL:
-                    self.bytecode.append(EqualOp())
+                    op = EqualOp()
                 case BinAST.OpKind.OP_NOTEQUAL:
-                    self.bytecode.append(NotEqualOp())
+                    op = NotEqualOp()
                 case BinAST.OpKind.OP_LIKE:
-                    self.bytecode.append(LikeOp())
+                    op = LikeOp()
                 case BinAST.OpKind.OP_NOTLIKE:
-                    self.bytecode.append(NotLikeOp())
+                    op = NotLikeOp()
                 case BinAST.OpKind.OP_GT:
-                    self.bytecode.append(GTOp())
+                    op = GTOp()
                 case BinAST.OpKind.OP_GE:
-                    self.bytecode.append(GEOp())
+                    op = GEOp()
                 case BinAST.OpKind.OP_LT:
-                    self.bytecode.append(LTOp())
+                    op = LTOp()
                 case BinAST.OpKind.OP_LE:
-                    self.bytecode.append(LEOp())
+                    op = LEOp()
                 case BinAST.OpKind.OP_SHL:
-                    self.bytecode.append(SHLOp())
+                    op = SHLOp()
                 case BinAST.OpKind.OP_SHR:
-                    self.bytecode.append(SHROp())
+                    op = SHROp()
+                case _:
+                    return
+            args = self.const_operands(start, 2)
+            if args is None or isinstance(op, SHLOp) and \
+                isinstance(args[1], int) and args[1] > MAX_FOLD_SIZE or \
+                not self.fold(start, lambda a, b: apply_op(op, a, b), args):
+                self.bytecode.append(op)
 
     def visit_field_access(self, ast: FieldAccessAST):
-        self.visit(ast.target)
+        yield ast.target
         self.bytecode.append(LoadField(ast.field))
 
     def visit_method_access(self, ast: MethodAccessAST):
-        self.visit(ast.target)
+        yield ast.target
         self.bytecode.append(LoadMethod(ast.method.ident))
 
     def visit_index_access(self, ast: IndexAccessAST):
-        self.visit(ast.target)
-        self.visit(ast.idx)
+        yield ast.target
+        yield ast.idx
         self.bytecode.append(LoadIndex())
 
     def visit_call_expr(self, ast: CallExprAST):
+        target = self.inline_target(ast)
+        if target:
+            yield from self.visit_inline_call(ast, target)
+            return
+        start = len(self.bytecode)
         param_count = 0
         if isinstance(ast.callee, MethodAccessAST):
-            self.visit(ast.callee.target)
+            yield ast.callee.target
             param_count += 1
         for arg in ast.params:
-            self.visit(arg)
+            yield arg
             param_count += 1
         
-        self.visit(ast.callee)
+        if isinstance(ast.callee, IdentifierAST) and \
+            ast.callee.ident in self.builtin_names and \
+            ast.callee.ident in pure_builtins:
+            args = self.const_operands(start, param_count)
+            if args is not None and \
+                self.fold(start, builtins[ast.callee.ident].code, args):
+                return
+        yield ast.callee
         self.bytecode.append(Call(param_count))
 
+    def inline_target(self, ast: CallExprAST) -> InlineFunc|None:
+        if not isinstance(ast.callee, IdentifierAST):
+            return None
+        ident = ast.callee.ident
+        target = self.inline_funcs.get(ident)
+        if target is None or ident in self.inlining or \
+            len(ast.params) != len(target.params):
+            return None
+        # 호출하는 쪽에서 이 이름이 지역 변수나 매개변수를 가리키면 다른 함수임
+        if self.inline_names is not None:
+            if ident in self.inline_names:
+                return None
+        elif not self.is_global and ident in self.scope:
+            return None
+        # 결과 식의 전역 이름이 아직 없으면 함수를 컴파일할 때와 다르게 됨
+        scope = self.get_global_scope()
+        try:
+            for name in target.free_names:
+                scope.lookup(name)
+        except KeyError:
+            return None
+        return target
+
+    def visit_inline_call(self, ast: CallExprAST, target: InlineFunc):
+        # 인자를 계산한 뒤 함수가 그대로면 매개변수 슬롯에 넣고 결과 식을
+        # 바로 계산함. 전역 변수가 다른 값이면 보통 호출을 함
+        for arg in ast.params:
+            yield arg
+        guard = self.label()
+        self.bytecode.append(InlineGuard(target.slot, target.const_index))
+
+        depth = self.inline_depth
+        while len(self.inline_slots) < depth + len(target.params):
+            self.inline_slots.append(self.assign)
+            self.assign += 1
+        slots = tuple(self.inline_slots[depth:depth + len(target.params)])
+        if slots:
+            self.bytecode.append(BindArgs(slots))
+
+        saved = self.inline_names, self.builtin_names
+        self.inline_names = dict(zip(target.params, slots))
+        self.builtin_names = target.builtin_names - set(target.params)
+        self.inlining.append(target.ident)
+        self.inline_depth += len(slots)
+        yield target.expr
+        self.inline_depth = depth
+        self.inlining.pop()
+        self.inline_names, self.builtin_names = saved
+
+        end = self.label()
+        self.bytecode.append(Jmp())
+        self.bind(guard)
+        self.bytecode.append(LoadGlobal(target.slot))
+        self.bytecode.append(Call(len(ast.params)))
+        self.bind(end)
+
     def visit_call_stmt(self, ast: CallStmtAST):
         param_count = 0
         if isinstance(ast.callee, MethodAccessAST):
-            self.visit(ast.callee.target)
+            yield ast.callee.target
             param_count += 1
         for arg in ast.params:
-            self.visit(arg)
+            yield arg
             param_count += 1
-        self.visit(ast.callee)
+        yield ast.callee
         self.bytecode.append(Call(param_count))
         self.bytecode.append(Pop())
         self.bytecode.append(LoadConst(None))
 
     def visit_number(self, ast: IntegerAST|FloatAST):
-        self.bytecode.append(LoadConst(ast.num))
+        self.load_const(ast.num)
 
     def visit_string(self, ast: StringAST):
-        self.bytecode.append(LoadConst(ast.str))
+        self.load_const(ast.str)
 
     def visit_bool(self, ast: BoolAST):
-        self.bytecode.append(LoadConst(ast.value))
+        self.load_const(ast.value)
 
     def visit_array(self, ast: ArrayAST):
+        start = len(self.bytecode)
         for elem in ast.elems:
-            self.visit(elem)
+            yield elem
+        elems = self.const_operands(start, len(ast.elems))
+        if elems is not None and self.opt_level >= 1:
+            # 원소가 모두 상수인 배열은 상수 하나로 만들고 불러올 때 복사함
+            del self.bytecode[start:]
+            self.bytecode.append(LoadConstCopy(self.intern(elems)))
+            return
         self.bytecode.append(BuildArray(len(ast.elems)))
 
 
     def visit_dict(self, ast: DictAST):
+        start = len(self.bytecode)
         for key in ast.dict_values:
-            self.visit(key)
-            self.visit(ast.dict_values[key])
+            yield key
+            yield ast.dict_values[key]
+        items = self.const_operands(start, len(ast.dict_values) * 2)
+        if items is not None and self.opt_level >= 1:
+            # BuildDict는 뒤의 쌍부터 꺼내 넣으므로 같은 순서로 만듦
+            dic = {}
+            for i in range(len(items) - 2, -1, -2):
+                dic[items[i]] = items[i + 1]
+            del self.bytecode[start:]
+            self.bytecode.append(LoadConstCopy(self.intern(dic)))
+            return
         self.bytecode.append(BuildDict(len(ast.dict_values)))
 
     def visit_none(self, ast: NoneAST):
-        self.bytecode.append(LoadConst(None))
+        self.load_const(None)
 
     def visit_identifier(self, ast: IdentifierAST):
-        if self.is_global:
+        if self.inline_names is not None:
+            # 펼친 함수의 결과 식에서 매개변수가 아닌 이름은 모두 전역 이름
+            slot = self.inline_names.get(ast.ident)
+            if slot is None:
+                self.bytecode.append(
+                    LoadGlobal(self.get_global_scope().lookup(ast.ident)))
+            elif self.is_global:
+                self.bytecode.append(LoadGlobal(slot))
+            else:
+                self.bytecode.append(LoadLocal(slot))
+        elif self.is_global:
             self.bytecode.append(LoadGlobal(self.scope[ast.ident]))
         elif ast.ident in self.scope:
             self.bytecode.append(LoadLocal(self.scope[ast.ident]))
         else:
-            self.bytecode.append(LoadGlobal(self.global_scope[ast.ident]))
-
+            self.bytecode.append(LoadGlobal(self.global_scope.lookup(ast.ident)))
+
+
+    def intern(self, value):
+        # 상수 풀에 같은 값이 있으면 그 객체를 씀. 상수 풀이 ConstPool이
+        # 아니면(따로 컴파일하는 경우) 그대로 씀
+        if isinstance(self.const_pool, ConstPool):
+            return self.const_pool.intern(value)
+        return value
+
+    def load_const(self, value):
+        self.bytecode.append(LoadConst(self.intern(value)))
+
+    def const_operands(self, start: int, count: int) -> list|None:
+        # start부터 나온 코드가 정확히 LoadConst count개라면 그 값들을 반환함
+        operands = self.bytecode[start:]
+        if len(operands) != count or \
+            not all(isinstance(code, LoadConst) for code in operands):
+            return None
+        return [code.const for code in operands]
+
+    def fold(self, start: int, compute, args: list) -> bool:
+        # 상수 인자로 미리 계산해서 start부터의 코드를 LoadConst 하나로 바꿈
+        # 계산이 실패하면 실행 중에 같은 에러가 나도록 그대로 둠
+        if self.opt_level < 1 or not all(is_small_const(arg) for arg in args):
+            return False
+        if compute is builtins["곱"].code and \
+            any(isinstance(arg, str) for arg in args) and \
+            any(isinstance(arg, int) and arg > MAX_FOLD_SIZE for arg in args):
+            return False
+        try:
+            value = compute(*args)
+        except Exception:
+            return False
+        if not is_small_const(value):
+            return False
+        del self.bytecode[start:]
+        self.load_const(value)
+        return True
+
+    def fold_logical(self, start: int, compute):
+        # 그리고/또는의 양쪽이 모두 상수면 분기 코드 전체를 결과 하나로 바꿈
+        code = self.bytecode[start:]
+        if len(code) == 7 and isinstance(code[0], LoadConst) and \
+            isinstance(code[2], LoadConst):
+            self.fold(start, compute, [code[0].const, code[2].const])
 
     def loop_finish(self, cont_bind, brek_bind):
         for cont in self.cont_binds:
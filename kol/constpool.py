@@ -0,0 +1,29 @@
+def const_key(value):
+    # 같은 상수인지 가리는 키. 1, 1.0, 참은 서로 같다고 비교되므로 타입을
+    # 함께 넣고, 소수는 -0.0과 nan도 구분되도록 hex로 바꿈
+    if isinstance(value, float):
+        return (float, value.hex())
+    if isinstance(value, list):
+        return (list, tuple(const_key(elem) for elem in value))
+    if isinstance(value, dict):
+        return (dict, tuple((const_key(key), const_key(elem))
+                            for key, elem in value.items()))
+    return (type(value), value)
+
+
+class ConstPool(list):
+    # 프로그램 하나가 쓰는 상수 풀
+    # 함수와 유형 말고도 리터럴 값을 넣어 두고, 같은 값은 어느 함수에서
+    # 나오든 상수 풀의 같은 객체를 쓰도록 함
+    def __init__(self, consts=()):
+        super().__init__(consts)
+        self.interned: dict = {}
+
+    def intern(self, value):
+        key = const_key(value)
+        index = self.interned.get(key)
+        if index is None:
+            index = len(self)
+            self.append(value)
+            self.interned[key] = index
+        return self[index]
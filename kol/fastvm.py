@@ -0,0 +1,217 @@
+from .vm import VM
+from .func import Func
+from .struct import Struct
+from .bytecode import like
+from .opcode import *
+import types
+function = types.FunctionType
+
+_EXHAUSTED = object()
+
+
+class FastVM(VM):
+    # VM과 같은 프로그램을 정수 코드(opcode.py)로 바꿔서 실행하는 실행기
+    # 명령마다 바이트코드 객체를 부르는 대신 while 하나에서 명령 번호로
+    # 갈라지고, ip/스택/지역 변수를 파이썬 지역 변수에 두고 씀
+    # 호출할 때는 프레임 객체 대신 (코드, 상수표, ip, 지역 변수, 반복자)를 쌓음
+    def __init__(self, global_len, const_pool, bytecode):
+        super().__init__(global_len, const_pool, bytecode)
+        # 함수마다 한 번만 만드는 코드 객체
+        self.code_objects: dict = {}
+
+    def code_object(self, func: Func) -> CodeObject:
+        code_object = self.code_objects.get(func)
+        if code_object is None:
+            if not func.is_compiled():
+                from .compiler import Compiler
+                Compiler.compile_func(func, self.const_pool)
+            code_object = self.code_objects[func] = assemble(func.code)
+        return code_object
+
+    def run(self):
+        stack = self.stack
+        push = stack.append
+        pop = stack.pop
+        global_list = self.global_list
+        const_pool = self.const_pool
+        frames = []
+
+        main = assemble(self.global_code)
+        code = main.code
+        consts = main.consts
+        # 최상위 코드에서는 지역 변수 대신 전역 변수에 씀
+        local_list = global_list
+        for_iter = None
+        ip = 0
+        while True:
+            op = code[ip]
+            arg = code[ip + 1]
+            ip += INST_SIZE
+            if op == LOAD_LOCAL:
+                push(local_list[arg])
+            elif op == LOAD_CONST:
+                push(consts[arg])
+            elif op == LOAD_GLOBAL:
+                push(global_list[arg])
+            elif op == STORE_LOCAL:
+                top = pop()
+                if isinstance(top, Struct):
+                    top = top.copy()
+                local_list[arg] = top
+            elif op == CALL or op == TAIL_CALL:
+                func: Func = pop()
+                if arg != len(func.args):
+                    raise Exception("실행 에러: 호출된 매개변수와 함수의 매개변수가 다름")
+                if arg:
+                    args = stack[-arg:]
+                    del stack[-arg:]
+                else:
+                    args = []
+
+                if isinstance(func.code, function):
+                    push(func.code(*args))
+                    if op == TAIL_CALL:
+                        code, consts, ip, local_list, for_iter = frames.pop()
+                    continue
+                if op == CALL:
+                    frames.append((code, consts, ip, local_list, for_iter))
+                code_object = self.code_object(func)
+                code = code_object.code
+                consts = code_object.consts
+                args += [None]*(func.local_count - arg)
+                local_list = args
+                for_iter = None
+                ip = 0
+            elif op == JMP_IF_FALSE:
+                if not pop():
+                    ip = arg
+            elif op == FOR_ITER:
+                obj = next(for_iter[-1], _EXHAUSTED)
+                if obj is _EXHAUSTED:
+                    ip = code[ip - 1]
+                else:
+                    local_list[arg] = obj
+            elif op == JMP:
+                ip = arg
+            elif op == STORE_GLOBAL:
+                top = pop()
+                if isinstance(top, Struct):
+                    top = top.copy()
+                global_list[arg] = top
+            elif op == POP:
+                pop()
+            elif op == RET:
+                code, consts, ip, local_list, for_iter = frames.pop()
+            elif op == JMP_IF_TRUE:
+                if pop():
+                    ip = arg
+            elif op == LT:
+                obj2 = pop()
+                stack[-1] = stack[-1] < obj2
+            elif op == LE:
+                obj2 = pop()
+                stack[-1] = stack[-1] <= obj2
+            elif op == GT:
+                obj2 = pop()
+                stack[-1] = stack[-1] > obj2
+            elif op == GE:
+                obj2 = pop()
+                stack[-1] = stack[-1] >= obj2
+            elif op == EQUAL:
+                obj2 = pop()
+                stack[-1] = stack[-1] == obj2
+            elif op == NOT_EQUAL:
+                obj2 = pop()
+                stack[-1] = stack[-1] != obj2
+            elif op == INLINE_GUARD:
+                slot, const_index = consts[arg]
+                if global_list[slot] is not const_pool[const_index]:
+                    ip = code[ip - 1]
+            elif op == BIND_ARGS:
+                for slot in reversed(consts[arg]):
+                    local_list[slot] = pop()
+            # 인라인 캐시가 있는 명령은 상수표의 명령 객체를 캐시로 씀
+            elif op == LOAD_FIELD:
+                inst = consts[arg]
+                obj = stack[-1]
+                if isinstance(obj, Struct) and obj.origin is inst.cache_origin:
+                    inst.hits += 1
+                    stack[-1] = obj.var[inst.field]
+                else:
+                    stack[-1] = inst.target(obj)[inst.field]
+            elif op == STORE_FIELD:
+                inst = consts[arg]
+                obj = pop()
+                if isinstance(obj, Struct) and obj.origin is inst.cache_origin:
+                    inst.hits += 1
+                    obj.var[inst.field] = pop()
+                else:
+                    inst.target(obj)[inst.field] = pop()
+            elif op == LOAD_INDEX:
+                index = pop()
+                stack[-1] = stack[-1][index]
+            elif op == STORE_INDEX:
+                index = pop()
+                obj = pop()
+                obj[index] = pop()
+            elif op == LOAD_METHOD:
+                inst = consts[arg]
+                origin = stack[-1].origin
+                if origin is inst.cache_origin:
+                    inst.hits += 1
+                    stack[-1] = inst.cache_func
+                else:
+                    stack[-1] = inst.lookup(origin, const_pool)
+            elif op == LOAD_CONST_COPY:
+                push(consts[arg].copy())
+            elif op == BUILD_ARRAY:
+                if arg:
+                    arr = stack[-arg:]
+                    del stack[-arg:]
+                    push(arr)
+                else:
+                    push([])
+            elif op == BUILD_DICT:
+                dic = {}
+                for _ in range(arg):
+                    value = pop()
+                    key = pop()
+                    dic[key] = value
+                push(dic)
+            # 반복자 목록은 반복문을 처음 시작할 때 만듦
+            elif op == FOR_IN_PREPARE:
+                if for_iter is None:
+                    for_iter = []
+                for_iter.append(iter(pop()))
+            elif op == RANGE_PREPARE:
+                if for_iter is None:
+                    for_iter = []
+                end = pop()
+                for_iter.append(iter(range(pop(), end)))
+            elif op == COUNT_PREPARE:
+                if for_iter is None:
+                    for_iter = []
+                bound = pop()
+                for_iter.append(consts[arg].values(pop(), bound))
+            elif op == FOR_IN_DONE:
+                for_iter.pop()
+            elif op == STORE_FROM_CONST_POOL:
+                local_list[code[ip - 1]] = const_pool[arg]
+            elif op == LIKE:
+                obj2 = pop()
+                stack[-1] = like(stack[-1], obj2)
+            elif op == NOT_LIKE:
+                obj2 = pop()
+                stack[-1] = not like(stack[-1], obj2)
+            elif op == SHL:
+                count = pop()
+                stack[-1] = stack[-1] << count
+            elif op == SHR:
+                count = pop()
+                stack[-1] = stack[-1] >> count
+            elif op == END:
+                if frames:
+                    raise Exception("실행 에러: 함수가 값을 돌려주지 않고 끝남")
+                break
+            else:
+                raise Exception(f"실행 에러: 알 수 없는 명령 {op}")
@@ -2,10 +2,38 @@ from .func import Func
 
 
 class Frame:
-    def __init__(self, func:Func, params: list):
+    # 함수 프레임의 지역 변수는 따로 목록을 만들지 않고 VM 값 스택의
+    # base부터 local_count칸을 씀. 최상위 프레임은 전역 변수 목록을
+    # base 0부터 지역 변수로 씀. 그래서 지역 변수는 언제나
+    # local_list[base + 번호]에 있음
+    def __init__(self, func:Func, local_list: list, base: int):
+        self.local_list = local_list
+        # 반복문을 처음 시작할 때 만듦
+        self.for_iter: list|None = None
+        self.reuse(func, base)
+
+    @classmethod
+    def for_main(cls, code: list, global_list: list) -> "Frame":
+        frame = cls.__new__(cls)
+        frame.func = None
+        frame.code = code
+        frame.local_list = global_list
+        frame.base = 0
+        frame.ip = -1
+        frame.for_iter = None
+        return frame
+
+    def reuse(self, func: Func, base: int):
+        # 놓아준 프레임을 새 호출에 쓰거나, 꼬리 호출에서 새 프레임을 만들지
+        # 않고 이 프레임을 다음 함수에 씀
+        self.func = func
         self.code = func.code
-        self.local_list = [None]*func.local_count
+        self.base = base
         self.ip = -1
-        self.for_iter = []
-        for i,param in enumerate(params):
-            self.local_list[i] = param
\ No newline at end of file
+        if self.for_iter:
+            self.for_iter.clear()
+
+    def release(self):
+        # 함수가 끝나면 반복자를 놓아서 값들이 남아 있지 않게 함
+        if self.for_iter:
+            self.for_iter.clear()
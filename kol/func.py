@@ -1,16 +1,34 @@
 from .ast import FuncAST
+from .symtable import Scope
 import types
 function = types.FunctionType
 
 class Func:
     def __init__(self, ast_or_pyfunc: FuncAST|function, 
-                 global_scope: dict = {}, class_scope: dict = {},
+                 global_scope: Scope|None = None,
+                 class_scope: dict|None = None,
                  params_count = -1):
-        self.code: FuncAST|list|function = ast_or_pyfunc
+        self.ast: FuncAST|None = None
+        self.code: list|function = ast_or_pyfunc
         self.current_scope = global_scope
-        self.class_scope = class_scope
+        self.class_scope = {} if class_scope is None else class_scope
         if isinstance(ast_or_pyfunc, FuncAST):
+            from .bytecode import LAZY_CODE
+            # 컴파일하기 전에는 처음 실행될 때 스스로를 컴파일하는 코드를 가짐
+            self.ast = ast_or_pyfunc
+            self.code = LAZY_CODE
             self.args = ast_or_pyfunc.params
         else:
             self.args = [None]*params_count
-        self.local_count = 0
+        self.local_count = len(self.args)
+        # 함수 본문에서 다시 묶이지 않는 내장 함수 이름들
+        self.builtin_names = frozenset()
+        # 함수를 컴파일할 때 쓸 최적화 단계. None이면 기본 단계
+        self.opt_level: int|None = None
+        # 함수 본문에서 펼칠 수 있는 전역 함수들
+        self.inline_funcs: dict = {}
+
+    def is_compiled(self) -> bool:
+        from .bytecode import LazyCompile
+        return not (isinstance(self.code, list) and self.code and
+                    isinstance(self.code[0], LazyCompile))
@@ -0,0 +1,205 @@
+from .bytecode import *
+
+# 바이트코드를 기본 블록의 제어 흐름 그래프로 바꿔서 최적화한 뒤 다시
+# 바이트코드로 내보냄. 블록은 중간에 점프가 없고 마지막 명령만 점프나 Ret일
+# 수 있으며, 다음 블록은 절대 위치 대신 target(점프)과 fall(그냥 넘어감)로
+# 가리킴. 내보낼 때 블록 위치를 다시 계산해서 점프를 묶음
+# 최적화 단계 -O2에서 쓰는 패스:
+#  - 도달할 수 없는 블록 제거
+#  - 블록 안에서 StoreLocal/LoadLocal 복사 전파
+#  - 지역 변수 활성 분석으로 쓰이지 않는 StoreLocal 제거
+
+
+class Block:
+    def __init__(self, start: int):
+        self.start = start
+        self.code: list = []
+        self.target: Block|None = None
+        self.fall: Block|None = None
+
+    def succs(self) -> list:
+        return [block for block in (self.target, self.fall) if block]
+
+    def __repr__(self):
+        return f"Block(start={self.start!r}, code={self.code!r})"
+
+
+def build_cfg(code: list) -> list[Block]:
+    # 점프 대상과 점프/Ret 바로 뒤가 블록의 시작. 코드 끝을 가리키는
+    # 점프를 위해 마지막에 빈 블록을 둠
+    leaders = {0, len(code)}
+    for i, inst in enumerate(code):
+        if isinstance(inst, JumpCode):
+            leaders.add(inst.ip)
+            leaders.add(i + 1)
+        elif isinstance(inst, Ret):
+            leaders.add(i + 1)
+    starts = sorted(leader for leader in leaders if leader <= len(code))
+    blocks = {start: Block(start) for start in starts}
+    order = [blocks[start] for start in starts]
+
+    for block, nxt in zip(order, order[1:]):
+        block.code = code[block.start:nxt.start]
+        last = block.code[-1] if block.code else None
+        if isinstance(last, JumpCode):
+            block.target = blocks[last.ip]
+        if type(last) is not Jmp and not isinstance(last, Ret):
+            block.fall = nxt
+    return order
+
+
+def emit(blocks: list[Block]) -> list:
+    positions = {}
+    pos = 0
+    for block in blocks:
+        positions[block] = pos
+        pos += len(block.code)
+
+    code = []
+    for block in blocks:
+        if block.target:
+            block.code[-1].bind(positions[block.target])
+        code += block.code
+    return code
+
+
+def remove_unreachable(blocks: list[Block]):
+    # 블록을 지우는 대신 비워 둠. 빈 블록을 가리키는 점프는 다음 블록으로 감
+    seen = set()
+    work = [blocks[0]]
+    while work:
+        block = work.pop()
+        if block in seen:
+            continue
+        seen.add(block)
+        work += block.succs()
+    for block in blocks:
+        if block not in seen:
+            block.code = []
+            block.target = block.fall = None
+
+
+def defined_slots(inst: Bytecode) -> tuple:
+    if isinstance(inst, (StoreLocal, ForIter)):
+        return (inst.index,)
+    if isinstance(inst, StoreFromConstPool):
+        return (inst.scope_index,)
+    if isinstance(inst, BindArgs):
+        return inst.slots
+    return ()
+
+
+def killed_slots(inst: Bytecode) -> tuple:
+    # 반드시 값을 덮어쓰는 명령만 이전 값을 죽임. ForIter는 반복이 끝나면
+    # 변수를 그대로 두고 점프하므로 이전 값이 계속 쓰일 수 있음
+    if isinstance(inst, ForIter):
+        return ()
+    return defined_slots(inst)
+
+
+def copy_safe_slots(blocks: list[Block], param_count: int) -> set:
+    # StoreLocal로만 값이 들어가는 지역 변수. StoreLocal은 구조/유형을
+    # 새 객체로 복사해서 넣으므로 이런 변수를 다른 변수에 복사해도 같은
+    # 객체를 가리킴. 매개변수나 for 변수에는 유형 자체가 들어 있을 수 있음
+    stored = set()
+    unsafe = set(range(param_count))
+    for block in blocks:
+        for inst in block.code:
+            if isinstance(inst, StoreLocal):
+                stored.add(inst.index)
+            else:
+                unsafe.update(defined_slots(inst))
+    return stored - unsafe
+
+
+def propagate_copies(block: Block, safe: set):
+    # "가는 나가 된다" 뒤에 가를 읽으면, 가나 나가 바뀌기 전까지는 나를
+    # 바로 읽음. 상수를 넣은 변수는 그 상수를 바로 넣음
+    copies = {}
+    code = []
+    for inst in block.code:
+        slots = defined_slots(inst)
+        if slots:
+            for slot in slots:
+                copies.pop(slot, None)
+                for name in [name for name, source in copies.items()
+                             if isinstance(source, LoadLocal)
+                             and source.index == slot]:
+                    copies.pop(name)
+            slot = slots[0]
+            prev = code[-1] if code else None
+            if isinstance(inst, StoreLocal) and (
+                isinstance(prev, LoadConst) and
+                not isinstance(prev.const, (Struct, Class)) or
+                isinstance(prev, LoadLocal) and prev.index in safe and
+                prev.index != slot):
+                copies[slot] = prev
+        elif isinstance(inst, LoadLocal) and inst.index in copies:
+            source = copies[inst.index]
+            if isinstance(source, LoadLocal):
+                inst = LoadLocal(source.index)
+            else:
+                inst = LoadConst(source.const)
+        code.append(inst)
+    block.code = code
+
+
+def live_slots(blocks: list[Block]) -> dict:
+    # 블록마다 끝난 뒤에도 읽힐 수 있는 지역 변수를 구함
+    uses, defs = {}, {}
+    for block in blocks:
+        use, define = set(), set()
+        for inst in block.code:
+            if isinstance(inst, LoadLocal):
+                if inst.index not in define:
+                    use.add(inst.index)
+            else:
+                define.update(killed_slots(inst))
+        uses[block], defs[block] = use, define
+
+    live_in = {block: set() for block in blocks}
+    live_out = {block: set() for block in blocks}
+    changed = True
+    while changed:
+        changed = False
+        for block in reversed(blocks):
+            out = set()
+            for succ in block.succs():
+                out |= live_in[succ]
+            new_in = uses[block] | (out - defs[block])
+            if out != live_out[block] or new_in != live_in[block]:
+                live_out[block], live_in[block] = out, new_in
+                changed = True
+    return live_out
+
+
+def remove_dead_stores(blocks: list[Block]):
+    # 다시 읽히지 않는 StoreLocal은 값만 버리도록 Pop으로 바꿈
+    # 값을 넣자마자 버리는 코드는 뒤의 핍홀 최적화가 지움
+    live_out = live_slots(blocks)
+    for block in blocks:
+        live = set(live_out[block])
+        for i in range(len(block.code) - 1, -1, -1):
+            inst = block.code[i]
+            if isinstance(inst, LoadLocal):
+                live.add(inst.index)
+            elif isinstance(inst, StoreLocal):
+                if inst.index not in live:
+                    block.code[i] = Pop()
+                live.discard(inst.index)
+            else:
+                live.difference_update(killed_slots(inst))
+
+
+def optimize(code: list, param_count: int|None = None) -> list:
+    # param_count가 None이면 최상위 코드라서 지역 변수 패스는 건너뜀
+    if not code:
+        return code
+    blocks = build_cfg(code)
+    remove_unreachable(blocks)
+    if param_count is not None:
+        safe = copy_safe_slots(blocks, param_count)
+        for block in blocks:
+            propagate_copies(block, safe)
+        remove_dead_stores(blocks)
+    return emit(blocks)
@@ -1,214 +1,216 @@
-from .token import Token, TokenKind
+import re
+import codecs
+from collections import OrderedDict
+from typing import BinaryIO, TextIO
+from .token import Token, TokenKind, SuffixTrie
 
+_SPACE = re.compile(r"\s*")
+_INLINE_SPACE = re.compile(r"[ \t]*")
+_NEWLINE = re.compile(r"[\n\r]")
+_WORD = re.compile(r"\S+")
+_IDENTIFIER = re.compile(r"[가-힣0-9_]*")
+_NUMBER = re.compile(r"""[+-]?(?:
+    (?P<HEX>0[xX][0-9A-Fa-f]*) |
+    (?P<OCT>0[oO][0-7]*) |
+    (?P<BIN>0[bB][01]*) |
+    (?P<FLOAT>[0-9]+\.[0-9]*) |
+    (?P<NUMBER>[0-9]+)
+)""", re.VERBOSE)
+_NUMBER_KIND = {
+    "HEX": TokenKind.HEX,
+    "OCT": TokenKind.OCT,
+    "BIN": TokenKind.BIN,
+    "FLOAT": TokenKind.FLOAT,
+    "NUMBER": TokenKind.NUMBER,
+}
+_PREFIX_ERROR = {
+    TokenKind.HEX: "Token Error: Hex Number",
+    TokenKind.OCT: "Token Error: Oct Number",
+    TokenKind.BIN: "Token Error: Bin Number",
+}
 
 
-class Lexer:
-    def __init__(self, src: str):
+class WordCache:
+    # 단어 -> (토큰 종류, 문자열, 길이) 분해 결과를 기억하는 LRU 캐시
+    # 여러 Lexer가 같은 캐시를 넘겨받으면 프로세스 안에서 공유됨
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self.table: OrderedDict[str, tuple[TokenKind, str, int]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, word: str) -> tuple[TokenKind, str, int]|None:
+        decomposed = self.table.get(word)
+        if decomposed is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.table.move_to_end(word)
+        return decomposed
+
+    def put(self, word: str, decomposed: tuple[TokenKind, str, int]):
+        self.table[word] = decomposed
+        if len(self.table) > self.maxsize:
+            self.table.popitem(last=False)
+
+    def clear(self):
+        self.table.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.table)
+
+    def __repr__(self) -> str:
+        return f"WordCache(hits={self.hits}, misses={self.misses}, " \
+            f"size={len(self.table)}, maxsize={self.maxsize})"
+
+shared_word_cache = WordCache()
+
+
+class Scanner:
+    # 소스에서 토큰을 하나씩 읽어 (토큰 종류, 시작, 끝, 문자열)로 돌려줌
+    # Token 객체는 만들지 않음. Lexer와 TokenStream이 같이 씀
+    def __init__(self, src: str, word_cache: WordCache|None = None):
         self.src: str = src
+        self.word_cache: WordCache = word_cache if word_cache is not None \
+            else WordCache()
         self.pos: int = 0
-        self.prev: Token = Token()
-        self.cur: Token = Token()
-        self.next: Token = Token()
-        self.advance_token()
+        self.start: int = 0
 
     def _is_out_of_bound_src(self, idx: int) -> bool:
         return len(self.src) <= idx
 
+    def _skip_space(self):
+        self.pos = _SPACE.match(self.src, self.pos).end()
+
     def _skip_comment(self):
-        assert(self.src[self.pos:self.pos+2] == "주석")
-        self.pos += 2
-        while self.src[self.pos] in ' \t':
-            self.pos += 1
-        if self.src[self.pos:self.pos+2] == "시작":
-            while self.src[self.pos:self.pos+4] != "주석 끝":
-                self.pos += 1
-                if self._is_out_of_bound_src(self.pos):
-                    raise Exception("Token Error: Comment")
-            self.pos += 4
+        assert(self.src.startswith("주석", self.pos))
+        self.pos = _INLINE_SPACE.match(self.src, self.pos + 2).end()
+        if self.src.startswith("시작", self.pos):
+            self.pos = self._find_comment_end() + 4
         else:
-            while not self._is_out_of_bound_src(self.pos) and \
-                self.src[self.pos] not in '\n\r':
-                self.pos += 1
-            self.pos += 1
-        while not self._is_out_of_bound_src(self.pos) and \
-                self.src[self.pos].isspace():
-            self.pos += 1
+            newline = _NEWLINE.search(self.src, self.pos)
+            if newline:
+                self.pos = newline.end()
+            else:
+                self.pos = len(self.src)
+        self._skip_space()
 
-    
-    def _scan_punctuation(self) -> bool:
-        token: Token = Token(
-            Token.PUNCTUATION.get(self.src[self.pos], TokenKind.UNDEFINED))
-        if token:
-            self.next = token
+    def _find_comment_end(self) -> int:
+        end = self.src.find("주석 끝", self.pos)
+        if end == -1:
+            raise Exception("Token Error: Comment")
+        return end
+
+    def _scan_punctuation(self) -> TokenKind|None:
+        kind = Token.PUNCTUATION.get(self.src[self.pos])
+        if kind is not None:
             self.pos += 1
-            return True
-        return False
+        return kind
 
-    def _scan_literal(self) -> bool:
+    def _scan_literal(self) -> tuple[TokenKind, str]|None:
         if self.src[self.pos] in "\"'":
             end_char = self.src[self.pos]
             self.pos += 1
-            end_pos = self.pos
-            while self.src[end_pos] != end_char or \
-                self.src[end_pos-1] == "\\":
-                if not self.src[end_pos].isprintable() and \
-                    self.src[end_pos] == '\n':
-                    raise Exception("Token Error: string")
-                end_pos += 1
-            self.next = Token(TokenKind.STRING)
-            self.next.set_str(self.src[self.pos:end_pos])
+            end_pos = self.src.find(end_char, self.pos)
+            while end_pos != -1 and self.src[end_pos-1] == "\\":
+                end_pos = self.src.find(end_char, end_pos + 1)
+            if end_pos == -1 or self.src.find("\n", self.pos, end_pos) != -1:
+                raise Exception("Token Error: string")
+            text = self.src[self.pos:end_pos]
             self.pos = end_pos + 1
-            return True
-        else:
-            end_pos = self.pos
-            if self.src[self.pos] in "+-":
-                end_pos += 1
-                if self._is_out_of_bound_src(end_pos):
-                    raise Exception("Token Error: Number")
-            if not self.src[end_pos].isdigit():
-                return False
-            
-            if self.src[end_pos:end_pos+2] in ["0x","0X"]:
-                end_pos += 2
-                if self.src[end_pos] not in "0123456789ABCDEFabcdef":
-                    raise Exception("Token Error: Hex Number")
-                while not self._is_out_of_bound_src(end_pos) and \
-                        self.src[end_pos] in "0123456789ABCDEFabcdef":
-                    end_pos += 1
-                self.next = Token(TokenKind.HEX)
-                self.next.set_str(self.src[self.pos: end_pos])
-                self.pos = end_pos
-                return True
-            elif self.src[end_pos:end_pos+2] in ["0o","0O"]:
-                end_pos += 2
-                if self.src[end_pos] not in "01234567":
-                    raise Exception("Token Error: Oct Number")
-                while not self._is_out_of_bound_src(end_pos) and \
-                        self.src[end_pos] in "01234567":
-                    end_pos += 1
-                self.next = Token(TokenKind.OCT)
-                self.next.set_str(self.src[self.pos: end_pos])
-                self.pos = end_pos
-                return True
-            elif self.src[end_pos:end_pos+2] in ["0b", "0B"]:
-                end_pos += 2
-                if self.src[end_pos] not in "01":
-                    raise Exception("Token Error: Bin Number")
-                while not self._is_out_of_bound_src(end_pos) and \
-                        self.src[end_pos] in "01":
-                    end_pos += 1
-                self.next = Token(TokenKind.BIN)
-                self.next.set_str(self.src[self.pos: end_pos])
-                self.pos = end_pos
-                return True
-            
-
-            while not self._is_out_of_bound_src(end_pos) and \
-                    self.src[end_pos].isdigit():
-                end_pos += 1
-            if not self._is_out_of_bound_src(end_pos) and \
-                self.src[end_pos] == ".":
-                end_pos += 1
-            else:
-                self.next = Token(TokenKind.NUMBER)
-                self.next.set_str(self.src[self.pos: end_pos])
-                self.pos = end_pos
-                return True
-            while not self._is_out_of_bound_src(end_pos) and \
-                    self.src[end_pos].isdigit():
-                end_pos += 1
-
-            self.next = Token(TokenKind.FLOAT)
-            self.next.set_str(self.src[self.pos: end_pos])
-            self.pos = end_pos
-            return True
-
-    def _scan_post(self, word: str) -> bool:
-        token: Token = Token(Token.POST.get(word, TokenKind.UNDEFINED))
-        if token:
-            self.next = token
-            self.pos += len(word)
-            return True
-        return False
-
-    def _get_without_post(self, word: str) -> str:
-        for k in Token.POST_SORT_KEY:
-            if word.endswith(k):
-                return word[:-len(k)]
-        return word
-
-    def _scan_middle(self, word: str) -> bool:
-        token: Token = Token(Token.MIDDLE.get(word, TokenKind.UNDEFINED))
-        if token:
-            self.next = token
-            self.pos += len(word)
-            return True
-        return False
-
-    def _get_without_middle(self, word: str) -> str:
-        for k in Token.MIDDLE_SORT_KEY:
-            if word.endswith(k):
-                return word[:-len(k)]
-        return word
-    
-    def _scan_remain(self, word: str) -> bool:
-        token: Token = Token(Token.REMAIN.get(word, TokenKind.UNDEFINED))
-        if token:
-            self.next = token
-            self.pos += len(word)
-            return True
-        return False
+            return TokenKind.STRING, text
+
+        match = _NUMBER.match(self.src, self.pos)
+        if not match:
+            if self.src[self.pos] in "+-" and \
+                self._is_out_of_bound_src(self.pos + 1):
+                raise Exception("Token Error: Number")
+            return None
+        kind: TokenKind = _NUMBER_KIND[match.lastgroup]
+        if match.end() - match.start(match.lastgroup) == 2 and \
+            kind in _PREFIX_ERROR:
+            raise Exception(_PREFIX_ERROR[kind])
+        self.pos = match.end()
+        return kind, match.group()
+
+    @staticmethod
+    def _strip_suffix(trie: SuffixTrie, word: str) -> tuple[TokenKind, str]:
+        # 단어 전체가 표에 있으면 그 토큰 종류를,
+        # 아니면 가장 긴 접미사를 뗀 단어를 반환
+        length, kind = trie.longest_suffix(word)
+        if length and length == len(word):
+            return kind, word
+        return TokenKind.UNDEFINED, word[:len(word)-length]
+
+    @staticmethod
+    def _decompose(word: str) -> tuple[TokenKind, str, int]:
+        if word[-1] == ']' or word[-1] == ")" or word[-1] == "}":
+            word = word[:-1]
+        kind, word = Scanner._strip_suffix(Token.POST_TRIE, word)
+        if kind != TokenKind.UNDEFINED:
+            return kind, "", len(word)
+
+        if word[-1] == ']' or word[-1] == ")" or word[-1] == "}":
+            word = word[:-1]
+        kind, word = Scanner._strip_suffix(Token.MIDDLE_TRIE, word)
+        if kind != TokenKind.UNDEFINED:
+            return kind, "", len(word)
+
+        if word[-1] == ']' or word[-1] == ")" or word[-1] == "}":
+            word = word[:-1]
+        length, kind = Token.REMAIN_TRIE.longest_suffix(word)
+        if length and length == len(word):
+            return kind, "", length
+
+        if not _IDENTIFIER.fullmatch(word):
+            raise Exception("Token Error: Identifier")
+        return TokenKind.IDENTIFIER, word, len(word)
+
+    def scan(self) -> tuple[TokenKind, int, int, str]:
+        # 공백과 주석을 건너뛰고 다음 토큰 하나를 읽음
+        self._skip_space()
+        while self.src.startswith("주석", self.pos):
+            self._skip_comment()
+        self.start = self.pos
 
-    def _scan(self):
-        while not self._is_out_of_bound_src(self.pos) and \
-                 self.src[self.pos].isspace():
-                self.pos += 1
-        
         if self._is_out_of_bound_src(self.pos):
-            self.next = Token(TokenKind.ENDOFFILE)
-            return
+            return TokenKind.ENDOFFILE, self.start, self.pos, ""
 
-        try:
-            if self.src[self.pos:self.pos+2] == "주석":
-                self._skip_comment()
-                self._scan()
-                return
-
-            word: str = self.src[self.pos:].split(maxsplit=1)[0]
-            if self._scan_punctuation():
-                return
-            elif self._scan_literal():
-                return
-            if word[-1] == ']' or word[-1] == ")" or word[-1] == "}":
-                word = word[:-1]
-            if self._scan_post(word):
-                return
-            
-            word = self._get_without_post(word)
-
-            if word[-1] == ']' or word[-1] == ")" or word[-1] == "}":
-                word = word[:-1]
-                
-            if self._scan_middle(word):
-                return
-            word = self._get_without_middle(word)
-
-            if word[-1] == ']' or word[-1] == ")" or word[-1] == "}":
-                word = word[:-1]
-
-            if self._scan_remain(word):
-                return
-
-            for ch in word:
-                if not ('가' <= ch <= '힣' or '0' <= ch <= '9' or ch == '_'):
-                    raise Exception("Token Error: Identifier")
-            self.next = Token(TokenKind.IDENTIFIER)
-            self.next.set_str(word)
-            self.pos += len(word)
+        kind = self._scan_punctuation()
+        if kind is not None:
+            return kind, self.start, self.pos, ""
+        literal = self._scan_literal()
+        if literal is not None:
+            return literal[0], self.start, self.pos, literal[1]
+        word: str = _WORD.match(self.src, self.pos).group()
+        decomposed = self.word_cache.get(word)
+        if decomposed is None:
+            decomposed = self._decompose(word)
+            self.word_cache.put(word, decomposed)
+        kind, text, length = decomposed
+        self.pos += length
+        return kind, self.start, self.pos, text
+
+
+class Lexer(Scanner):
+    def __init__(self, src: str, word_cache: WordCache|None = None):
+        super().__init__(src, word_cache)
+        self.offset: int = 0
+        self.span: tuple[int, int] = (0, 0)
+        self.prev: Token = Token()
+        self.cur: Token = Token()
+        self.next: Token = Token()
+        self.advance_token()
 
+    def _scan(self):
+        try:
+            kind, _, _, text = self.scan()
         except Exception as e:
             self.next = Token(TokenKind.UNDEFINED)
             raise e
+        self.next = Token(kind, text)
 
     def prev_token(self):
         return self.prev
@@ -223,11 +225,30 @@ class Lexer:
             self._scan()
         self.prev = self.cur
         self.cur = self.next
+        self.span = (self.offset + self.start, self.offset + self.pos)
         self.next = Token()
         return self.cur
     
     def current_token(self) -> Token:
         return self.cur
+
+    def current_span(self) -> tuple[int, int]:
+        return self.span
+
+    def current_kind(self) -> TokenKind:
+        return self.cur.kind
+
+    def prev_kind(self) -> TokenKind:
+        return self.prev.kind
+
+    def peek_kind(self) -> TokenKind:
+        return self.peek_token().kind
+
+    def advance_kind(self) -> TokenKind:
+        return self.advance_token().kind
+
+    def current_value(self) -> str|int|float|bool|None:
+        return self.cur.get_value()
     
     def print(self):
         i = 0
@@ -236,4 +257,69 @@ class Lexer:
             print(f"토큰[{i}]: {self.current_token()}")
             self.advance_token()
             i += 1
-        print(f"토큰[{i}]: {self.current_token()}")
\ No newline at end of file
+        print(f"토큰[{i}]: {self.current_token()}")
+
+
+class StreamLexer(Lexer):
+    # 파일을 조각 단위로 읽으면서 토큰을 만드는 Lexer
+    # 이미 지나간 부분은 버리므로 메모리에는 현재 줄 근처의 창만 남음
+    # 문자열과 단어는 한 줄 안에서 끝나므로 항상 줄 끝까지 채운 뒤 스캔하고
+    # 여러 줄 주석은 끝을 찾을 때까지 읽으면서 지나간 부분을 버림
+    def __init__(self, file: str|TextIO|BinaryIO,
+                 word_cache: WordCache|None = None, chunk_size: int = 1 << 16):
+        if isinstance(file, str):
+            file = open(file, "rb")
+            self.owns_file = True
+        else:
+            self.owns_file = False
+        self.file = file
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.chunk_size = chunk_size
+        self.eof = False
+        self.newline = -1
+        super().__init__("", word_cache)
+
+    def _read(self):
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            if self.owns_file:
+                self.file.close()
+        if isinstance(chunk, bytes):
+            # 여러 바이트 문자가 조각 경계에 걸치면 다음 조각에서 마저 디코딩함
+            chunk = self.decoder.decode(chunk, final=self.eof)
+        self.src += chunk
+
+    def _compact(self):
+        if self.pos < self.chunk_size:
+            return
+        self.src = self.src[self.pos:]
+        self.offset += self.pos
+        self.newline -= self.pos
+        self.pos = 0
+
+    def _fill_line(self):
+        if self.newline >= self.pos:
+            return
+        self.newline = self.src.find("\n", self.pos)
+        while self.newline == -1 and not self.eof:
+            searched = len(self.src)
+            self._read()
+            self.newline = self.src.find("\n", searched)
+
+    def _skip_space(self):
+        self._compact()
+        super()._skip_space()
+        while self._is_out_of_bound_src(self.pos) and not self.eof:
+            self._read()
+            super()._skip_space()
+        self._fill_line()
+
+    def _find_comment_end(self) -> int:
+        while (end := self.src.find("주석 끝", self.pos)) == -1:
+            if self.eof:
+                raise Exception("Token Error: Comment")
+            self.pos = max(self.pos, len(self.src) - len("주석 끝") + 1)
+            self._compact()
+            self._read()
+        return end
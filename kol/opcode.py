@@ -0,0 +1,129 @@
+from .bytecode import *
+
+# 빠른 실행기(FastVM)가 쓰는 코드 형식. 바이트코드 객체 목록을
+# [명령 번호, 피연산자1, 피연산자2]가 이어진 정수 목록으로 바꿈
+# 정수로 나타낼 수 없는 피연산자(상수, 필드 이름 등)는 코드 객체마다
+# 있는 상수표에 넣고 그 위치를 피연산자로 씀
+# 점프 피연산자는 정수 목록에서의 위치. 바이트코드 클래스는 디버그와
+# 역어셈블용으로 그대로 남겨 둠
+
+INST_SIZE = 3
+
+# 실행기가 명령을 앞에서부터 차례로 비교하므로 자주 쓰는 명령을 앞에 둠
+OPNAMES = [
+    "LOAD_LOCAL", "LOAD_CONST", "LOAD_GLOBAL", "STORE_LOCAL", "CALL",
+    "JMP_IF_FALSE", "FOR_ITER", "JMP", "STORE_GLOBAL", "POP", "RET",
+    "JMP_IF_TRUE", "LT", "LE", "GT", "GE", "EQUAL", "NOT_EQUAL",
+    "TAIL_CALL", "INLINE_GUARD", "BIND_ARGS", "LOAD_FIELD", "STORE_FIELD",
+    "LOAD_INDEX", "STORE_INDEX", "LOAD_METHOD", "LOAD_CONST_COPY",
+    "BUILD_ARRAY", "BUILD_DICT", "FOR_IN_PREPARE", "RANGE_PREPARE",
+    "COUNT_PREPARE", "FOR_IN_DONE", "STORE_FROM_CONST_POOL", "LIKE",
+    "NOT_LIKE", "SHL", "SHR", "END",
+]
+for _number, _name in enumerate(OPNAMES):
+    globals()[_name] = _number
+
+# 피연산자 없이 번호만 정하면 되는 명령
+SIMPLE_OPS = {
+    Pop: POP, Ret: RET, LTOp: LT, LEOp: LE, GTOp: GT, GEOp: GE,
+    EqualOp: EQUAL, NotEqualOp: NOT_EQUAL, LoadIndex: LOAD_INDEX,
+    StoreIndex: STORE_INDEX, ForInPrepare: FOR_IN_PREPARE,
+    RangePrepare: RANGE_PREPARE, ForInDone: FOR_IN_DONE, LikeOp: LIKE,
+    NotLikeOp: NOT_LIKE, SHLOp: SHL, SHROp: SHR,
+}
+
+# 피연산자 하나가 슬롯 번호나 개수인 명령
+INDEX_OPS = {
+    LoadLocal: (LOAD_LOCAL, "index"), LoadGlobal: (LOAD_GLOBAL, "index"),
+    StoreLocal: (STORE_LOCAL, "index"), StoreGlobal: (STORE_GLOBAL, "index"),
+    Call: (CALL, "param_count"), TailCall: (TAIL_CALL, "param_count"),
+    BuildArray: (BUILD_ARRAY, "array_len"),
+    BuildDict: (BUILD_DICT, "key_value_len"),
+}
+
+# 피연산자 하나를 상수표에 넣는 명령
+CONST_OPS = {
+    LoadConst: (LOAD_CONST, "const"), LoadConstCopy: (LOAD_CONST_COPY, "const"),
+    BindArgs: (BIND_ARGS, "slots"),
+}
+
+# 인라인 캐시가 있는 명령. 두 실행기가 같은 캐시를 쓰도록 명령 객체를
+# 상수표에 넣음
+CACHE_OPS = {LoadField: LOAD_FIELD, StoreField: STORE_FIELD,
+             LoadMethod: LOAD_METHOD}
+
+JUMP_OPS = {Jmp: JMP, JmpIfTrue: JMP_IF_TRUE, JmpIfFalse: JMP_IF_FALSE}
+
+
+class CodeObject:
+    def __init__(self, code: list, consts: list, source: list):
+        self.code = code
+        self.consts = consts
+        # 이 코드를 만든 바이트코드 목록. 역어셈블할 때 같이 보여 줌
+        self.source = source
+
+    def __repr__(self):
+        return f"CodeObject(code={self.code!r}, consts={self.consts!r})"
+
+
+def assemble(bytecode: list) -> CodeObject:
+    code = []
+    consts = []
+    for inst in bytecode:
+        kind = type(inst)
+        if kind in SIMPLE_OPS:
+            code += (SIMPLE_OPS[kind], 0, 0)
+        elif kind in INDEX_OPS:
+            op, name = INDEX_OPS[kind]
+            code += (op, getattr(inst, name), 0)
+        elif kind in CONST_OPS:
+            op, name = CONST_OPS[kind]
+            code += (op, len(consts), 0)
+            consts.append(getattr(inst, name))
+        elif kind in CACHE_OPS:
+            code += (CACHE_OPS[kind], len(consts), 0)
+            consts.append(inst)
+        elif kind in JUMP_OPS:
+            code += (JUMP_OPS[kind], inst.ip * INST_SIZE, 0)
+        elif kind is ForIter:
+            code += (FOR_ITER, inst.index, inst.ip * INST_SIZE)
+        elif kind is InlineGuard:
+            code += (INLINE_GUARD, len(consts), inst.ip * INST_SIZE)
+            consts.append((inst.slot, inst.const_index))
+        elif kind is CountPrepare:
+            code += (COUNT_PREPARE, len(consts), 0)
+            consts.append(inst)
+        elif kind is StoreFromConstPool:
+            code += (STORE_FROM_CONST_POOL, inst.const_index, inst.scope_index)
+        else:
+            raise Exception(f"실행 에러: {inst!r}는 빠른 실행기에서 쓸 수 없음")
+    # 코드 끝으로 가는 점프도 명령을 만나도록 끝에 END를 둠
+    code += (END, 0, 0)
+    return CodeObject(code, consts, bytecode)
+
+
+CONST_OPCODES = {op for op, _ in CONST_OPS.values()} | \
+    set(CACHE_OPS.values()) | {INLINE_GUARD, COUNT_PREPARE}
+INDEX_OPCODES = {op for op, _ in INDEX_OPS.values()}
+
+
+def disassemble(code_object: CodeObject) -> str:
+    lines = []
+    code = code_object.code
+    for ip in range(0, len(code), INST_SIZE):
+        op, arg1, arg2 = code[ip:ip + INST_SIZE]
+        line = f"{ip:5} {OPNAMES[op]:<22}"
+        if op in CONST_OPCODES:
+            line += f" {arg1} ({code_object.consts[arg1]!r})"
+        elif op in INDEX_OPCODES:
+            line += f" {arg1}"
+        elif op in JUMP_OPS.values():
+            line += f" -> {arg1}"
+        elif op == FOR_ITER:
+            line += f" {arg1}"
+        elif op == STORE_FROM_CONST_POOL:
+            line += f" {arg1} {arg2}"
+        if op in (FOR_ITER, INLINE_GUARD):
+            line += f" -> {arg2}"
+        lines.append(line.rstrip())
+    return "\n".join(lines)
@@ -0,0 +1,112 @@
+import os
+import re
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+from .lexer import Lexer, shared_word_cache
+from .tokenstream import TokenStream
+from .parser import Parser
+from .token import TokenKind
+from .ast import ProgramAST, BodyAST, StmtAST
+
+# 문자열, 주석, 괄호, 단어를 차례로 찾는 간단한 스캐너
+# 토큰을 전부 만들지 않고 최상위 문장이 끝나는 위치만 찾음
+_UNIT = re.compile(r"""
+    (?P<STRING>"(?:[^"\n]|(?<=\\)")*"|'(?:[^'\n]|(?<=\\)')*') |
+    (?P<COMMENT>주석[ \t]*시작.*?주석\ 끝|주석[^\n\r]*) |
+    (?P<OPEN>[\[({]) |
+    (?P<CLOSE>[\])}]) |
+    (?P<WORD>[^\s\[\](){}"']+)
+""", re.VERBOSE | re.DOTALL)
+
+# 문장이 이어지는 토큰: 아니고/아니면은 조건문, 그리고는 결과 값 문장
+_CONTINUE = (TokenKind.ELIF, TokenKind.ELSE, TokenKind.AND)
+
+MIN_PARALLEL_SIZE = 1 << 16
+
+
+def _first_kind(word: str) -> TokenKind:
+    decomposed = shared_word_cache.get(word)
+    if decomposed is None:
+        try:
+            decomposed = Lexer._decompose(word)
+        except Exception:
+            return TokenKind.UNDEFINED
+        shared_word_cache.put(word, decomposed)
+    return decomposed[0]
+
+
+def split_points(src: str) -> list[int]:
+    # 문자열과 주석 밖에서, 괄호와 문단 깊이가 0인 마침표 뒤의 위치들
+    # 다음 단어가 아니고/아니면/그리고이면 문장이 이어지므로 나누지 않음
+    points: list[int] = []
+    bracket, depth = 0, 0
+    candidate = -1
+    for match in _UNIT.finditer(src):
+        kind = match.lastgroup
+        if kind == "COMMENT":
+            continue
+        first = TokenKind.UNDEFINED
+        if kind == "WORD" and bracket == 0:
+            first = _first_kind(match.group())
+        if candidate != -1 and first not in _CONTINUE:
+            points.append(candidate)
+        candidate = -1
+
+        if kind == "OPEN":
+            bracket += 1
+        elif kind == "CLOSE":
+            bracket -= 1
+        elif first == TokenKind.NEXT:
+            depth += 1
+        elif first in (TokenKind.PARAGRAPH, TokenKind.HAVE):
+            depth -= 1
+
+        word = match.group()
+        if kind == "WORD" and bracket == 0 and depth == 0 and \
+            word.endswith(".") and not word[-2:-1].isdigit():
+            candidate = match.end()
+    return points
+
+
+def split_source(src: str, chunk_count: int) -> list[str]:
+    points = split_points(src)
+    target = len(src) // max(chunk_count, 1)
+    chunks: list[str] = []
+    start = 0
+    for point in points:
+        if point - start >= target:
+            chunks.append(src[start:point])
+            start = point
+    chunks.append(src[start:])
+    return chunks
+
+
+def _parse_chunk(src: str, lazy: bool = False) -> list[StmtAST]:
+    return Parser(TokenStream(src, shared_word_cache),
+                  lazy=lazy).parse().body.stmts
+
+
+def parse_parallel(src: str, max_workers: int|None = None,
+                   chunk_count: int|None = None,
+                   lazy: bool = False) -> ProgramAST:
+    # 최상위 문장 경계에서 소스를 나눠 프로세스 풀에서 따로 렉싱/파싱한 뒤
+    # 순서대로 이어붙임. 결과는 Parser.parse()와 같음
+    # 지연 파싱한 함수 본문은 본문 소스로 이 프로세스에 돌아옴(parser.LazyBody)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if chunk_count is None:
+        if len(src) < MIN_PARALLEL_SIZE:
+            chunk_count = 1
+        else:
+            chunk_count = max_workers * 4
+    chunks = split_source(src, chunk_count)
+    if len(chunks) == 1 or max_workers == 1:
+        stmts = [stmt for chunk in chunks for stmt in _parse_chunk(chunk, lazy)]
+        return ProgramAST(BodyAST(stmts))
+
+    stmts: list[StmtAST] = []
+    with ProcessPoolExecutor(max_workers) as executor:
+        for chunk_stmts in executor.map(_parse_chunk, chunks,
+                                        repeat(lazy)):
+            stmts += chunk_stmts
+    return ProgramAST(BodyAST(stmts))
@@ -1,11 +1,21 @@
 from .lexer import Lexer
+from .tokenstream import TokenStream
 from .token import TokenKind, Token
 from .ast import *
+from .trampoline import Step, run
+
+# 식 뒤에 붙어서 접근을 이어가는 토큰들과 호출을 시작하는 토큰들
+_ACCESS_KINDS = frozenset((TokenKind.UI, TokenKind.ESEO, TokenKind.ANESEO))
+_CALL_KINDS = frozenset((TokenKind.EUL, TokenKind.WA, TokenKind.RO,
+                         TokenKind.HANDA, TokenKind.DA,
+                         TokenKind.GEOT, TokenKind.HAN))
 
 class Parser:
-    def __init__(self, lexer: Lexer):
+    def __init__(self, lexer: Lexer|TokenStream, lazy: bool = False):
         self.lexer = lexer
         self.is_loop = False
+        # 지연 파싱은 토큰을 다시 읽을 수 있는 TokenStream에서만 가능
+        self.lazy = lazy and isinstance(lexer, TokenStream)
 
     def parse(self) -> ProgramAST:
         body: BodyAST = self.parse_body(end=TokenKind.ENDOFFILE)
@@ -157,12 +167,41 @@ class Parser:
                 raise Exception("문법 에러: 매개변수 이름이 필요함")
         
         self.expect(TokenKind.NEXT, "문법 에러: 다음이 필요함")
-        body: BodyAST = self.parse_body(TokenKind.PARAGRAPH)
+        if self.lazy:
+            func = self.parse_lazy_func_body(ident, params)
+        else:
+            func = FuncAST(ident, params, self.parse_body(TokenKind.PARAGRAPH))
         self.expect_seq(TokenKind.PARAGRAPH, TokenKind.EUL,
                         TokenKind.EXECUTE, TokenKind.HANDA,
                         TokenKind.DOT, msg="문법 에러: 문단을 실행한다.가 필요함")
 
-        return FuncAST(ident, params, body)
+        return func
+
+    def parse_lazy_func_body(self, ident: str, params: list[str]) -> FuncAST:
+        start, end = self.skip_body()
+        return FuncAST(ident, params, None, (start, end),
+                       LazyBody(self.lexer, start, end, self.is_loop))
+
+    def skip_body(self) -> tuple[int, int]:
+        # 문단의 중첩만 세면서 본문을 건너뛰고 본문의 토큰 범위를 돌려줌
+        # 괄호 밖의 다음은 문단/구조/유형을 열고, 문단과 가진은 닫음
+        start = self.lexer.index
+        depth, bracket = 1, 0
+        while True:
+            match self.current():
+                case TokenKind.ENDOFFILE:
+                    raise Exception("문법 에러: 문단이 안 끝남")
+                case TokenKind.LEFTPARENT|TokenKind.LEFTSQUARE|TokenKind.LEFTBRACE:
+                    bracket += 1
+                case TokenKind.RIGHTPARENT|TokenKind.RIGHTSQUARE|TokenKind.RIGHTBRACE:
+                    bracket -= 1
+                case TokenKind.NEXT if bracket == 0:
+                    depth += 1
+                case TokenKind.PARAGRAPH|TokenKind.HAVE if bracket == 0:
+                    depth -= 1
+                    if depth == 0:
+                        return start, self.lexer.index
+            self.next()
 
     def parse_field(self) -> str:
         self.next()
@@ -241,31 +280,54 @@ class Parser:
         return CondAST(cond, then_body, else_cond)
 
     def parse_expr(self) -> ExprAST:
-        return self.parse_or()
-
+        return run(self._parse_expr())
 
     def parse_or(self) -> ExprAST:
-        left: ExprAST = self.parse_and()
+        return run(self._parse_or())
+
+    def parse_and(self) -> ExprAST:
+        return run(self._parse_and())
+
+    def parse_equal(self) -> ExprAST:
+        return run(self._parse_equal())
+
+    def parse_access(self, without_call = False) -> ExprAST:
+        return run(self._parse_access(without_call))
+
+    def parse_caller(self, param = None) -> ExprAST:
+        return run(self._parse_caller(param))
+
+    def parse_primary(self) -> ExprAST:
+        return run(self._parse_primary())
+
+    # 아래의 식 파싱 함수들은 제너레이터로, 하위 규칙을 yield하면
+    # trampoline.run이 명시적인 스택으로 실행하고 결과를 돌려줌
+    def _parse_expr(self) -> Step:
+        return (yield self._parse_or())
+
+
+    def _parse_or(self) -> Step:
+        left: ExprAST = (yield self._parse_and())
         while self.check(TokenKind.OR):
-            right: ExprAST = self.parse_and()
+            right: ExprAST = (yield self._parse_and())
             left = BinAST(BinAST.OpKind.OP_OR, left, right)
         return left
 
-    def parse_and(self) -> ExprAST:
-        left: ExprAST = self.parse_equal()
+    def _parse_and(self) -> Step:
+        left: ExprAST = (yield self._parse_equal())
         while self.check(TokenKind.AND) or \
             self.check(TokenKind.GO):
-            right: ExprAST = self.parse_equal()
+            right: ExprAST = (yield self._parse_equal())
             left = BinAST(BinAST.OpKind.OP_AND, left, right)
 
         return left
 
-    def parse_equal(self) -> ExprAST:
-        left: ExprAST = self.parse_access()
+    def _parse_equal(self) -> Step:
+        left: ExprAST = (yield self._parse_access())
         while self.current() == TokenKind.KA and \
                 self.peek() != TokenKind.BECOME:
             self.next()
-            right: ExprAST = self.parse_access()
+            right: ExprAST = (yield self._parse_access())
             if self.check(TokenKind.RANG):
                 op_kind: BinAST.OpKind
                 if self.check(TokenKind.KAT):
@@ -360,14 +422,15 @@ class Parser:
     
 
     # todo: 생성 문법 만들기 문법은: 유형 나를 [다와 마로] 생성한다/생성한 것
-    def parse_access(self, without_call = False) -> ExprAST:
-        left = self.parse_primary()
-        
-        while self.current() == TokenKind.UI or \
-            self.current() == TokenKind.ESEO or \
-            self.current() == TokenKind.ANESEO or \
-            (not without_call and self._is_call_check(self.current())):
-            match self.current():
+    def _parse_access(self, without_call = False) -> Step:
+        left = self._parse_leaf()
+        if left is None:
+            left = (yield self._parse_primary())
+
+        kind = self.current()
+        while kind in _ACCESS_KINDS or \
+            (not without_call and kind in _CALL_KINDS):
+            match kind:
                 case TokenKind.UI:
                     if self.next() != TokenKind.IDENTIFIER:
                         raise Exception("문법 에러: 이름이 필요함")
@@ -376,13 +439,13 @@ class Parser:
                     self.next()
                 case TokenKind.ESEO:
                     self.next()
-                    idx: ExprAST = self.parse_expr()
+                    idx: ExprAST = (yield self._parse_expr())
                     self.expect(TokenKind.INDEX, "문법 에러: 번째가 필요함")
                     self.expect(TokenKind.ELEM, "문법 에러: 원소가 필요함")
                     left = IndexAccessAST(left, idx)
                 case TokenKind.ANESEO:
                     self.next()
-                    method: CallExprAST| CallStmtAST = self.parse_caller()
+                    method: CallExprAST| CallStmtAST = (yield self._parse_caller())
                     method.callee = MethodAccessAST(left, method.callee)
                     left = method
                 case TokenKind.EUL:
@@ -390,23 +453,24 @@ class Parser:
                     if call := self.try_call_at_data(left):
                         left = call                       
                     else:
-                        left = self.parse_caller(left)
+                        left = (yield self._parse_caller(left))
                 case TokenKind.WA|TokenKind.RO:
-                    left = self.parse_caller(left)
+                    left = (yield self._parse_caller(left))
                 case TokenKind.HANDA|TokenKind.DA:
                     left = self.try_call_stmt(left)
                 case TokenKind.GEOT|TokenKind.HAN:
                     left = self.try_call_expr(left)
-        return left     
+            kind = self.current()
+        return left
         
-    def parse_caller(self, param = None) -> ExprAST:
+    def _parse_caller(self, param = None) -> Step:
         ro, eul = False, False
         call: ExprAST
         params: list[ExprAST] = []
         if param:
             params.append(param)
         else:
-            callee_or_param: ExprAST = self.parse_access(True)
+            callee_or_param: ExprAST = (yield self._parse_access(True))
             
             if call := self.try_call_at_data(callee_or_param, []):
                 return call
@@ -417,7 +481,7 @@ class Parser:
             params.append(callee_or_param)
 
         while self.check(TokenKind.WA):
-            params.append(self.parse_access(True))
+            params.append((yield self._parse_access(True)))
         if self.check(TokenKind.RO):
             ro = True
         elif self.check(TokenKind.EUL):
@@ -425,7 +489,7 @@ class Parser:
         else:
             raise Exception("문법 에러: 로/으로/을/를이 필요함")
 
-        callee_or_param = self.parse_access(True)
+        callee_or_param = (yield self._parse_access(True))
         if call := self.try_call_at_data(callee_or_param, params):
             if eul:
                 raise Exception("문법 에러: 을/를은 한번만 쓸 수 있음")
@@ -437,13 +501,13 @@ class Parser:
         params.append(callee_or_param)
 
         while self.check(TokenKind.WA):
-            params.append(self.parse_access(True))
+            params.append((yield self._parse_access(True)))
         if ro:
             self.expect(TokenKind.EUL, "문법 에러: 을/를이 필요함")
         elif eul:
             self.expect(TokenKind.RO, "문법 에러: 로/으로가 필요함")
         
-        callee: ExprAST = self.parse_access(True)
+        callee: ExprAST = (yield self._parse_access(True))
         if call := self.try_call_expr(callee, params):
             return call
         elif call := self.try_call_stmt(callee, params):
@@ -451,7 +515,9 @@ class Parser:
         
         raise Exception("문법 에러: 잘못된 단어가 들어옴")
         
-    def parse_primary(self) -> ExprAST:
+    def _parse_leaf(self) -> ExprAST|None:
+        # 하위 규칙이 없는 기본 식은 제너레이터를 만들지 않고 바로 파싱함
+        # 매개변수가 길게 이어진 호출에서 대부분의 식이 여기서 끝남
         match self.current():
             case TokenKind.IDENTIFIER:
                 value = self.current_value()
@@ -479,9 +545,16 @@ class Parser:
             case TokenKind.NONE:
                 self.next()
                 return NoneAST()
+        return None
+
+    def _parse_primary(self) -> Step:
+        leaf = self._parse_leaf()
+        if leaf is not None:
+            return leaf
+        match self.current():
             case TokenKind.LEFTPARENT:
                 self.next()
-                expr = self.parse_expr()
+                expr = (yield self._parse_expr())
                 self.expect(TokenKind.RIGHTPARENT, 
                             "문법 에러: )가 필요함")
                 return expr
@@ -491,17 +564,17 @@ class Parser:
                     return DictAST()
                 
                 dict_values: dict[ExprAST, ExprAST] = {}
-                key: ExprAST = self.parse_expr()
+                key: ExprAST = (yield self._parse_expr())
                 self.expect(TokenKind.EUN,
                             "문법 에러: 은/는 조사가 필요함.")
                 
-                value: ExprAST = self.parse_expr()
+                value: ExprAST = (yield self._parse_expr())
                 dict_values[key] = value
                 while self.check(TokenKind.ALSO):
-                    key: ExprAST = self.parse_expr()
+                    key: ExprAST = (yield self._parse_expr())
                     self.expect(TokenKind.EUN,
                                 "문법 에러: 은/는 조사가 필요함.")
-                    value: ExprAST = self.parse_expr()
+                    value: ExprAST = (yield self._parse_expr())
                     dict_values[key] = value
                 self.expect(TokenKind.RIGHTBRACE,
                             "문법 에러: }가 필요함")
@@ -511,10 +584,10 @@ class Parser:
                     self.next()
                     return ArrayAST()
                 elems: list[ExprAST] = []
-                value: ExprAST = self.parse_expr()
+                value: ExprAST = (yield self._parse_expr())
                 elems.append(value)
                 while self.check(TokenKind.NEXT):
-                    value = self.parse_expr()
+                    value = (yield self._parse_expr())
                     elems.append(value)
                 self.expect(TokenKind.RIGHTSQUARE,
                             "문법 에러: ]가 필요함")
@@ -523,19 +596,19 @@ class Parser:
                 raise Exception("문법 에러: 잘못된 단어가 있음")
 
     def current(self) -> TokenKind:
-        return self.lexer.current_token().kind
+        return self.lexer.current_kind()
 
     def prev(self) -> TokenKind:
-        return self.lexer.prev_token().kind
+        return self.lexer.prev_kind()
 
     def peek(self) -> TokenKind:
-        return self.lexer.peek_token().kind
+        return self.lexer.peek_kind()
 
     def next(self) -> TokenKind:
-        return self.lexer.advance_token().kind
+        return self.lexer.advance_kind()
     
     def current_value(self) -> str|int|float|bool|None:
-        return self.lexer.current_token().get_value()
+        return self.lexer.current_value()
 
     def check(self, kind: TokenKind) -> bool:
         if self.current() == kind:
@@ -553,16 +626,7 @@ class Parser:
         for kind in args:
             self.expect(kind, msg)
 
-    def _is_call_check(self, kind: TokenKind) -> bool:
-        return kind == TokenKind.EUL or \
-            kind == TokenKind.WA or \
-            kind == TokenKind.RO or \
-            kind == TokenKind.HANDA or \
-            kind == TokenKind.DA or \
-            kind == TokenKind.GEOT or \
-            kind == TokenKind.HAN
-
-    def try_call_at_data(self, callee: ExprAST, params: list[ExprAST] = []) \
+    def try_call_at_data(self, callee: ExprAST, params: list[ExprAST]|None = None) \
         -> CallExprAST|CallStmtAST|None:
         if self.current() == TokenKind.EUL and self.peek() == TokenKind.CALL:
             self.next()
@@ -577,7 +641,7 @@ class Parser:
         return None
 
     def try_call_expr(self, callee: ExprAST, 
-                      params: list[ExprAST] = []) -> CallExprAST|None:
+                      params: list[ExprAST]|None = None) -> CallExprAST|None:
         if self.check(TokenKind.HAN):
             self.expect(TokenKind.GEOT, "문법 에러: 것이 필요함")
         elif not self.check(TokenKind.GEOT):
@@ -585,7 +649,43 @@ class Parser:
         return CallExprAST(callee, params)
     
     def try_call_stmt(self, callee: ExprAST, 
-                      params: list[ExprAST] = []) -> CallStmtAST|None:
+                      params: list[ExprAST]|None = None) -> CallStmtAST|None:
         if self.check(TokenKind.HANDA) or self.check(TokenKind.DA):
             return CallStmtAST(callee, params)
-        return None
\ No newline at end of file
+        return None
+
+class LazyBody:
+    # 지연 파싱한 함수 본문을 처음 부를 때 파싱함
+    # 캐시에 저장할 때는 토큰 배열 대신 본문 소스만 저장하고,
+    # 읽어 들인 뒤에는 그 소스를 다시 토큰으로 바꿔서 파싱함
+    def __init__(self, tokens: TokenStream, start: int, end: int,
+                 is_loop: bool):
+        self.tokens = tokens
+        self.start = start
+        self.end = end
+        self.is_loop = is_loop
+
+    def __call__(self) -> BodyAST:
+        tokens = self.tokens
+        parser = Parser(tokens, lazy=True)
+        parser.is_loop = self.is_loop
+        saved = tokens.index
+        tokens.index = self.start
+        try:
+            body = parser.parse_body(TokenKind.PARAGRAPH)
+            if tokens.index != self.end:
+                raise Exception("문법 에러: 문단을 실행한다.가 필요함")
+        finally:
+            tokens.index = saved
+        return body
+
+    def __reduce__(self):
+        # 본문 첫 토큰부터 본문을 닫는 문단까지의 소스
+        src = self.tokens.src[self.tokens.starts[self.start]:
+                              self.tokens.ends[self.end]]
+        return LazyBody.from_source, (src, self.is_loop)
+
+    @staticmethod
+    def from_source(src: str, is_loop: bool) -> "LazyBody":
+        tokens = TokenStream(src)
+        return LazyBody(tokens, 0, len(tokens) - 2, is_loop)
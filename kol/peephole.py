@@ -0,0 +1,138 @@
+from .bytecode import *
+
+# 컴파일러가 만든 바이트코드에서 불필요한 명령을 걷어내는 최적화
+# 점프 대상이 바뀌지 않는 한 여러 번 돌면서 더 줄일 것이 없을 때까지 반복함
+#  - 값을 넣자마자 버리는 LoadConst/LoadConstCopy/LoadGlobal/LoadLocal + Pop 제거
+#  - 상수 조건으로 하는 분기를 Jmp로 바꾸거나 제거
+#  - 점프가 다른 점프로 가면 마지막 도착지로 바로 가도록 연결
+#  - 바로 다음 명령으로 가는 Jmp 제거
+#  - Ret이나 Jmp 뒤에서 도달할 수 없는 명령 제거
+PURE_PUSH = (LoadConst, LoadConstCopy, LoadGlobal, LoadLocal)
+COND_JUMP = (JmpIfFalse, JmpIfTrue)
+
+
+def optimize(code: list) -> list:
+    changed = True
+    while changed:
+        changed = thread_jumps(code)
+        keep = simplify(code)
+        changed |= not all(keep)
+        code = compact(code, keep)
+        keep = reachable(code)
+        changed |= not all(keep)
+        code = compact(code, keep)
+    return code
+
+
+def fires(jump: JumpCode, value) -> bool:
+    if isinstance(jump, JmpIfFalse):
+        return not value
+    return bool(value)
+
+
+def resolve(code: list, ip: int) -> int:
+    # ip에 도착한 뒤 스택을 바꾸지 않고 결국 가게 되는 곳을 찾음
+    seen = set()
+    while ip < len(code) and ip not in seen:
+        seen.add(ip)
+        inst = code[ip]
+        if type(inst) is Jmp:
+            ip = inst.ip
+        elif isinstance(inst, LoadConst) and ip + 1 < len(code) and \
+            isinstance(code[ip + 1], COND_JUMP):
+            # 상수를 넣고 바로 조건 분기하면 어디로 갈지 미리 알 수 있음
+            jump = code[ip + 1]
+            ip = jump.ip if fires(jump, inst.const) else ip + 2
+        else:
+            break
+    return ip
+
+
+def thread_jumps(code: list) -> bool:
+    changed = False
+    for inst in code:
+        if isinstance(inst, JumpCode):
+            target = resolve(code, inst.ip)
+            if target != inst.ip:
+                inst.bind(target)
+                changed = True
+    return changed
+
+
+def jump_targets(code: list) -> set:
+    return {inst.ip for inst in code if isinstance(inst, JumpCode)}
+
+
+def simplify(code: list) -> list:
+    # 지울 명령을 표시함. 지운 명령을 가리키던 점프는 compact에서
+    # 그 다음 남은 명령으로 옮겨지므로, 짝의 두 번째 명령이
+    # 점프 대상이 아닐 때만 지움
+    targets = jump_targets(code)
+    keep = [True]*len(code)
+    i = 0
+    while i < len(code):
+        inst = code[i]
+        nxt = code[i + 1] if i + 1 < len(code) else None
+        if i + 1 in targets:
+            nxt = None
+
+        if isinstance(inst, PURE_PUSH) and isinstance(nxt, Pop):
+            keep[i] = keep[i + 1] = False
+            i += 2
+            continue
+        if isinstance(inst, LoadConst) and isinstance(nxt, COND_JUMP):
+            if fires(nxt, inst.const):
+                code[i] = Jmp(nxt.ip)
+            else:
+                keep[i] = False
+            keep[i + 1] = False
+            i += 2
+            continue
+        if isinstance(inst, LoadConst) and type(nxt) is Jmp and \
+            nxt.ip < len(code) and isinstance(code[nxt.ip], COND_JUMP):
+            # 그리고/또는의 결과를 바로 조건 분기에 쓰는 경우
+            jump = code[nxt.ip]
+            code[i] = Jmp(jump.ip if fires(jump, inst.const) else nxt.ip + 1)
+            keep[i + 1] = False
+            i += 2
+            continue
+        if type(inst) is Jmp and inst.ip == i + 1:
+            keep[i] = False
+        i += 1
+    return keep
+
+
+def reachable(code: list) -> list:
+    seen = [False]*len(code)
+    work = [0]
+    while work:
+        ip = work.pop()
+        while ip < len(code) and not seen[ip]:
+            seen[ip] = True
+            inst = code[ip]
+            if isinstance(inst, JumpCode):
+                work.append(inst.ip)
+            if type(inst) is Jmp or isinstance(inst, Ret):
+                break
+            ip += 1
+    return seen
+
+
+def compact(code: list, keep: list) -> list:
+    # 지운 명령을 빼고, 점프 대상을 새 위치로 다시 묶음
+    # 지운 명령을 가리키던 점프는 그 뒤에 남은 첫 명령을 가리킴
+    new_index = []
+    count = 0
+    for kept in keep:
+        new_index.append(count)
+        count += kept
+    new_index.append(count)
+
+    result = []
+    for inst, kept in zip(code, keep):
+        if not kept:
+            continue
+        if isinstance(inst, JumpCode):
+            inst.bind(new_index[inst.ip])
+        result.append(inst)
+    return result
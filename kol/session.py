@@ -0,0 +1,37 @@
+from .ast import ProgramAST
+from .tokenstream import TokenStream
+from .parser import Parser
+from .compiler import Compiler
+from .symtable import Scope
+from .constpool import ConstPool
+
+class CompilationSession:
+    # 프로그램 하나를 컴파일한 결과(상수 풀, 유형 스코프, 전역 슬롯)를 가짐
+    # 프로그램을 컴파일할 때마다 이전 상태를 버리고 새로 시작하므로,
+    # 같은 세션으로 프로그램을 계속 컴파일해도 메모리가 쌓이지 않음
+    def __init__(self, opt_level: int|None = None, peephole: bool = True):
+        self.opt_level = opt_level
+        self.peephole = peephole
+        self.reset()
+
+    def reset(self):
+        self.const_pool: ConstPool = ConstPool()
+        self.class_scope: dict = {}
+        self.global_scope: Scope = Scope()
+        self.global_count = 0
+        self.bytecode: list = []
+
+    def compile(self, ast: ProgramAST) -> tuple[int, list, list]:
+        # VM에 넘길 (전역 변수 개수, 상수 풀, 바이트코드)를 반환함
+        self.reset()
+        compiler = Compiler(None, self.const_pool, self.class_scope,
+                            peephole=self.peephole, opt_level=self.opt_level)
+        compiler.compile_main(ast)
+        self.global_scope = compiler.scope
+        self.global_count = compiler.assign
+        self.bytecode = compiler.bytecode
+        return self.global_count, self.const_pool, self.bytecode
+
+    def compile_source(self, src: str,
+                       lazy: bool = False) -> tuple[int, list, list]:
+        return self.compile(Parser(TokenStream(src), lazy=lazy).parse())
@@ -6,6 +6,8 @@ class Struct:
         for name in var:
             self.var[name] = None
         self.is_type = True
+        # 이 객체를 만든 구조/유형. 구조/유형 자신은 자기 자신
+        self.origin = self
 
     def __getitem__(self, name):
         return self.var[name]
@@ -16,12 +18,17 @@ class Struct:
     def copy(self):
         
         if self.is_type:
-            obj = copy.deepcopy(self)
+            obj = copy.deepcopy(self, self.shared_memo())
             obj.is_type = False
+            obj.origin = self
             return obj
         else:
             return self
 
+    def shared_memo(self) -> dict:
+        # 객체를 만들 때 복사하지 않고 구조/유형과 같이 쓸 값들(deepcopy의 memo)
+        return {}
+
 class Class(Struct):
     def __init__(self, var:list, funcs, parent):
         if parent:
@@ -40,4 +47,13 @@ class Class(Struct):
         return super().__setitem__(name, obj)
     
     def get_method(self, name):
-        return self.funcs[name]
\ No newline at end of file
+        return self.funcs[name]
+
+    def shared_memo(self) -> dict:
+        # 메서드는 자신을 매개변수로 받으므로 객체마다 다른 것은 var의 필드뿐임
+        # 그래서 객체는 유형(과 부모 유형)의 메서드를 복사하지 않고 같이 쓰고,
+        # 메서드는 객체마다가 아니라 유형마다 한 번만 컴파일됨
+        memo = self.parent.shared_memo() if isinstance(self.parent, Struct) else {}
+        for func in self.funcs.values():
+            memo[id(func)] = func
+        return memo
\ No newline at end of file
@@ -0,0 +1,32 @@
+class Scope:
+    # 이름을 슬롯 번호로 바꿔주는 심볼 테이블
+    # 함수 스코프는 자신을 정의한 스코프를 부모로 가리키고, 찾는 이름이
+    # 없으면 부모를 따라 올라감. 함수를 정의할 때마다 바깥 스코프를
+    # 복사하지 않고 공유하므로, 이름은 함수를 컴파일할 때 찾고
+    # 함수 정의 뒤에 생긴 전역 변수도 보임
+    def __init__(self, parent: "Scope|None" = None):
+        self.slots: dict[str, int] = {}
+        self.parent = parent
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.slots
+
+    def __getitem__(self, name: str) -> int:
+        return self.slots[name]
+
+    def __setitem__(self, name: str, slot: int):
+        self.slots[name] = slot
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def __repr__(self):
+        return f"Scope({self.slots!r}, parent={self.parent!r})"
+
+    def lookup(self, name: str) -> int:
+        scope = self
+        while scope is not None:
+            if name in scope.slots:
+                return scope.slots[name]
+            scope = scope.parent
+        raise KeyError(name)
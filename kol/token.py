@@ -99,6 +99,28 @@ class TokenKind(Enum):
     COMMENT = auto() # 주석 ㅁㄴㅇㄹ/ 주석 시작 ~ 끝
     ENDOFFILE = auto() # 파일 끝
 
+class SuffixTrie:
+    # 단어 끝에서부터 거꾸로 따라가는 트라이
+    # 가장 긴 접미사와 그 토큰 종류를 한 번의 순회로 찾음
+    def __init__(self, table: dict[str, TokenKind]):
+        self.root: dict = {}
+        for word, kind in table.items():
+            node = self.root
+            for ch in reversed(word):
+                node = node.setdefault(ch, {})
+            node[None] = kind
+
+    def longest_suffix(self, word: str) -> tuple[int, TokenKind]:
+        node = self.root
+        length, kind = 0, TokenKind.UNDEFINED
+        for i in range(len(word) - 1, -1, -1):
+            node = node.get(word[i])
+            if node is None:
+                break
+            if None in node:
+                length, kind = len(word) - i, node[None]
+        return length, kind
+
 class Token:
     PUNCTUATION = {
         "(":TokenKind.LEFTPARENT,
@@ -154,7 +176,7 @@ class Token:
         ".": TokenKind.DOT
     }
 
-    POST_SORT_KEY = tuple(sorted(POST, key=len, reverse=True))
+    POST_TRIE = SuffixTrie(POST)
 
     MIDDLE = {
         "문단": TokenKind.PARAGRAPH,
@@ -169,7 +191,7 @@ class Token:
         "원소": TokenKind.ELEM,
     }
 
-    MIDDLE_SORT_KEY = tuple(sorted(MIDDLE, key=len, reverse=True))
+    MIDDLE_TRIE = SuffixTrie(MIDDLE)
 
     REMAIN = {
         "반복": TokenKind.LOOP,
@@ -191,6 +213,8 @@ class Token:
         "된": TokenKind.BECOME
     }
 
+    REMAIN_TRIE = SuffixTrie(REMAIN)
+
     def __init__(self, kind: TokenKind = TokenKind.UNDEFINED, str: str = ""):
         if type(kind) != TokenKind:
             raise Exception("asdfsadf")
@@ -201,21 +225,26 @@ class Token:
         self.str = str
 
     def get_value(self) -> str|int|float|bool|NoneObject|None:
-        match self.kind:
+        return Token.value_of(self.kind, self.str)
+
+    @staticmethod
+    def value_of(kind: TokenKind, str: str) -> str|int|float|bool|NoneObject|None:
+        # 토큰 종류와 문자열로 값을 만듦. TokenStream은 Token 없이 이것을 씀
+        match kind:
             case TokenKind.STRING:
-                return self.str
+                return str
             case TokenKind.NUMBER:
-                return int(self.str)
+                return int(str)
             case TokenKind.HEX:
-                return int(self.str, 16)
+                return int(str, 16)
             case TokenKind.OCT:
-                return int(self.str, 8)
+                return int(str, 8)
             case TokenKind.BIN:
-                return int(self.str, 2)
+                return int(str, 2)
             case TokenKind.IDENTIFIER:
-                return self.str
+                return str
             case TokenKind.FLOAT:
-                return float(self.str)
+                return float(str)
             case TokenKind.TRUE:
                 return True
             case TokenKind.FALSE:
@@ -0,0 +1,103 @@
+from array import array
+from .lexer import Scanner, WordCache
+from .token import Token, TokenKind
+
+_KINDS: dict[int, TokenKind] = {kind.value: kind for kind in TokenKind}
+
+
+class TokenStream:
+    # 소스 전체를 한 번에 토큰으로 바꿔 배열에 담아둠
+    # 토큰 종류는 array('B'), 위치는 array('I'), 문자열과 값은 공유 표에 저장
+    # Lexer와 같은 Scanner로 읽지만 Token 객체를 만들지 않고 배열에 바로 씀
+    # Lexer와 같은 방식으로 Parser에 넘겨줄 수 있음
+    def __init__(self, src: str, word_cache: WordCache|None = None):
+        self.src = src
+        self.kinds = array('B')
+        self.starts = array('I')
+        self.ends = array('I')
+        self.value_index = array('I')
+        self.table: list[tuple[str, str|int|float|bool|None]] = [("", None)]
+        self.index = 0
+
+        kinds = self.kinds.append
+        starts = self.starts.append
+        ends = self.ends.append
+        value_index = self.value_index.append
+        # (토큰 종류, 문자열) -> 표의 위치. 같은 이름과 리터럴은 한 번만 저장
+        interned: dict[tuple[TokenKind, str], int] = {}
+        scanner = Scanner(src, word_cache)
+        while True:
+            kind, start, end, text = scanner.scan()
+            kinds(kind.value)
+            starts(start)
+            ends(end)
+            if text or kind is TokenKind.STRING:
+                index = interned.get((kind, text))
+                if index is None:
+                    index = interned[(kind, text)] = len(self.table)
+                    self.table.append((text, Token.value_of(kind, text)))
+                value_index(index)
+            else:
+                value_index(0)
+            if kind is TokenKind.ENDOFFILE:
+                break
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def kind_at(self, index: int) -> TokenKind:
+        return _KINDS[self.kinds[min(index, len(self.kinds) - 1)]]
+
+    def token_at(self, index: int) -> Token:
+        index = min(index, len(self.kinds) - 1)
+        kind = _KINDS[self.kinds[index]]
+        if kind in (TokenKind.TRUE, TokenKind.FALSE, TokenKind.NONE):
+            return Token(kind)
+        return Token(kind, self.table[self.value_index[index]][0])
+
+    def span_at(self, index: int) -> tuple[int, int]:
+        return self.starts[index], self.ends[index]
+
+    def current_kind(self) -> TokenKind:
+        return _KINDS[self.kinds[self.index]]
+
+    def prev_kind(self) -> TokenKind:
+        if self.index == 0:
+            return TokenKind.UNDEFINED
+        return _KINDS[self.kinds[self.index - 1]]
+
+    def peek_kind(self, n: int = 1) -> TokenKind:
+        return self.kind_at(self.index + n)
+
+    def advance_kind(self) -> TokenKind:
+        if self.index < len(self.kinds) - 1:
+            self.index += 1
+        return _KINDS[self.kinds[self.index]]
+
+    def current_value(self) -> str|int|float|bool|None:
+        kind = _KINDS[self.kinds[self.index]]
+        if kind in (TokenKind.TRUE, TokenKind.FALSE, TokenKind.NONE):
+            return Token(kind).get_value()
+        return self.table[self.value_index[self.index]][1]
+
+    def current_span(self) -> tuple[int, int]:
+        return self.span_at(self.index)
+
+    def current_token(self) -> Token:
+        return self.token_at(self.index)
+
+    def prev_token(self) -> Token:
+        if self.index == 0:
+            return Token()
+        return self.token_at(self.index - 1)
+
+    def peek_token(self) -> Token:
+        return self.token_at(self.index + 1)
+
+    def advance_token(self) -> Token:
+        self.advance_kind()
+        return self.current_token()
+
+    def print(self):
+        for i in range(len(self.kinds)):
+            print(f"토큰[{i}]: {self.token_at(i)}")
@@ -0,0 +1,22 @@
+from typing import Any, Generator
+
+# 재귀 호출 대신 쓰는 제너레이터 스택
+# 제너레이터가 다른 제너레이터를 yield하면 그것을 스택에 쌓아 먼저 실행하고
+# 끝난 값(return 값)을 send로 돌려줌. 중첩 깊이와 상관없이 파이썬 스택을 일정하게 씀
+Step = Generator[Any, Any, Any]
+
+
+def run(gen: Step) -> Any:
+    stack: list[Step] = [gen]
+    value = None
+    while True:
+        try:
+            sub = stack[-1].send(value)
+        except StopIteration as stop:
+            stack.pop()
+            if not stack:
+                return stop.value
+            value = stop.value
+            continue
+        stack.append(sub)
+        value = None
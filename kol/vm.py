@@ -1,32 +1,101 @@
 from .frame import Frame
 from .builtin import builtins
+from itertools import repeat
+
+
+class ProgramEnd(Exception):
+    # 최상위 코드의 끝(End 명령)에 닿으면 실행 루프를 빠져나옴
+    pass
+
+
 class VM:
     def __init__(self, global_len, const_pool, bytecode):
+        from .bytecode import End
+        # 연산 중인 값과 함수 프레임의 지역 변수를 함께 담는 값 스택
+        # 목록의 길이가 스택 포인터 역할을 함
         self.stack = []
-        self.frames: list[Frame] = []
         self.global_list = [None]*global_len
         self.const_pool = const_pool
         self.global_code = bytecode
-        self.for_iter = []
-        self.ip = -1
         for i, ident in enumerate(builtins):
             self.global_list[i] = builtins[ident]
-        
+        # 최상위 코드도 전역 변수를 지역 변수로 쓰는 프레임 하나로 실행함
+        # 그래서 명령들은 최상위인지 함수 안인지 가리지 않고 현재 프레임만 봄
+        self.frame = Frame.for_main(bytecode + [End()], self.global_list)
+        self.frames: list[Frame] = [self.frame]
+        # 함수가 끝나서 놓아준 프레임. 다음 호출에서 다시 씀
+        self.free_frames: list[Frame] = []
+
     def run(self):
-        while True:
-            if self.frames:
+        try:
+            while True:
                 self.execute_func()
-            elif self.execute_main():
-                break
+        except ProgramEnd:
+            pass
+
+    def inline_cache_stats(self) -> dict[str, tuple[int, int]]:
+        # 인라인 캐시가 있는 명령 종류마다 (맞은 수, 틀린 수)를 모음
+        # 최상위 코드와 컴파일된 함수/메서드의 코드를 한 번씩만 셈
+        from .func import Func
+        from .struct import Class
+        funcs = []
+        for const in self.const_pool:
+            if isinstance(const, Func):
+                funcs.append(const)
+            elif isinstance(const, Class):
+                funcs += const.funcs.values()
+        codes = {id(self.global_code): self.global_code}
+        for func in funcs:
+            if isinstance(func.code, list):
+                codes[id(func.code)] = func.code
+
+        stats = {}
+        for code in codes.values():
+            for inst in code:
+                if hasattr(inst, "hits"):
+                    name = type(inst).__name__
+                    hits, misses = stats.get(name, (0, 0))
+                    stats[name] = (hits + inst.hits, misses + inst.misses)
+        return stats
 
     def execute_func(self):
-        self.frames[-1].ip += 1
-        self.frames[-1].code[self.frames[-1].ip](self)
+        frame = self.frame
+        frame.ip += 1
+        frame.code[frame.ip](self)
+
+    def push_frame(self, func, param_count: int):
+        # 스택 맨 위의 인자 param_count개가 복사 없이 그대로 새 프레임의
+        # 첫 지역 변수가 되고, 나머지 지역 변수 자리는 None으로 채움
+        stack = self.stack
+        base = len(stack) - param_count
+        if func.local_count > param_count:
+            stack.extend(repeat(None, func.local_count - param_count))
+        if self.free_frames:
+            frame = self.free_frames.pop()
+            frame.reuse(func, base)
+        else:
+            frame = Frame(func, stack, base)
+        self.frames.append(frame)
+        self.frame = frame
 
-    def execute_main(self):
-        self.ip += 1
-        if self.ip >= len(self.global_code):
-            return True
-        self.global_code[self.ip](self)
+    def pop_frame(self):
+        # 맨 위 값을 돌려줄 값으로 남기고 프레임의 지역 변수와 연산 중인
+        # 값을 스택에서 지움
+        frame = self.frames.pop()
+        stack = self.stack
+        ret = stack.pop()
+        del stack[frame.base:]
+        stack.append(ret)
+        frame.release()
+        self.free_frames.append(frame)
+        self.frame = self.frames[-1]
 
-        return False
+    def tail_call(self, func, param_count: int):
+        # 스택 맨 위의 인자를 지금 프레임의 지역 변수 자리로 옮기고 프레임을
+        # 다음 함수에 씀
+        frame = self.frame
+        stack = self.stack
+        del stack[frame.base:len(stack) - param_count]
+        if func.local_count > param_count:
+            stack.extend(repeat(None, func.local_count - param_count))
+        frame.reuse(func, frame.base)
@@ -12,17 +12,23 @@ from 콜.bytecode import *
 from 콜.ast import FuncAST # FuncAST는 Func 객체 내부에 저장될 수 있음
 from 콜.func import Func # Func 객체 자체를 테스트할 때 필요
 from 콜.struct import Struct, Class # Struct, Class 객체 자체를 테스트할 때 필요
+from 콜.session import CompilationSession
+from 콜 import ir
+import gc
+import weakref
+import operator
 
 class TestCompiler(unittest.TestCase):
 
-    def _compile_and_get_bytecode(self, code: str):
+    def _compile_and_get_bytecode(self, code: str, peephole: bool = False):
         """
         주어진 '콜' 코드를 렉싱, 파싱, 컴파일하여 바이트코드, 상수 풀, 스코프를 반환합니다.
+        방문 함수가 만드는 코드를 그대로 보기 위해 기본적으로 핍홀 최적화는 끕니다.
         """
         lexer = Lexer(code)
         parser = Parser(lexer)
         ast = parser.parse()
-        compiler = Compiler()
+        compiler = Compiler(peephole=peephole)
         compiler.compile_main(ast)
         return compiler.bytecode, compiler.const_pool, compiler.scope
 
@@ -59,11 +65,12 @@ class TestCompiler(unittest.TestCase):
 
     def test_binary_operation_equal(self):
         """이항 동등 연산이 올바르게 컴파일되는지 테스트합니다."""
-        code = "1이 2랑 같다."
-        bytecode, _, _ = self._compile_and_get_bytecode(code)
+        code = "가는 1이 된다. 가가 2랑 같다."
+        bytecode, _, scope = self._compile_and_get_bytecode(code)
+        bytecode = bytecode[2:] # 가에 대입하는 코드는 건너뜀
         self.assertEqual(len(bytecode), 4)
-        self.assertIsInstance(bytecode[0], LoadConst)
-        self.assertEqual(bytecode[0].const, 1)
+        self.assertIsInstance(bytecode[0], LoadGlobal)
+        self.assertEqual(bytecode[0].index, scope["가"])
         self.assertIsInstance(bytecode[1], LoadConst)
         self.assertEqual(bytecode[1].const, 2)
         self.assertIsInstance(bytecode[2], EqualOp) # 인스턴스 비교 대신 타입 비교
@@ -71,65 +78,67 @@ class TestCompiler(unittest.TestCase):
 
     def test_logical_and(self):
         """논리 AND 연산이 올바르게 컴파일되는지 테스트합니다."""
-        code = "참 그리고 거짓."
-        bytecode, _, _ = self._compile_and_get_bytecode(code)
-        # LoadConst(True)
-        # JmpIfFalse(false_branch_ip)
-        # LoadConst(False)
-        # JmpIfFalse(false_branch_ip)
-        # LoadConst(True)
-        # Jmp(end_ip)
+        code = "변수는 참이 된다. 변수가 참이랑 같다 그리고 거짓."
+        bytecode, _, scope = self._compile_and_get_bytecode(code)
+        # 2~4: 변수가 참이랑 같다
+        # 5: JmpIfFalse(false_branch_ip)
+        # 6: LoadConst(False)
+        # 7: JmpIfFalse(false_branch_ip)
+        # 8: LoadConst(True)
+        # 9: Jmp(end_ip)
         # false_branch_ip:
-        # LoadConst(False)
+        # 10: LoadConst(False)
         # end_ip:
-        # Pop()
-        self.assertEqual(len(bytecode), 8) # Pop 포함
-        self.assertIsInstance(bytecode[0], LoadConst)
-        self.assertEqual(bytecode[0].const, True)
-        self.assertIsInstance(bytecode[1], JmpIfFalse)
-        self.assertEqual(bytecode[1].ip, 6) # 'false_branch_ip'
-        self.assertIsInstance(bytecode[2], LoadConst)
-        self.assertEqual(bytecode[2].const, False)
-        self.assertIsInstance(bytecode[3], JmpIfFalse)
-        self.assertEqual(bytecode[3].ip, 6) # 'false_branch_ip'
-        self.assertIsInstance(bytecode[4], LoadConst)
-        self.assertEqual(bytecode[4].const, True)
-        self.assertIsInstance(bytecode[5], Jmp)
-        self.assertEqual(bytecode[5].ip, 7) # 'end_ip'
+        # 11: Pop()
+        self.assertEqual(len(bytecode), 12) # 대입 2개와 Pop 포함
+        self.assertIsInstance(bytecode[2], LoadGlobal)
+        self.assertEqual(bytecode[2].index, scope["변수"])
+        self.assertIsInstance(bytecode[4], EqualOp)
+        self.assertIsInstance(bytecode[5], JmpIfFalse)
+        self.assertEqual(bytecode[5].ip, 10) # 'false_branch_ip'
         self.assertIsInstance(bytecode[6], LoadConst)
         self.assertEqual(bytecode[6].const, False)
-        self.assertIsInstance(bytecode[7], Pop)
+        self.assertIsInstance(bytecode[7], JmpIfFalse)
+        self.assertEqual(bytecode[7].ip, 10) # 'false_branch_ip'
+        self.assertIsInstance(bytecode[8], LoadConst)
+        self.assertEqual(bytecode[8].const, True)
+        self.assertIsInstance(bytecode[9], Jmp)
+        self.assertEqual(bytecode[9].ip, 11) # 'end_ip'
+        self.assertIsInstance(bytecode[10], LoadConst)
+        self.assertEqual(bytecode[10].const, False)
+        self.assertIsInstance(bytecode[11], Pop)
 
     def test_logical_or(self):
         """논리 OR 연산이 올바르게 컴파일되는지 테스트합니다."""
-        code = "참 또는 거짓."
-        bytecode, _, _ = self._compile_and_get_bytecode(code)
-        # LoadConst(True)
-        # JmpIfTrue(true_branch_ip)
-        # LoadConst(False)
-        # JmpIfTrue(true_branch_ip)
-        # LoadConst(False)
-        # Jmp(end_ip)
+        code = "변수는 참이 된다. 변수가 참이랑 같다 또는 거짓."
+        bytecode, _, scope = self._compile_and_get_bytecode(code)
+        # 2~4: 변수가 참이랑 같다
+        # 5: JmpIfTrue(true_branch_ip)
+        # 6: LoadConst(False)
+        # 7: JmpIfTrue(true_branch_ip)
+        # 8: LoadConst(False)
+        # 9: Jmp(end_ip)
         # true_branch_ip:
-        # LoadConst(True)
+        # 10: LoadConst(True)
         # end_ip:
-        # Pop()
-        self.assertEqual(len(bytecode), 8) # Pop 포함
-        self.assertIsInstance(bytecode[0], LoadConst)
-        self.assertEqual(bytecode[0].const, True)
-        self.assertIsInstance(bytecode[1], JmpIfTrue)
-        self.assertEqual(bytecode[1].ip, 6) # 'true_branch_ip'
-        self.assertIsInstance(bytecode[2], LoadConst)
-        self.assertEqual(bytecode[2].const, False)
-        self.assertIsInstance(bytecode[3], JmpIfTrue)
-        self.assertEqual(bytecode[3].ip, 6) # 'true_branch_ip'
-        self.assertIsInstance(bytecode[4], LoadConst)
-        self.assertEqual(bytecode[4].const, False)
-        self.assertIsInstance(bytecode[5], Jmp)
-        self.assertEqual(bytecode[5].ip, 7) # 'end_ip'
+        # 11: Pop()
+        self.assertEqual(len(bytecode), 12) # 대입 2개와 Pop 포함
+        self.assertIsInstance(bytecode[2], LoadGlobal)
+        self.assertEqual(bytecode[2].index, scope["변수"])
+        self.assertIsInstance(bytecode[4], EqualOp)
+        self.assertIsInstance(bytecode[5], JmpIfTrue)
+        self.assertEqual(bytecode[5].ip, 10) # 'true_branch_ip'
         self.assertIsInstance(bytecode[6], LoadConst)
-        self.assertEqual(bytecode[6].const, True)
-        self.assertIsInstance(bytecode[7], Pop)
+        self.assertEqual(bytecode[6].const, False)
+        self.assertIsInstance(bytecode[7], JmpIfTrue)
+        self.assertEqual(bytecode[7].ip, 10) # 'true_branch_ip'
+        self.assertIsInstance(bytecode[8], LoadConst)
+        self.assertEqual(bytecode[8].const, False)
+        self.assertIsInstance(bytecode[9], Jmp)
+        self.assertEqual(bytecode[9].ip, 11) # 'end_ip'
+        self.assertIsInstance(bytecode[10], LoadConst)
+        self.assertEqual(bytecode[10].const, True)
+        self.assertIsInstance(bytecode[11], Pop)
 
     def test_if_statement(self):
         """단일 if 문이 올바르게 컴파일되는지 테스트합니다."""
@@ -305,40 +314,209 @@ class TestCompiler(unittest.TestCase):
     def test_for_loop(self):
         """for 루프가 올바르게 컴파일되는지 테스트합니다."""
         code = """
-        [1 다음 2]에 있는 각 항목들을 가로 가져와 다음
+        [1 다음 가]에 있는 각 항목들을 가로 가져와 다음
             가.
         문단을 반복한다.
         """
         bytecode, _, scope = self._compile_and_get_bytecode(code)
         # LoadConst(1)
-        # LoadConst(2)
+        # LoadGlobal(index_of_가) (원소가 모두 상수면 LoadConstCopy 하나가 됨)
         # BuildArray(2)
         # ForInPrepare()
         # repeat_ip:
-        #   ForInStep(index_of_가)
-        #   JmpIfFalse(end_ip)
+        #   ForIter(index_of_가, end_ip)
         #   Body (LoadGlobal(index_of_가), Pop())
         #   Jmp(repeat_ip)
         # end_ip:
         #   ForInDone()
-        self.assertEqual(len(bytecode), 10)
+        self.assertEqual(len(bytecode), 9)
         self.assertIsInstance(bytecode[0], LoadConst)
         self.assertEqual(bytecode[0].const, 1)
-        self.assertIsInstance(bytecode[1], LoadConst)
-        self.assertEqual(bytecode[1].const, 2)
+        self.assertIsInstance(bytecode[1], LoadGlobal)
+        self.assertEqual(bytecode[1].index, scope["가"])
         self.assertIsInstance(bytecode[2], BuildArray)
         self.assertEqual(bytecode[2].array_len, 2)
         self.assertIsInstance(bytecode[3], ForInPrepare)
-        self.assertIsInstance(bytecode[4], ForInStep)
+        self.assertIsInstance(bytecode[4], ForIter)
         self.assertEqual(bytecode[4].index, scope["가"])
-        self.assertIsInstance(bytecode[5], JmpIfFalse)
-        self.assertEqual(bytecode[5].ip, 9) # ForInDone으로 점프
-        self.assertIsInstance(bytecode[6], LoadGlobal)
-        self.assertEqual(bytecode[6].index, scope["가"])
-        self.assertIsInstance(bytecode[7], Pop)
-        self.assertIsInstance(bytecode[8], Jmp)
-        self.assertEqual(bytecode[8].ip, 4) # ForInStep으로 점프
-        self.assertIsInstance(bytecode[9], ForInDone)
+        self.assertEqual(bytecode[4].ip, 8) # ForInDone으로 점프
+        self.assertIsInstance(bytecode[5], LoadGlobal)
+        self.assertEqual(bytecode[5].index, scope["가"])
+        self.assertIsInstance(bytecode[6], Pop)
+        self.assertIsInstance(bytecode[7], Jmp)
+        self.assertEqual(bytecode[7].ip, 4) # ForIter로 점프
+        self.assertIsInstance(bytecode[8], ForInDone)
+
+    def test_counted_while_loop(self):
+        """세는 반복문이 CountPrepare와 ForIter로 합쳐지는지 테스트합니다."""
+        code = """
+        가는 0이 된다.
+        계속 가가 10보다 작다인 동안 다음
+            가를 출력한다.
+            가는 가와 1을 더한 것이 된다.
+        문단을 반복한다.
+        """
+        bytecode, _, scope = self._compile_and_get_bytecode(code, peephole=True)
+        prepare = [c for c in bytecode if isinstance(c, CountPrepare)]
+        self.assertEqual(len(prepare), 1)
+        self.assertIs(prepare[0].compare, operator.lt)
+        self.assertIs(prepare[0].advance, operator.add)
+        self.assertEqual(prepare[0].step, 1)
+        loop = bytecode.index(prepare[0]) + 1
+        self.assertIsInstance(bytecode[loop], ForIter)
+        self.assertEqual(bytecode[loop].index, scope["가"])
+        # 반복할 때마다 실행되는 몸통에는 증가문이 없음
+        back = [i for i, c in enumerate(bytecode)
+                if type(c) is Jmp and c.ip == loop][0]
+        self.assertEqual([type(c) for c in bytecode[loop + 1:back]],
+                         [LoadGlobal, LoadGlobal, Call, Pop])
+        self.assertIsInstance(bytecode[-1], ForInDone)
+
+    def test_counted_while_loop_not_fused(self):
+        """증가문을 건너뛰거나 변수를 다시 묶는 반복문은 합치지 않는지 테스트합니다."""
+        cases = [
+            # 계속하기는 증가문을 건너뜀
+            """가는 0이 된다.
+            계속 가가 10보다 작다인 동안 다음
+                만약 가가 3이랑 같다면 다음
+                    계속한다.
+                문단을 실행한다.
+                가는 가와 1을 더한 것이 된다.
+            문단을 반복한다.""",
+            # 몸통에서 끝값을 바꿈
+            """가는 0이 된다.
+            끝수는 10이 된다.
+            계속 가가 끝수보다 작다인 동안 다음
+                끝수는 5가 된다.
+                가는 가와 1을 더한 것이 된다.
+            문단을 반복한다.""",
+            # 증가 방향이 조건과 맞지 않음
+            """가는 0이 된다.
+            계속 가가 10보다 작다인 동안 다음
+                가는 가와 1을 뺀 것이 된다.
+            문단을 반복한다.""",
+            # 더를 다시 묶음
+            """가는 0이 된다.
+            계속 가가 10보다 작다인 동안 다음
+                가는 가와 1을 더한 것이 된다.
+            문단을 반복한다.
+            더는 곱이 된다.""",
+        ]
+        for code in cases:
+            with self.subTest(code=code):
+                bytecode, _, _ = self._compile_and_get_bytecode(code)
+                self.assertFalse(any(isinstance(c, CountPrepare)
+                                     for c in bytecode))
+
+    def test_for_over_range(self):
+        """범위를_만든 것을 도는 반복문이 배열을 만들지 않는지 테스트합니다."""
+        code = """
+        (1과 5로 범위를_만든 것)에 있는 각 항목들을 숫자로 가져와 다음
+            숫자를 출력한다.
+        문단을 반복한다.
+        """
+        bytecode, _, _ = self._compile_and_get_bytecode(code)
+        self.assertEqual([type(c) for c in bytecode[:4]],
+                         [LoadConst, LoadConst, RangePrepare, ForIter])
+        self.assertFalse(any(isinstance(c, ForInPrepare) for c in bytecode))
+
+    def test_inline_small_function(self):
+        """작은 전역 함수를 부르는 곳에 결과 식이 펼쳐지는지 테스트합니다."""
+        code = """
+        함수 두배는 가로 다음
+            결과 값은 가와 2를 곱한 것이 된다. 그리고 끝난다.
+        문단을 실행한다.
+        (21로 두배한 것)을 출력한다.
+        """
+        bytecode, const_pool, scope = self._compile_and_get_bytecode(code)
+        guard = [c for c in bytecode if isinstance(c, InlineGuard)]
+        self.assertEqual(len(guard), 1)
+        self.assertEqual(guard[0].slot, scope["두배"])
+        self.assertEqual(const_pool[guard[0].const_index].ast.ident, "두배")
+        start = bytecode.index(guard[0])
+        self.assertEqual([type(c) for c in bytecode[start:start + 7]],
+                         [InlineGuard, BindArgs, LoadGlobal, LoadConst,
+                          LoadGlobal, Call, Jmp])
+        slot = bytecode[start + 1].slots[0]
+        self.assertEqual(bytecode[start + 2].index, slot)
+        # 함수가 다시 묶였을 때 쓰는 보통 호출
+        self.assertEqual(guard[0].ip, start + 7)
+        self.assertEqual([type(c) for c in bytecode[start + 7:start + 9]],
+                         [LoadGlobal, Call])
+        self.assertEqual(bytecode[start + 6].ip, start + 9)
+
+    def test_inline_skips(self):
+        """재귀 함수, 큰 함수, 매개변수 개수가 다른 호출은 펼치지 않는지 테스트합니다."""
+        cases = [
+            """함수 셈은 가로 다음
+                결과 값은 (가로 셈한 것)이 된다. 그리고 끝난다.
+            문단을 실행한다.
+            (1로 셈한 것)을 출력한다.""",
+            """함수 셈은 가로 다음
+                변수는 가가 된다.
+                결과 값은 변수가 된다. 그리고 끝난다.
+            문단을 실행한다.
+            (1로 셈한 것)을 출력한다.""",
+            """함수 셈은 가로 다음
+                결과 값은 """ + "(1과 " * 16 + "가" + "를 더한 것)" * 16 + """이 된다. 그리고 끝난다.
+            문단을 실행한다.
+            (1로 셈한 것)을 출력한다.""",
+            """함수 셈은 가와 나로 다음
+                결과 값은 가가 된다. 그리고 끝난다.
+            문단을 실행한다.
+            (1로 셈한 것)을 출력한다.""",
+        ]
+        for code in cases:
+            with self.subTest(code=code):
+                bytecode, _, _ = self._compile_and_get_bytecode(code)
+                self.assertFalse(any(isinstance(c, InlineGuard)
+                                     for c in bytecode))
+
+    def test_inline_in_function(self):
+        """함수 안에서는 지역 슬롯을 쓰고, 같은 이름의 지역 변수는 펼치지 않는지 테스트합니다."""
+        code = """
+        함수 두배는 가로 다음
+            결과 값은 가와 2를 곱한 것이 된다. 그리고 끝난다.
+        문단을 실행한다.
+        함수 네배는 가로 다음
+            결과 값은 (가로 두배한 것)으로 두배한 것이 된다. 그리고 끝난다.
+        문단을 실행한다.
+        함수 다른셈은 두배로 다음
+            결과 값은 (1로 두배한 것)이 된다. 그리고 끝난다.
+        문단을 실행한다.
+        """
+        _, const_pool, _ = self._compile_and_get_bytecode(code)
+        funcs = [c for c in const_pool if isinstance(c, Func)]
+        for func in funcs:
+            Compiler.compile_func(func, const_pool)
+        quad, other = funcs[1], funcs[2]
+        binds = [c for c in quad.code if isinstance(c, BindArgs)]
+        self.assertEqual(len(binds), 2)
+        self.assertTrue(all(slot >= len(quad.args)
+                            for c in binds for slot in c.slots))
+        self.assertLessEqual(max(slot for c in binds for slot in c.slots),
+                             quad.local_count - 1)
+        self.assertFalse(any(isinstance(c, InlineGuard) for c in other.code))
+
+    def test_tail_call(self):
+        """결과로 바로 돌려주는 호출만 TailCall이 되는지 테스트합니다."""
+        code = """
+        함수 합을_구한다는 남은수와 합으로 다음
+            만약 남은수가 0이랑 같다면 다음
+                결과 값은 합이 된다. 그리고 끝난다.
+            문단을 실행한다.
+            결과 값은 (남은수와 1을 뺀 것)과 (합과 남은수를 더한 것)으로 합을_구한 것이 된다.
+            그리고 끝난다.
+        문단을 실행한다.
+        """
+        _, const_pool, _ = self._compile_and_get_bytecode(code)
+        func = [c for c in const_pool if isinstance(c, Func)][-1]
+        Compiler.compile_func(func, const_pool)
+        tail = [c for c in func.code if isinstance(c, TailCall)]
+        self.assertEqual(len(tail), 1)
+        self.assertEqual(tail[0].param_count, 2)
+        # 인자를 계산하는 호출은 보통 호출
+        self.assertEqual(sum(type(c) is Call for c in func.code), 2)
 
     def test_function_definition(self):
         """함수 정의가 올바르게 컴파일되는지 테스트합니다."""
@@ -352,7 +530,7 @@ class TestCompiler(unittest.TestCase):
         self.assertIsInstance(bytecode[0], LoadConstPool)
         func_obj = const_pool[bytecode[0].const_index]
         self.assertIsInstance(func_obj, Func)
-        self.assertEqual(func_obj.code.ident, "더")
+        self.assertEqual(func_obj.ast.ident, "더")
         self.assertIsInstance(bytecode[1], StoreGlobal)
         self.assertEqual(bytecode[1].index, scope["더"])
 
@@ -393,7 +571,7 @@ class TestCompiler(unittest.TestCase):
         # 함수 정의 부분
         self.assertIsInstance(bytecode[0], LoadConstPool)
         self.assertIsInstance(const_pool[bytecode[0].const_index], Func)
-        self.assertEqual(const_pool[bytecode[0].const_index].code.ident, "출력")
+        self.assertEqual(const_pool[bytecode[0].const_index].ast.ident, "출력")
         self.assertIsInstance(bytecode[1], StoreGlobal)
         self.assertEqual(bytecode[1].index, scope["출력"])
         # 함수 호출 부분
@@ -420,7 +598,7 @@ class TestCompiler(unittest.TestCase):
         # 함수 정의 부분
         self.assertIsInstance(bytecode[0], LoadConstPool)
         self.assertIsInstance(const_pool[bytecode[0].const_index], Func)
-        self.assertEqual(const_pool[bytecode[0].const_index].code.ident, "더")
+        self.assertEqual(const_pool[bytecode[0].const_index].ast.ident, "더")
         self.assertIsInstance(bytecode[1], StoreGlobal)
         self.assertEqual(bytecode[1].index, scope["더"])
         # 함수 호출 부분
@@ -435,12 +613,13 @@ class TestCompiler(unittest.TestCase):
 
     def test_dict_literal(self):
         """딕셔너리 리터럴이 올바르게 컴파일되는지 테스트합니다."""
-        code = '{"키"는 "값" 또 1은 2}.'
-        bytecode, _, _ = self._compile_and_get_bytecode(code)
+        code = '가는 2가 된다. {"키"는 "값" 또 1은 가}.'
+        bytecode, _, scope = self._compile_and_get_bytecode(code)
+        bytecode = bytecode[2:] # 가에 대입하는 코드는 건너뜀
         # LoadConst("키")
         # LoadConst("값")
         # LoadConst(1)
-        # LoadConst(2)
+        # LoadGlobal(index_of_가) (값이 모두 상수면 LoadConstCopy 하나가 됨)
         # BuildDict(2)
         # Pop()
         self.assertEqual(len(bytecode), 6)
@@ -450,12 +629,43 @@ class TestCompiler(unittest.TestCase):
         self.assertEqual(bytecode[1].const, "값")
         self.assertIsInstance(bytecode[2], LoadConst)
         self.assertEqual(bytecode[2].const, 1)
-        self.assertIsInstance(bytecode[3], LoadConst)
-        self.assertEqual(bytecode[3].const, 2)
+        self.assertIsInstance(bytecode[3], LoadGlobal)
+        self.assertEqual(bytecode[3].index, scope["가"])
         self.assertIsInstance(bytecode[4], BuildDict) # 수정된 BuildStruct
         self.assertEqual(bytecode[4].key_value_len, 2)
         self.assertIsInstance(bytecode[5], Pop)
 
+    def test_constant_array_and_dict(self):
+        """원소가 모두 상수인 배열과 사전이 LoadConstCopy 하나가 되는지 테스트합니다."""
+        code = '[(1과 2를 더한 것) 다음 "둘" 다음 1]. {"키"는 "값" 또 1은 2}. [].'
+        bytecode, _, _ = self._compile_and_get_bytecode(code)
+        self.assertEqual([type(c) for c in bytecode],
+                         [LoadConstCopy, Pop, LoadConstCopy, Pop, LoadConstCopy, Pop])
+        self.assertEqual(bytecode[0].const, [3, "둘", 1])
+        # BuildDict와 같은 순서로 넣음
+        self.assertEqual(list(bytecode[2].const.items()), [(1, 2), ("키", "값")])
+        self.assertEqual(bytecode[4].const, [])
+
+    def test_constants_interned(self):
+        """같은 리터럴은 함수가 달라도 상수 풀의 같은 객체를 쓰는지 테스트합니다."""
+        code = """
+        가는 "같은 문자열"이 된다.
+        나는 [1 다음 2]가 된다.
+        함수 읽는다는 다음
+            목록은 [1 다음 2]가 된다.
+            결과 값은 "같은 문자열"이 된다. 그리고 끝난다.
+        문단을 실행한다.
+        """
+        bytecode, const_pool, _ = self._compile_and_get_bytecode(code)
+        func = [c for c in const_pool if isinstance(c, Func)][-1]
+        Compiler.compile_func(func, const_pool)
+        self.assertIs(func.code[0].const, bytecode[2].const)
+        self.assertIs(func.code[2].const, bytecode[0].const)
+        self.assertEqual(sum(1 for c in const_pool if c == "같은 문자열"), 1)
+        # 1, 1.0, 참은 서로 다른 상수로 남아야 함
+        bytecode, _, _ = self._compile_and_get_bytecode("(1). (1.0). 참.")
+        self.assertEqual([type(c.const) for c in bytecode[::2]], [int, float, bool])
+
     def test_return_statement(self):
         """return 문이 올바르게 컴파일되는지 테스트합니다."""
         code = """
@@ -543,10 +753,294 @@ class TestCompiler(unittest.TestCase):
         self.assertIsInstance(class_obj, Class)
         self.assertEqual(class_obj.var, {"이름": None})
         self.assertEqual(len(class_obj.funcs), 1)
-        self.assertEqual(class_obj.funcs["소리를_낸"].code.ident, "소리를_낸")
+        self.assertEqual(class_obj.funcs["소리를_낸"].ast.ident, "소리를_낸")
         self.assertIsInstance(bytecode[1], StoreGlobal)
         self.assertEqual(bytecode[1].index, scope["동물"])
 
+    def test_deeply_nested_expression(self):
+        """재귀 한도보다 깊게 중첩된 식도 컴파일되는지 테스트합니다."""
+        depth = sys.getrecursionlimit() * 2
+        # 가장 안쪽에 변수를 두어 상수 접기가 되지 않도록 함
+        code = "가는 " + "(1과 " * depth + "가" + "를 더한 것)" * depth + "이 된다."
+        bytecode, _, _ = self._compile_and_get_bytecode(code)
+        self.assertEqual(len(bytecode), depth * 3 + 2)
+        self.assertIsInstance(bytecode[-1], StoreGlobal)
+
+    def test_fold_deeply_nested_constants(self):
+        """깊게 중첩된 상수 식도 상수 하나로 접히는지 테스트합니다."""
+        depth = sys.getrecursionlimit() * 2
+        code = "가는 " + "(1과 " * depth + "1" + "을 더한 것)" * depth + "이 된다."
+        bytecode, _, _ = self._compile_and_get_bytecode(code)
+        self.assertEqual(len(bytecode), 2)
+        self.assertEqual(bytecode[0].const, depth + 1)
+
+    def test_fold_builtin_call(self):
+        """상수 인자로 부른 순수 내장 함수가 LoadConst 하나로 접히는지 테스트합니다."""
+        cases = [
+            ("1과 2를 더한 것.", 3),
+            ("0b0101과 0b1100을 논리곱한 것.", 0b0100),
+            ("7을 2로 나눈 것.", 3),
+            ("7.0을 2로 나눈 것.", 3.5),
+            ("255를 정수_16진수로_변환한 것.", "0xff"),
+            ("1이 2보다 작다.", True),
+            ("참 그리고 (1이 1이랑 같다).", True),
+            ("거짓 또는 없음.", False),
+        ]
+        for code, expected in cases:
+            with self.subTest(code=code):
+                bytecode, _, _ = self._compile_and_get_bytecode(code)
+                self.assertEqual(len(bytecode), 2)
+                self.assertIsInstance(bytecode[0], LoadConst)
+                self.assertEqual(bytecode[0].const, expected)
+                self.assertIs(type(bytecode[0].const), type(expected))
+
+    def test_fold_skips_rebound_builtin(self):
+        """내장 함수 이름이 다시 묶이면 접지 않는지 테스트합니다."""
+        code = """
+        1과 2를 더한 것.
+        더는 "다른 값"이 된다.
+        """
+        bytecode, _, _ = self._compile_and_get_bytecode(code)
+        self.assertIsInstance(bytecode[2], LoadGlobal)
+        self.assertIsInstance(bytecode[3], Call)
+
+    def test_fold_skips_runtime_error(self):
+        """계산하면 에러가 나는 식은 실행할 때 에러가 나도록 그대로 두는지 테스트합니다."""
+        bytecode, _, _ = self._compile_and_get_bytecode("1을 0으로 나눈 것.")
+        self.assertIsInstance(bytecode[-2], Call)
+
+    def test_fold_in_function_respects_params(self):
+        """함수 매개변수가 내장 함수 이름을 가리면 접지 않는지 테스트합니다."""
+        code = """
+        함수 계산한다는 더로 다음
+            결과 값은 1과 2를 더한 것이 된다. 그리고 끝난다.
+        문단을 실행한다.
+        함수 셈한다는 가로 다음
+            결과 값은 1과 2를 더한 것이 된다. 그리고 끝난다.
+        문단을 실행한다.
+        """
+        _, const_pool, _ = self._compile_and_get_bytecode(code)
+        shadowed, plain = [c for c in const_pool if isinstance(c, Func)][-2:]
+        Compiler.compile_func(shadowed, const_pool)
+        Compiler.compile_func(plain, const_pool)
+        self.assertIsInstance(shadowed.code[2], LoadLocal)
+        self.assertIsInstance(plain.code[0], LoadConst)
+        self.assertEqual(plain.code[0].const, 3)
+
+    def test_peephole_call_statement(self):
+        """호출문 뒤에 값을 넣고 바로 버리는 코드가 사라지는지 테스트합니다."""
+        code = '"안녕"을 출력한다.'
+        bytecode, _, _ = self._compile_and_get_bytecode(code, peephole=True)
+        self.assertEqual([type(c) for c in bytecode],
+                         [LoadConst, LoadGlobal, Call, Pop])
+
+    def test_peephole_condition_diamond(self):
+        """조건문에 쓴 그리고의 참/거짓 분기가 조건 점프로 바로 이어지는지 테스트합니다."""
+        code = """
+        가는 1이 된다.
+        만약 가가 1이랑 같다 그리고 가가 2보다 작다면 다음
+            가는 3이 된다.
+        문단을 실행한다.
+        """
+        bytecode, _, _ = self._compile_and_get_bytecode(code, peephole=True)
+        jumps = [c for c in bytecode if isinstance(c, JumpCode)]
+        self.assertEqual([type(c) for c in jumps], [JmpIfFalse, JmpIfFalse])
+        self.assertTrue(all(c.ip == len(bytecode) for c in jumps))
+        self.assertFalse(any(isinstance(c, LoadConst) and c.const is False
+                             for c in bytecode))
+
+    def test_peephole_constant_condition(self):
+        """상수 조건 분기와 도달할 수 없는 코드가 사라지는지 테스트합니다."""
+        code = """
+        만약 1이 2보다 크다면 다음
+            1을 출력한다.
+        문단을 실행한다.
+        아니면 다음
+            2를 출력한다.
+        문단을 실행한다.
+        """
+        bytecode, _, _ = self._compile_and_get_bytecode(code, peephole=True)
+        self.assertEqual([c.const for c in bytecode if isinstance(c, LoadConst)],
+                         [2])
+        self.assertFalse(any(isinstance(c, JumpCode) for c in bytecode))
+
+    def test_peephole_keeps_loop(self):
+        """반복문의 점프가 새 위치로 다시 묶이는지 테스트합니다."""
+        code = """
+        가는 1이 된다.
+        계속 가가 3보다 작다인 동안 다음
+            가는 가와 2를 곱한 것이 된다.
+        문단을 반복한다.
+        """
+        bytecode, _, scope = self._compile_and_get_bytecode(code, peephole=True)
+        jumps = [c for c in bytecode if isinstance(c, JumpCode)]
+        self.assertEqual([type(c) for c in jumps], [JmpIfFalse, Jmp])
+        self.assertEqual(jumps[0].ip, len(bytecode))
+        self.assertEqual(jumps[1].ip, 2)
+
+    def test_peephole_function_unreachable(self):
+        """함수에서 결과를 돌려준 뒤의 코드가 사라지는지 테스트합니다."""
+        code = """
+        함수 셈한다는 가로 다음
+            결과 값은 가가 된다. 그리고 끝난다.
+        문단을 실행한다.
+        """
+        _, const_pool, _ = self._compile_and_get_bytecode(code)
+        func = [c for c in const_pool if isinstance(c, Func)][-1]
+        Compiler.compile_func(func, const_pool)
+        self.assertEqual([type(c) for c in func.code], [LoadLocal, Ret])
+
+    def _compile_func(self, code: str, opt_level: int) -> Func:
+        ast = Parser(Lexer(code)).parse()
+        compiler = Compiler(opt_level=opt_level)
+        compiler.compile_main(ast)
+        func = [c for c in compiler.const_pool if isinstance(c, Func)][-1]
+        Compiler.compile_func(func, compiler.const_pool)
+        return func
+
+    def test_opt_level_0_no_folding(self):
+        """-O0에서는 상수 식을 접지 않고 방문 함수가 만든 코드를 그대로 쓰는지 테스트합니다."""
+        code = "1과 2를 더한 것을 출력한다."
+        ast = Parser(Lexer(code)).parse()
+        compiler = Compiler(opt_level=0)
+        compiler.compile_main(ast)
+        self.assertEqual([type(c) for c in compiler.bytecode],
+                         [LoadConst, LoadConst, LoadGlobal, Call,
+                          LoadGlobal, Call, Pop, LoadConst, Pop])
+
+    def test_opt_level_2_function(self):
+        """-O2에서 함수의 지역 변수 복사가 전파되고 쓰이지 않는 저장이 사라지는지 테스트합니다."""
+        code = """
+        함수 셈한다는 가로 다음
+            앞변수는 가와 1을 더한 것이 된다.
+            뒤변수는 앞변수가 된다.
+            쓸모없는변수는 3이 된다.
+            결과 값은 뒤변수가 된다. 그리고 끝난다.
+        문단을 실행한다.
+        """
+        self.assertEqual(len(self._compile_func(code, 1).code), 11)
+        func = self._compile_func(code, 2)
+        self.assertEqual([type(c) for c in func.code],
+                         [LoadLocal, LoadConst, LoadGlobal, Call,
+                          StoreLocal, LoadLocal, Ret])
+        self.assertEqual(func.code[5].index, func.code[4].index)
+
+    def test_opt_level_2_keeps_parameter_copy(self):
+        """매개변수는 유형이 들어 있을 수 있으므로 복사 전파하지 않는지 테스트합니다."""
+        code = """
+        함수 셈한다는 가로 다음
+            뒤변수는 가가 된다.
+            결과 값은 뒤변수가 된다. 그리고 끝난다.
+        문단을 실행한다.
+        """
+        func = self._compile_func(code, 2)
+        self.assertEqual([type(c) for c in func.code],
+                         [LoadLocal, StoreLocal, LoadLocal, Ret])
+        self.assertEqual(func.code[2].index, func.code[1].index)
+
+    def test_ir_remove_unreachable(self):
+        """도달할 수 없는 블록이 사라지고 점프가 새 위치로 묶이는지 테스트합니다."""
+        code = [Jmp(3), LoadConst(1), Pop(), LoadConst(2), Pop()]
+        result = ir.optimize(code)
+        self.assertEqual([type(c) for c in result], [Jmp, LoadConst, Pop])
+        self.assertEqual(result[0].ip, 1)
+        self.assertEqual(result[1].const, 2)
+
+    def test_ir_loop_liveness(self):
+        """반복문에서 다음 바퀴에 읽히는 변수의 저장은 지우지 않는지 테스트합니다."""
+        code = """
+        함수 셈한다는 가로 다음
+            합은 0이 된다.
+            계속 가가 0보다 크다인 동안 다음
+                가는 가와 1을 뺀 것이 된다.
+                합은 합과 가를 더한 것이 된다.
+            문단을 반복한다.
+            결과 값은 합이 된다. 그리고 끝난다.
+        문단을 실행한다.
+        """
+        self.assertEqual(repr(self._compile_func(code, 2).code),
+                         repr(self._compile_func(code, 1).code))
+
+    def test_functions_share_scope(self):
+        """함수마다 전역 스코프를 복사하지 않고 같은 스코프를 가리키는지 테스트합니다."""
+        code = """
+        함수 하나는 가로 다음
+            결과 값은 가가 된다. 그리고 끝난다.
+        문단을 실행한다.
+        함수 둘은 가로 다음
+            결과 값은 가가 된다. 그리고 끝난다.
+        문단을 실행한다.
+        """
+        lexer = Lexer(code)
+        compiler = Compiler()
+        compiler.compile_main(Parser(lexer).parse())
+        funcs = [c for c in compiler.const_pool if isinstance(c, Func)][-2:]
+        self.assertIs(funcs[0].current_scope, compiler.scope)
+        self.assertIs(funcs[1].current_scope, compiler.scope)
+
+    def test_function_sees_later_global(self):
+        """함수 정의 뒤에 생긴 전역 변수도 함수를 컴파일할 때 찾는지 테스트합니다."""
+        code = """
+        함수 읽는다는 가로 다음
+            결과 값은 뒤변수가 된다. 그리고 끝난다.
+        문단을 실행한다.
+        뒤변수는 7이 된다.
+        """
+        _, const_pool, scope = self._compile_and_get_bytecode(code)
+        func = [c for c in const_pool if isinstance(c, Func)][-1]
+        Compiler.compile_func(func, const_pool)
+        self.assertIsInstance(func.code[0], LoadGlobal)
+        self.assertEqual(func.code[0].index, scope["뒤변수"])
+
+    def test_compiler_defaults_not_shared(self):
+        """Compiler를 새로 만들 때마다 상수 풀과 유형 스코프도 새로 만드는지 테스트합니다."""
+        first, second = Compiler(), Compiler()
+        self.assertIsNot(first.const_pool, second.const_pool)
+        self.assertIsNot(first.class_scope, second.class_scope)
+
+
+class TestCompilationSession(unittest.TestCase):
+
+    CODE = """함수 두배는 가로 다음
+    결과 값은 가와 2를 곱한 것이 된다. 그리고 끝난다.
+문단을 실행한다.
+
+유형 상자는 다음
+    변수 내용이 있다.
+값을 가진다.
+
+21로 두배한 것을 출력한다.
+"""
+
+    def test_session_compile(self):
+        """세션이 상수 풀, 유형 스코프, 전역 슬롯을 가지고 다시 컴파일할 때 비우는지 테스트합니다."""
+        session = CompilationSession()
+        global_count, const_pool, bytecode = session.compile_source(self.CODE)
+        self.assertIs(const_pool, session.const_pool)
+        self.assertEqual(sum(1 for c in const_pool if isinstance(c, Func)), 1)
+        self.assertIn("상자", session.class_scope)
+        self.assertIn("두배", session.global_scope)
+        self.assertEqual(global_count, session.global_count)
+
+        session.compile_source("가는 1이 된다.")
+        self.assertEqual(session.const_pool, [1])
+        self.assertEqual(session.class_scope, {})
+        self.assertNotIn("두배", session.global_scope)
+        self.assertIsNot(session.const_pool, const_pool)
+
+    def test_session_soak(self):
+        """같은 세션으로 여러 번 컴파일해도 상수 풀이 늘지 않고 이전 상수 풀을 놓아주는지 테스트합니다.
+        10000번 돌리며 RSS를 재는 긴 버전은 bench/session_soak.py에 있습니다."""
+        session = CompilationSession()
+        session.compile_source(self.CODE)
+        pool_size = len(session.const_pool)
+        old_pool = weakref.ref(session.const_pool)
+        for _ in range(100):
+            session.compile_source(self.CODE)
+            self.assertEqual(len(session.const_pool), pool_size)
+        gc.collect()
+        self.assertIsNone(old_pool())
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -5,8 +5,10 @@ import os
 # 프로젝트 루트를 sys.path에 추가하여 '콜' 패키지를 임포트할 수 있도록 함
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from 콜.lexer import Lexer
-from 콜.token import Token, TokenKind
+import io
+from 콜.lexer import Lexer, WordCache, StreamLexer
+from 콜.tokenstream import TokenStream
+from 콜.token import Token, TokenKind, SuffixTrie
 
 class TestLexer(unittest.TestCase):
 
@@ -31,6 +33,24 @@ class TestLexer(unittest.TestCase):
         self._assert_tokens('"안녕 세상"', [Token(TokenKind.STRING, "안녕 세상")])
         self._assert_tokens("'작은따옴표'", [Token(TokenKind.STRING, "작은따옴표")])
 
+    def test_escaped_string(self):
+        self._assert_tokens('"따옴표\\"안"', [Token(TokenKind.STRING, '따옴표\\"안')])
+        with self.assertRaises(Exception):
+            Lexer('"안 끝남')
+        with self.assertRaises(Exception):
+            Lexer('"줄\n바꿈"')
+
+    def test_many_comments(self):
+        code = "주석 한 줄\n" * 3000 + "나이는 10이다."
+        expected = [
+            Token(TokenKind.IDENTIFIER, "나이"),
+            Token(TokenKind.EUN),
+            Token(TokenKind.NUMBER, "10"),
+            Token(TokenKind.DA),
+            Token(TokenKind.DOT)
+        ]
+        self._assert_tokens(code, expected)
+
     def test_identifier_and_keywords(self):
         self._assert_tokens("변수이름", [Token(TokenKind.IDENTIFIER, "변수이름")])
         self._assert_tokens("만약 참이면", [
@@ -104,6 +124,123 @@ class TestLexer(unittest.TestCase):
             with self.subTest(code=code):
                 self._assert_tokens(code, expected)
 
+    def test_suffix_trie(self):
+        self.assertEqual(Token.POST_TRIE.longest_suffix("사과이라면"),
+                         (3, TokenKind.THEN))
+        self.assertEqual(Token.POST_TRIE.longest_suffix("그리고"),
+                         (3, TokenKind.AND))
+        self.assertEqual(Token.MIDDLE_TRIE.longest_suffix("출력"),
+                         (0, TokenKind.UNDEFINED))
+        trie = SuffixTrie({"다": TokenKind.DA, "이다": TokenKind.DA})
+        self.assertEqual(trie.longest_suffix("것이다"), (2, TokenKind.DA))
+        self.assertEqual(trie.longest_suffix(""), (0, TokenKind.UNDEFINED))
+
+    def test_word_cache(self):
+        cache = WordCache()
+        lexer = Lexer("가를 출력한다. 가를 출력한다.", cache)
+        while lexer.current_token().kind != TokenKind.ENDOFFILE:
+            lexer.advance_token()
+        self.assertEqual(cache.misses, 5) # 가를, 를, 출력한다., 한다., .
+        self.assertEqual(cache.hits, 5)
+
+        # 다른 Lexer와 캐시를 공유
+        lexer = Lexer("가를", cache)
+        lexer.advance_token()
+        self.assertEqual(cache.hits, 7)
+        self.assertEqual(cache.misses, 5)
+
+    def test_word_cache_eviction(self):
+        cache = WordCache(maxsize=2)
+        cache.put("가", (TokenKind.IDENTIFIER, "가", 1))
+        cache.put("나", (TokenKind.IDENTIFIER, "나", 1))
+        cache.get("가")
+        cache.put("다", (TokenKind.IDENTIFIER, "다", 1))
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("나"))
+        self.assertIsNotNone(cache.get("가"))
+
+    def test_token_stream(self):
+        code = '주석 설명\n가는 "문자"와 0x1F를 더한 것이 된다.'
+        stream = TokenStream(code)
+        lexer = Lexer(code)
+        i = 0
+        while lexer.current_token().kind != TokenKind.ENDOFFILE:
+            self.assertEqual(stream.kind_at(i), lexer.current_kind())
+            self.assertEqual(repr(stream.token_at(i)), repr(lexer.current_token()))
+            self.assertEqual(stream.span_at(i), lexer.current_span())
+            lexer.advance_token()
+            i += 1
+        self.assertEqual(len(stream), i + 1)
+        self.assertEqual(stream.peek_kind(100), TokenKind.ENDOFFILE)
+
+        self.assertEqual(stream.current_value(), "가")
+        self.assertEqual(code[slice(*stream.current_span())], "가")
+        stream.advance_kind()
+        stream.advance_kind()
+        self.assertEqual(stream.current_value(), "문자")
+        self.assertEqual(code[slice(*stream.current_span())], '"문자"')
+        self.assertEqual(stream.peek_kind(2), TokenKind.HEX)
+        stream.advance_kind()
+        stream.advance_kind()
+        self.assertEqual(stream.current_value(), 31)
+
+    def test_token_stream_same_as_lexer(self):
+        """TokenStream이 직접 스캔한 토큰이 Lexer의 토큰과 같은지 테스트합니다."""
+        code = ("주석 시작\n여러 줄 주석\n주석 끝\n"
+                "가는 0o17과 0b101과 1.5와 -3을 더한 것이 된다.\n"
+                "나는 '따옴\\'표'이다. 다는 \"\"이다. 라는 [1 2]이다.")
+        stream = TokenStream(code)
+        lexer = Lexer(code)
+        i = 0
+        while True:
+            stream.index = i
+            self.assertEqual(repr(stream.current_token()), repr(lexer.current_token()))
+            self.assertEqual(stream.current_span(), lexer.current_span())
+            if lexer.current_kind() == TokenKind.ENDOFFILE:
+                break
+            self.assertEqual(stream.current_value(), lexer.current_value())
+            lexer.advance_token()
+            i += 1
+        self.assertEqual(len(stream), i + 1)
+
+        for code in ['가는 "문자', '주석 시작 끝이 없음', '가는 0x이다.', '가는 +']:
+            with self.subTest(code=code):
+                with self.assertRaises(Exception) as expected:
+                    lexer = Lexer(code)
+                    while lexer.advance_kind() != TokenKind.ENDOFFILE:
+                        pass
+                with self.assertRaises(Exception) as actual:
+                    TokenStream(code)
+                self.assertEqual(str(actual.exception), str(expected.exception))
+
+    def test_stream_lexer(self):
+        code = ("주석 시작\n" + "긴 주석 " * 50 + "\n주석 끝\n"
+                "가는 \"" + "문자열" * 20 + "\"이다.\n"
+                "주석 한 줄\n나는 0x1F와 12.5를 더한 것이 된다.")
+        expected = []
+        lexer = Lexer(code)
+        while lexer.current_token().kind != TokenKind.ENDOFFILE:
+            expected.append((repr(lexer.current_token()), lexer.current_span()))
+            lexer.advance_token()
+
+        for chunk_size in [1, 3, 16]:
+            for file in [io.StringIO(code), io.BytesIO(code.encode())]:
+                with self.subTest(chunk_size=chunk_size, file=type(file)):
+                    lexer = StreamLexer(file, chunk_size=chunk_size)
+                    actual = []
+                    while lexer.current_token().kind != TokenKind.ENDOFFILE:
+                        actual.append((repr(lexer.current_token()),
+                                       lexer.current_span()))
+                        self.assertLessEqual(len(lexer.src), chunk_size * 2 + 400)
+                        lexer.advance_token()
+                    self.assertEqual(actual, expected)
+
+    def test_stream_lexer_unclosed_comment(self):
+        with self.assertRaises(Exception):
+            lexer = StreamLexer(io.StringIO("주석 시작 " + "가" * 100), chunk_size=4)
+            while lexer.current_token().kind != TokenKind.ENDOFFILE:
+                lexer.advance_token()
+
     def test_combined_tokens(self):
             # 식별자와 조사가 합쳐진 경우
             self._assert_tokens("가는", [
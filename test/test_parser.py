@@ -7,8 +7,35 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 from 콜.token import TokenKind
 from 콜.lexer import Lexer
+from 콜.tokenstream import TokenStream
+from 콜.parallel import split_points, parse_parallel
 from 콜.parser import Parser
+from 콜.session import CompilationSession
+from 콜.cli import parse_file
 from 콜.ast import *
+import tempfile
+
+SAMPLE_PROGRAM = """
+구조 점은 다음
+    변수 가로가 있다.
+    변수 세로가 있다.
+값을 가진다.
+
+함수 팩토리얼을_구한다는 가로 다음
+    만약 가가 0이랑 같다면 다음
+        결과 값은 1이 된다. 그리고 끝난다.
+    문단을 실행한다.
+    결과 값은 가와 ((가를 1로 뺀 것)으로 팩토리얼을_구한 것)을 곱한 것이 된다.
+    그리고 끝난다.
+문단을 실행한다.
+
+주석 시작 여러 줄
+주석 끝
+목록은 [1 다음 2 다음 3]이 된다.
+목록에 있는 각 항목들을 항목으로 가져와 다음
+    항목으로 팩토리얼을_구한 것을 출력한다.
+문단을 반복한다.
+"""
 
 class TestParser(unittest.TestCase):
 
@@ -256,6 +283,114 @@ class TestParser(unittest.TestCase):
         self.assertIsInstance(expr2.params[0], IntegerAST)
         self.assertIsInstance(expr2.params[1], IntegerAST)
 
+    def test_token_stream_parse(self):
+        """TokenStream으로 파싱한 결과가 Lexer로 파싱한 결과와 같은지 테스트합니다."""
+        expected = Parser(Lexer(SAMPLE_PROGRAM)).parse()
+        actual = Parser(TokenStream(SAMPLE_PROGRAM)).parse()
+        self.assertEqual(repr(actual), repr(expected))
+
+    def test_split_points(self):
+        """최상위 문장 경계만 나누는 위치로 찾는지 테스트합니다."""
+        code = ('가는 1이 된다. "문자. 안"을 출력한다.\n'
+                '만약 참이면 다음\n    나는 2.5가 된다.\n문단을 실행한다.\n'
+                '아니면 다음\n    나는 3이 된다.\n문단을 실행한다.\n'
+                '주석 설명.\n[1 다음 2].')
+        points = split_points(code)
+        self.assertEqual(len(points), 3)
+        self.assertTrue(code[:points[0]].endswith("1이 된다."))
+        self.assertTrue(code[:points[1]].endswith("출력한다."))
+        self.assertTrue(code[:points[2]].endswith("3이 된다.\n문단을 실행한다."))
+
+    def test_parse_parallel(self):
+        """병렬로 파싱한 결과가 순차 파싱 결과와 같은지 테스트합니다."""
+        code = SAMPLE_PROGRAM * 3
+        expected = Parser(Lexer(code)).parse()
+        actual = parse_parallel(code, max_workers=2, chunk_count=4)
+        self.assertEqual(repr(actual), repr(expected))
+
+    def test_parse_parallel_lazy(self):
+        """병렬 파싱에서도 지연 파싱을 고르면 함수 본문을 나중에 파싱하는지 테스트합니다."""
+        code = SAMPLE_PROGRAM * 3
+        expected = Parser(Lexer(code)).parse()
+        actual = parse_parallel(code, max_workers=2, chunk_count=4, lazy=True)
+        funcs = [stmt for stmt in actual.body.stmts if isinstance(stmt, FuncAST)]
+        self.assertTrue(funcs)
+        self.assertFalse(any(func.is_body_parsed() for func in funcs))
+        self.assertEqual(repr(actual), repr(expected))
+
+    def test_lazy_function_body(self):
+        """지연 파싱 모드에서 함수 본문이 처음 접근할 때 파싱되는지 테스트합니다."""
+        program = Parser(TokenStream(SAMPLE_PROGRAM), lazy=True).parse()
+        func = program.body.stmts[1]
+        self.assertIsInstance(func, FuncAST)
+        self.assertFalse(func.is_body_parsed())
+        self.assertIsNotNone(func.body_range)
+
+        expected = Parser(Lexer(SAMPLE_PROGRAM)).parse()
+        self.assertEqual(repr(func.body), repr(expected.body.stmts[1].body))
+        self.assertTrue(func.is_body_parsed())
+
+    def test_lazy_function_body_error(self):
+        """지연 파싱된 함수 본문의 문법 에러는 본문을 파싱할 때 발생합니다."""
+        code = "함수 가는 다음\n    나는 1이 이 된다.\n문단을 실행한다.\n2를 출력한다."
+        program = Parser(TokenStream(code), lazy=True).parse()
+        self.assertEqual(len(program.body.stmts), 2)
+        with self.assertRaises(Exception):
+            program.body.stmts[0].body
+
+    def test_uncalled_function_syntax_error(self):
+        """기본 모드에서는 호출되지 않는 함수 본문의 문법 에러도 실행 전에 보고됩니다."""
+        code = "함수 안씀은 수로 다음\n    수를 를 를 출력한다 한다.\n문단을 실행한다.\n\"시작\"을 출력한다."
+        with self.assertRaisesRegex(Exception, "문법 에러"):
+            CompilationSession().compile_source(code)
+        with self.assertRaisesRegex(Exception, "문법 에러"):
+            CompilationSession(0).compile_source(code)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "안씀.콜")
+            with open(path, "w") as f:
+                f.write(code)
+            with self.assertRaisesRegex(Exception, "문법 에러"):
+                parse_file(path)
+            # 지연 파싱을 고르면 본문은 처음 컴파일할 때 파싱됨
+            program = parse_file(path, is_lazy=True)
+            self.assertFalse(program.body.stmts[0].is_body_parsed())
+
+    def test_ast_nodes_use_slots(self):
+        """AST 노드가 인스턴스 __dict__ 없이 만들어지는지 테스트합니다."""
+        program = Parser(Lexer(SAMPLE_PROGRAM)).parse()
+        for stmt in program.body.stmts:
+            self.assertFalse(hasattr(stmt, "__dict__"), type(stmt).__name__)
+        self.assertFalse(hasattr(IdentifierAST("가"), "__dict__"))
+
+    def test_call_params_not_shared(self):
+        """매개변수 없는 호출 노드들이 같은 리스트를 공유하지 않는지 테스트합니다."""
+        first = CallExprAST(IdentifierAST("가"))
+        second = CallExprAST(IdentifierAST("나"))
+        first.params.append(IntegerAST(1))
+        self.assertEqual(second.params, [])
+        self.assertIsNot(ArrayAST().elems, ArrayAST().elems)
+
+    def test_deeply_nested_expression(self):
+        """재귀 한도보다 깊게 중첩된 식도 파싱되는지 테스트합니다."""
+        depth = sys.getrecursionlimit() * 2
+        expr = self._parse_and_get_expr("(" * depth + "1" + ")" * depth)
+        self.assertIsInstance(expr, IntegerAST)
+
+        expr = self._parse_and_get_expr("[" * depth + "]" * depth)
+        for _ in range(depth - 1):
+            self.assertIsInstance(expr, ArrayAST)
+            expr = expr.elems[0]
+        self.assertEqual(expr.elems, [])
+
+    def test_long_parameter_chain(self):
+        """와/과로 길게 이어진 매개변수가 모두 한 호출의 매개변수가 되는지 테스트합니다."""
+        expr = self._parse_and_get_expr("가와 " * 500 + "(1과 2를 더한 것)으로 함수한 것")
+        self.assertIsInstance(expr, CallExprAST)
+        self.assertEqual(expr.callee.ident, "함수")
+        self.assertEqual(len(expr.params), 501)
+        self.assertIsInstance(expr.params[-1], CallExprAST)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -9,7 +9,40 @@ from 콜.lexer import Lexer
 from 콜.parser import Parser
 from 콜.compiler import Compiler
 from 콜.vm import VM
+from 콜.fastvm import FastVM
+from 콜.opcode import assemble, disassemble, INST_SIZE, FOR_ITER, END
 from 콜.func import Func
+from 콜.tokenstream import TokenStream
+from 콜 import cache, cli
+from 콜.aot import compile_ahead, MIN_PARALLEL_FUNCS
+from 콜.struct import Class
+from 콜.session import CompilationSession
+from 콜.bytecode import LoadLocal, Ret, ForIter, LoadMethod
+import io
+import pickle
+import tempfile
+import contextlib
+import unittest.mock
+
+
+def run_program(code: str|tuple, vm_class=VM, opt_level: int|None = None,
+                stdin: str = "") -> tuple[VM, str]:
+    """
+    '콜' 코드(또는 이미 컴파일한 프로그램)를 vm_class로 실행하고
+    (VM 인스턴스, 출력)을 반환합니다.
+    """
+    if isinstance(code, str):
+        program = CompilationSession(opt_level).compile_source(code)
+    else:
+        program = code
+    vm = vm_class(*program)
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        with unittest.mock.patch('sys.stdin', io.StringIO(stdin)):
+            # 종료하기 함수를 부르는 예제도 그 전까지의 출력을 비교함
+            with contextlib.suppress(SystemExit):
+                vm.run()
+    return vm, out.getvalue()
 
 class TestVM(unittest.TestCase):
 
@@ -116,5 +149,783 @@ class TestVM(unittest.TestCase):
         """
         self._run_code(code, expected_stack_top=200)
 
+class TestCache(unittest.TestCase):
+
+    CODE = """함수 두배는 가로 다음
+    결과 값은 가와 2를 곱한 것이 된다. 그리고 끝난다.
+문단을 실행한다.
+
+21로 두배한 것을 출력한다.
+"""
+
+    def _compile(self, code: str):
+        ast = Parser(TokenStream(code), lazy=True).parse()
+        compiler = Compiler()
+        compiler.compile_main(ast)
+        return compiler.assign, compiler.const_pool, compiler.bytecode
+
+    def test_cache_round_trip(self):
+        """컴파일 결과를 저장한 뒤 다시 읽어 같은 결과를 내는지 테스트합니다."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "두배.콜")
+            with open(path, "w") as f:
+                f.write(self.CODE)
+
+            self.assertIsNone(cache.load(path))
+            self.assertTrue(cache.save(path, *self._compile(self.CODE)))
+            self.assertTrue(os.path.exists(cache.cache_path(path)))
+
+            program = cache.load(path)
+            self.assertIsNotNone(program)
+            self.assertEqual(run_program(program)[1], "42\n")
+
+    def test_cache_invalidated_by_source_change(self):
+        """소스가 바뀌면 캐시를 쓰지 않는지 테스트합니다."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "두배.콜")
+            with open(path, "w") as f:
+                f.write(self.CODE)
+            cache.save(path, *self._compile(self.CODE))
+
+            with open(path, "w") as f:
+                f.write(self.CODE.replace("21", "5"))
+            self.assertIsNone(cache.load(path))
+
+    def test_cache_survives_touch(self):
+        """수정 시각만 바뀌고 내용이 같으면 캐시를 그대로 쓰는지 테스트합니다."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "두배.콜")
+            with open(path, "w") as f:
+                f.write(self.CODE)
+            cache.save(path, *self._compile(self.CODE))
+
+            stat = os.stat(path)
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+            self.assertIsNotNone(cache.load(path))
+
+    def test_cache_rejects_other_magic(self):
+        """바이트코드 형식 번호가 다르면 캐시를 쓰지 않는지 테스트합니다."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "두배.콜")
+            with open(path, "w") as f:
+                f.write(self.CODE)
+            cache.save(path, *self._compile(self.CODE))
+
+            magic = cache.MAGIC
+            cache.MAGIC = magic + 1
+            try:
+                self.assertIsNone(cache.load(path))
+            finally:
+                cache.MAGIC = magic
+
+    def test_cache_rejects_other_opt_level(self):
+        """다른 최적화 단계로 만든 캐시는 쓰지 않는지 테스트합니다."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "두배.콜")
+            with open(path, "w") as f:
+                f.write(self.CODE)
+            cache.save(path, *self._compile(self.CODE), opt_level=2)
+            self.assertIsNone(cache.load(path))
+            self.assertIsNotNone(cache.load(path, opt_level=2))
+
+    def test_cache_keeps_lazy_bodies(self):
+        """저장할 때 함수를 컴파일하지 않고 지연 파싱한 본문을 그대로 저장하는지 테스트합니다."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "두배.콜")
+            with open(path, "w") as f:
+                f.write(self.CODE)
+            # -O0에서는 펼칠 함수를 고르려고 본문을 파싱하는 일도 없음
+            program = CompilationSession(0).compile_source(self.CODE, lazy=True)
+            func = next(const for const in program[1] if isinstance(const, Func))
+            self.assertTrue(cache.save(path, *program, opt_level=0, lazy=True))
+            self.assertFalse(func.is_compiled())
+            self.assertFalse(func.ast.is_body_parsed())
+
+            program = cache.load(path, opt_level=0, lazy=True)
+            func = next(const for const in program[1] if isinstance(const, Func))
+            self.assertFalse(func.ast.is_body_parsed())
+            self.assertEqual(run_program(program)[1], "42\n")
+
+    def test_cache_keeps_syntax_error(self):
+        """지연 파싱한 본문의 문법 에러가 캐시를 거쳐도 호출할 때 보고되는지 테스트합니다."""
+        code = "함수 틀림은 수로 다음\n    수를 를 를 출력한다 한다.\n문단을 실행한다.\n1로 틀림한다.\n"
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "틀림.콜")
+            with open(path, "w") as f:
+                f.write(code)
+            program = CompilationSession(0).compile_source(code, lazy=True)
+            self.assertTrue(cache.save(path, *program, opt_level=0, lazy=True))
+            with self.assertRaisesRegex(Exception, "문법 에러"):
+                run_program(cache.load(path, opt_level=0, lazy=True))
+
+    def test_lazy_cache_not_used_by_default_run(self):
+        """지연 파싱으로 만든 캐시를 기본 실행에서 쓰지 않아 문법 에러가 보고되는지 테스트합니다."""
+        # 본문이 길어서 펼칠 함수로 고르지 않으므로 -O1에서도 본문을 파싱하지 않음
+        code = ("함수 안씀은 수로 다음\n" + "    수를 출력한다.\n" * 20 +
+                "    수를 를 를 출력한다 한다.\n문단을 실행한다.\n1을 출력한다.\n")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "안씀.콜")
+            with open(path, "w") as f:
+                f.write(code)
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out), \
+                    unittest.mock.patch("sys.argv", ["kol", path, "-지"]):
+                cli.main()
+            self.assertEqual(out.getvalue(), "1\n")
+            self.assertTrue(os.path.exists(cache.cache_path(path)))
+            self.assertIsNone(cache.load(path))
+
+            with contextlib.redirect_stdout(io.StringIO()), \
+                    unittest.mock.patch("sys.argv", ["kol", path]):
+                with self.assertRaisesRegex(Exception, "문법 에러"):
+                    cli.main()
+
+    def test_cache_saved_after_run(self):
+        """실행 중에 컴파일한 함수는 바이트코드로 저장하고 유형의 필드 값은 저장하지 않는지 테스트합니다."""
+        code = """유형 계수기는 다음
+    변수 수가 있다.
+값을 가진다.
+계수기의 수를 출력한다.
+계수기의 수는 5가 된다.
+""" + self.CODE
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "두배.콜")
+            with open(path, "w") as f:
+                f.write(code)
+            # -O0에서는 두배를 펼치지 않고 호출하므로 실행 중에 컴파일됨
+            for _ in range(2):
+                out = io.StringIO()
+                with contextlib.redirect_stdout(out), \
+                        unittest.mock.patch("sys.argv", ["kol", path, "-O0"]):
+                    cli.main()
+                self.assertEqual(out.getvalue(), "None\n42\n")
+
+            program = cache.load(path, opt_level=0)
+            func = next(const for const in program[1] if isinstance(const, Func))
+            self.assertTrue(func.is_compiled())
+            counter = next(const for const in program[1] if isinstance(const, Class))
+            self.assertIsNone(counter["수"])
+
+class TestAheadOfTime(unittest.TestCase):
+
+    def _compile(self, code: str, opt_level: int|None = None):
+        ast = Parser(TokenStream(code), lazy=True).parse()
+        compiler = Compiler(opt_level=opt_level)
+        compiler.compile_main(ast)
+        return compiler
+
+    def _funcs(self, const_pool: list) -> list:
+        funcs = []
+        for const in const_pool:
+            if isinstance(const, Func):
+                funcs.append(const)
+            elif isinstance(const, Class):
+                funcs += list(const.funcs.values())
+        return funcs
+
+    def test_compile_ahead_functions_and_methods(self):
+        """미리 컴파일하면 함수와 메서드, 안에서 정의한 함수까지 모두 컴파일되는지 테스트합니다."""
+        code = """유형 동물은 다음
+    변수 이름이 있다.
+    함수 소리를_낸다는 자신으로 다음
+        자신의 이름과 "!"를 더한 것을 출력한다.
+    문단을 실행한다.
+값을 가진다.
+
+함수 바깥은 가로 다음
+    함수 안쪽은 나로 다음
+        결과 값은 나가 된다. 그리고 끝난다.
+    문단을 실행한다.
+    결과 값은 가로 안쪽한 것이 된다. 그리고 끝난다.
+문단을 실행한다.
+
+강아지는 동물이 된다.
+강아지의 이름은 "바둑이"가 된다.
+강아지 안에서 소리를_낸다.
+3으로 바깥한 것을 출력한다.
+"""
+        compiler = self._compile(code)
+        self.assertFalse(all(f.is_compiled() for f in self._funcs(compiler.const_pool)))
+        compile_ahead(compiler.const_pool, max_workers=1)
+        funcs = self._funcs(compiler.const_pool)
+        self.assertEqual(len(funcs), 3)
+        self.assertTrue(all(f.is_compiled() for f in funcs))
+
+        program = compiler.assign, compiler.const_pool, compiler.bytecode
+        self.assertEqual(run_program(program)[1], "바둑이!\n3\n")
+
+    def test_compile_ahead_parallel(self):
+        """프로세스 풀로 나눠 컴파일한 결과가 차례로 컴파일한 결과와 같은지 테스트합니다."""
+        count = MIN_PARALLEL_FUNCS + 10
+        code = "".join(f"""함수 셈{i}은 가로 다음
+    결과 값은 가와 {i}를 더한 것이 된다. 그리고 끝난다.
+문단을 실행한다.
+""" for i in range(count))
+        serial = self._compile(code)
+        compile_ahead(serial.const_pool, max_workers=1)
+        parallel = self._compile(code)
+        compile_ahead(parallel.const_pool, max_workers=2)
+
+        serial_funcs = self._funcs(serial.const_pool)
+        parallel_funcs = self._funcs(parallel.const_pool)
+        self.assertEqual(len(parallel_funcs), count)
+        for a, b in zip(serial_funcs, parallel_funcs):
+            self.assertEqual(repr(a.code), repr(b.code))
+            self.assertEqual(a.local_count, b.local_count)
+        # 다른 프로세스에서 컴파일한 상수도 상수 풀의 객체를 씀
+        self.assertIs(parallel_funcs[-1].code[1].const,
+                      parallel.const_pool.intern(count - 1))
+
+    def test_compile_ahead_parallel_keeps_opt_level(self):
+        """다른 프로세스에서 컴파일한 함수도 같은 최적화 단계로 컴파일되는지 테스트합니다."""
+        count = MIN_PARALLEL_FUNCS + 10
+        code = "".join(f"""함수 셈{i}은 가로 다음
+    쓸모없는변수는 {i}이 된다.
+    결과 값은 가가 된다. 그리고 끝난다.
+문단을 실행한다.
+""" for i in range(count))
+        parallel = self._compile(code, opt_level=2)
+        compile_ahead(parallel.const_pool, max_workers=2)
+        for func in self._funcs(parallel.const_pool):
+            self.assertEqual([type(c) for c in func.code], [LoadLocal, Ret])
+
+class TestOptLevels(unittest.TestCase):
+
+    def test_same_output_for_every_level(self):
+        """최적화 단계와 상관없이 실행 결과가 같은지 테스트합니다."""
+        code = """함수 합을_구한다는 끝수로 다음
+    합은 0이 된다.
+    횟수는 0이 된다.
+    계속 횟수가 끝수보다 작다인 동안 다음
+        새횟수는 횟수와 1을 더한 것이 된다.
+        합은 합과 새횟수를 더한 것이 된다.
+        횟수는 새횟수가 된다.
+        쓸모없는변수는 합이 된다.
+    문단을 반복한다.
+    결과 값은 합이 된다. 그리고 끝난다.
+문단을 실행한다.
+10으로 합을_구한 것을 출력한다.
+1과 2를 더한 것을 출력한다.
+"""
+        for opt_level in range(3):
+            program = CompilationSession(opt_level).compile_source(code)
+            compile_ahead(program[1], max_workers=1)
+            self.assertEqual(run_program(program)[1], "55\n3\n", opt_level)
+
+class TestCountedLoops(unittest.TestCase):
+
+    CODE = """횟수는 0이 된다.
+합은 0이 된다.
+계속 횟수가 5보다 작다인 동안 다음
+    합은 합과 횟수를 더한 것이 된다.
+    횟수는 횟수와 1을 더한 것이 된다.
+문단을 반복한다.
+합을 출력한다.
+횟수를 출력한다.
+횟수는 7이 된다.
+계속 횟수가 5보다 작다인 동안 다음
+    횟수는 횟수와 1을 더한 것이 된다.
+문단을 반복한다.
+횟수를 출력한다.
+횟수는 0.5가 된다.
+계속 횟수가 2보다 작거나 같다인 동안 다음
+    횟수를 출력한다.
+    횟수는 횟수와 1을 더한 것이 된다.
+문단을 반복한다.
+횟수를 출력한다.
+함수 세기는 끝수로 다음
+    횟수는 끝수가 된다.
+    계속 횟수가 0보다 크다인 동안 다음
+        만약 횟수가 2랑 같다면 다음
+            나간다.
+        문단을 실행한다.
+        횟수는 횟수와 2를 뺀 것이 된다.
+    문단을 반복한다.
+    결과 값은 횟수가 된다. 그리고 끝난다.
+문단을 실행한다.
+6으로 세기한 것을 출력한다.
+7로 세기한 것을 출력한다.
+(1과 4로 범위를_만든 것)에 있는 각 항목들을 숫자로 가져와 다음
+    숫자를 출력한다.
+문단을 반복한다.
+"""
+
+    def test_counted_loops_match_plain_loops(self):
+        """합친 반복문이 합치지 않은 반복문과 같은 값을 남기는지 테스트합니다."""
+        expected = "10\n5\n7\n0.5\n1.5\n2.5\n2\n-1\n1\n2\n3\n"
+        for opt_level in range(3):
+            program = CompilationSession(opt_level).compile_source(self.CODE)
+            compile_ahead(program[1], max_workers=1)
+            self.assertEqual(run_program(program)[1], expected, opt_level)
+
+class TestInlining(unittest.TestCase):
+
+    def _compile(self, code: str):
+        program = CompilationSession().compile_source(code)
+        compile_ahead(program[1], max_workers=1)
+        return program
+
+    def test_inlined_function_reassigned(self):
+        """펼친 함수의 이름이 다시 묶이면 새 함수를 부르는지 테스트합니다."""
+        code = """함수 두배는 가로 다음
+    결과 값은 가와 2를 곱한 것이 된다. 그리고 끝난다.
+문단을 실행한다.
+함수 네배는 가로 다음
+    결과 값은 (가로 두배한 것)으로 두배한 것이 된다. 그리고 끝난다.
+문단을 실행한다.
+함수 세배는 가로 다음
+    결과 값은 가와 3을 곱한 것이 된다. 그리고 끝난다.
+문단을 실행한다.
+(21로 두배한 것)을 출력한다.
+(3으로 네배한 것)을 출력한다.
+두배는 세배가 된다.
+(21로 두배한 것)을 출력한다.
+(3으로 네배한 것)을 출력한다.
+"""
+        self.assertEqual(run_program(self._compile(code))[1], "42\n12\n63\n27\n")
+
+    def test_inlined_argument_not_copied(self):
+        """펼친 함수에 넘긴 유형도 호출할 때처럼 복사하지 않는지 테스트합니다."""
+        code = """유형 동물은 다음
+    변수 이름이 있다.
+
+    함수 이름을_바꾼다는 자신과 새이름으로 다음
+        자신의 이름은 새이름이 된다.
+    문단을 실행한다.
+값을 가진다.
+함수 바꾼다는 대상과 새이름으로 다음
+    결과 값은 대상 안에서 새이름으로 이름을_바꾼 것이 된다. 그리고 끝난다.
+문단을 실행한다.
+강아지는 동물이 된다.
+강아지의 이름은 "바둑이"가 된다.
+(강아지와 "누렁이"로 바꾼 것).
+강아지의 이름을 출력한다.
+"""
+        self.assertEqual(run_program(self._compile(code))[1], "누렁이\n")
+
+class TestTailCall(unittest.TestCase):
+
+    class DepthVM(VM):
+        def __init__(self, *args):
+            super().__init__(*args)
+            self.max_frames = 0
+
+        def execute_func(self):
+            # 최상위 코드의 프레임은 빼고 함수 프레임만 셈
+            self.max_frames = max(self.max_frames, len(self.frames) - 1)
+            super().execute_func()
+
+    def test_tail_recursion_reuses_frame(self):
+        """꼬리 재귀가 프레임을 쌓지 않는지 테스트합니다."""
+        code = """함수 합을_구한다는 남은수와 합으로 다음
+    만약 남은수가 0이랑 같다면 다음
+        결과 값은 합이 된다. 그리고 끝난다.
+    문단을 실행한다.
+    결과 값은 (남은수와 1을 뺀 것)과 (합과 남은수를 더한 것)으로 합을_구한 것이 된다.
+    그리고 끝난다.
+문단을 실행한다.
+1000과 0으로 합을_구한 것을 출력한다.
+"""
+        vm, out = run_program(code, self.DepthVM)
+        self.assertEqual(out, "500500\n")
+        self.assertEqual(vm.max_frames, 1)
+        vm, out = run_program(code, self.DepthVM, opt_level=0)
+        self.assertEqual(out, "500500\n")
+        self.assertEqual(vm.max_frames, 1001)
+
+    def test_tail_call_other_functions(self):
+        """다른 함수, 내장 함수, 반복문 안의 꼬리 호출이 올바르게 동작하는지 테스트합니다."""
+        code = """함수 홀수인가는 수로 다음
+    만약 수가 0이랑 같다면 다음
+        결과 값은 거짓이 된다. 그리고 끝난다.
+    문단을 실행한다.
+    결과 값은 (수와 1을 뺀 것)으로 짝수인가한 것이 된다. 그리고 끝난다.
+문단을 실행한다.
+함수 짝수인가는 수로 다음
+    만약 수가 0이랑 같다면 다음
+        결과 값은 참이 된다. 그리고 끝난다.
+    문단을 실행한다.
+    결과 값은 (수와 1을 뺀 것)으로 홀수인가한 것이 된다. 그리고 끝난다.
+문단을 실행한다.
+함수 첫째는 목록으로 다음
+    목록에 있는 각 항목들을 항목으로 가져와 다음
+        결과 값은 항목을 문자열으로_변환한 것이 된다. 그리고 끝난다.
+    문단을 반복한다.
+문단을 실행한다.
+101로 홀수인가한 것을 출력한다.
+[(7) 다음 8]로 첫째한 것을 출력한다.
+"""
+        vm, out = run_program(code, self.DepthVM)
+        self.assertEqual(out, "True\n7\n")
+        self.assertEqual(vm.max_frames, 1)
+
+class TestConstantLiterals(unittest.TestCase):
+
+    def test_constant_array_copied_on_load(self):
+        """상수 배열/사전을 바꿔도 다음에 불러온 값에는 영향이 없는지 테스트합니다."""
+        code = """횟수는 0이 된다.
+계속 횟수가 3보다 작다인 동안 다음
+    목록은 [1 다음 2]가 된다.
+    목록으로 횟수를 추가한다.
+    목록으로 길이를_구한 것을 출력한다.
+    횟수는 횟수와 1을 더한 것이 된다.
+문단을 반복한다.
+"""
+        ast = Parser(TokenStream(code)).parse()
+        compiler = Compiler()
+        compiler.compile_main(ast)
+        program = compiler.assign, compiler.const_pool, compiler.bytecode
+        self.assertEqual(run_program(program)[1], "3\n3\n3\n")
+
+        # 사전도 불러올 때마다 새 객체를 만듦
+        ast = Parser(TokenStream('가는 {"키"는 1}이 된다. 나는 {"키"는 1}이 된다.')).parse()
+        compiler = Compiler()
+        compiler.compile_main(ast)
+        vm = VM(compiler.assign, compiler.const_pool, compiler.bytecode)
+        vm.run()
+        first, second = [v for v in vm.global_list if isinstance(v, dict)]
+        self.assertEqual(first, {"키": 1})
+        self.assertIsNot(first, second)
+
+class TestFastVM(unittest.TestCase):
+
+    EXAMPLE_DIR = os.path.join(os.path.dirname(__file__), '..', 'example')
+
+    def test_examples_same_output(self):
+        """예제 프로그램들이 두 실행기에서 같은 결과를 내는지 테스트합니다."""
+        for name in sorted(os.listdir(self.EXAMPLE_DIR)):
+            if not name.endswith(".콜"):
+                continue
+            with open(os.path.join(self.EXAMPLE_DIR, name)) as f:
+                code = f.read()
+            for opt_level in (0, 1, 2):
+                with self.subTest(name=name, opt_level=opt_level):
+                    self.assertEqual(
+                        run_program(code, FastVM, opt_level, "5\n3\n1\n2\n")[1],
+                        run_program(code, VM, opt_level, "5\n3\n1\n2\n")[1])
+
+    def test_calls_and_loops(self):
+        """함수 호출, 꼬리 호출, 펼친 함수, 반복문이 빠른 실행기에서 동작하는지 테스트합니다."""
+        code = """함수 제곱은 수로 다음
+    결과 값은 수와 수를 곱한 것이 된다. 그리고 끝난다.
+문단을 실행한다.
+함수 합을_구한다는 남은수와 합으로 다음
+    만약 남은수가 0이랑 같다면 다음
+        결과 값은 합이 된다. 그리고 끝난다.
+    문단을 실행한다.
+    결과 값은 (남은수와 1을 뺀 것)과 (합과 남은수를 더한 것)으로 합을_구한 것이 된다.
+    그리고 끝난다.
+문단을 실행한다.
+함수 제곱합은 끝수로 다음
+    합은 0이 된다.
+    (0과 끝수로 범위를_만든 것)에 있는 각 항목들을 숫자로 가져와 다음
+        합은 합과 (숫자로 제곱한 것)을 더한 것이 된다.
+    문단을 반복한다.
+    결과 값은 합이 된다. 그리고 끝난다.
+문단을 실행한다.
+횟수는 0이 된다.
+계속 횟수가 3보다 작다인 동안 다음
+    (횟수로 제곱한 것)을 출력한다.
+    횟수는 횟수와 1을 더한 것이 된다.
+문단을 반복한다.
+1000과 0으로 합을_구한 것을 출력한다.
+10으로 제곱합한 것을 출력한다.
+"""
+        for opt_level in (0, 1, 2):
+            with self.subTest(opt_level=opt_level):
+                self.assertEqual(run_program(code, FastVM, opt_level)[1],
+                                 "0\n1\n4\n500500\n285\n")
+
+    def test_same_output_as_vm(self):
+        """번호로 값 넣기와 매개변수 없는 호출이 두 실행기에서 같은 결과를 내는지 테스트합니다."""
+        code = """목록은 [1 다음 2 다음 3]이 된다.
+목록에서 1번째 원소는 9가 된다.
+목록을 출력한다.
+사전은 {"키"는 1}이 된다.
+사전에서 "키"번째 원소는 2가 된다.
+사전을 출력한다.
+함수 하나는 다음
+    결과 값은 1이 된다. 그리고 끝난다.
+문단을 실행한다.
+함수 바꾸기는 배열로 다음
+    배열에서 0번째 원소는 (하나한 것)이 된다.
+    결과 값은 배열이 된다. 그리고 끝난다.
+문단을 실행한다.
+2와 (하나한 것)을 더한 것을 출력한다.
+[5 다음 6]으로 바꾸기한 것을 출력한다.
+"""
+        for opt_level in (0, 1, 2):
+            with self.subTest(opt_level=opt_level):
+                expected = run_program(code, VM, opt_level)[1]
+                self.assertEqual(expected,
+                                 "[1, 9, 3]\n{'키': 2}\n3\n[1, 6]\n")
+                self.assertEqual(run_program(code, FastVM, opt_level)[1], expected)
+
+    def test_wrong_argument_count(self):
+        """매개변수 수가 다르면 기본 실행기와 같은 에러를 내는지 테스트합니다."""
+        code = """함수 더하기는 가와 나로 다음
+    결과 값은 가와 나를 더한 것이 된다. 그리고 끝난다.
+문단을 실행한다.
+1로 더하기한 것을 출력한다.
+"""
+        with self.assertRaisesRegex(Exception, "실행 에러"):
+            run_program(code, FastVM)
+
+    def test_assemble(self):
+        """바이트코드가 정수 코드로 바뀌고 점프 위치가 명령 크기만큼 늘어나는지 테스트합니다."""
+        code = "(0과 3으로 범위를_만든 것)에 있는 각 항목들을 숫자로 가져와 다음 숫자를 출력한다. 문단을 반복한다."
+        program = CompilationSession().compile_source(code)
+        bytecode = program[2]
+        code_object = assemble(bytecode)
+        self.assertEqual(len(code_object.code), (len(bytecode) + 1) * INST_SIZE)
+        self.assertTrue(all(isinstance(x, int) for x in code_object.code))
+        self.assertEqual(code_object.code[-INST_SIZE], END)
+
+        i = next(i for i, inst in enumerate(bytecode) if isinstance(inst, ForIter))
+        self.assertEqual(code_object.code[i * INST_SIZE], FOR_ITER)
+        self.assertEqual(code_object.code[i * INST_SIZE + 2],
+                         bytecode[i].ip * INST_SIZE)
+        self.assertIn("FOR_ITER", disassemble(code_object))
+        self.assertIs(code_object.source, bytecode)
+
+class TestFrames(unittest.TestCase):
+
+    def test_main_runs_in_root_frame(self):
+        """최상위 코드가 전역 변수를 지역 변수로 쓰는 프레임에서 실행되는지 테스트합니다."""
+        vm, out = run_program("""합은 0이 된다.
+[1 다음 2 다음 3]에 있는 각 항목들을 숫자로 가져와 다음
+    합은 합과 숫자를 더한 것이 된다.
+문단을 반복한다.
+합을 출력한다.
+""")
+        self.assertEqual(out, "6\n")
+        self.assertEqual(vm.frames, [vm.frame])
+        self.assertIs(vm.frame.local_list, vm.global_list)
+
+    def test_frames_reused(self):
+        """함수가 끝난 프레임을 다음 호출에서 다시 쓰는지 테스트합니다."""
+        vm, out = run_program("""함수 세기는 수로 다음
+    만약 수가 0이랑 같다면 다음
+        결과 값은 0이 된다. 그리고 끝난다.
+    문단을 실행한다.
+    결과 값은 ((수와 1을 뺀 것)으로 세기한 것)과 1을 더한 것이 된다.
+    그리고 끝난다.
+문단을 실행한다.
+횟수는 0이 된다.
+계속 횟수가 5보다 작다인 동안 다음
+    (3으로 세기한 것)을 출력한다.
+    횟수는 횟수와 1을 더한 것이 된다.
+문단을 반복한다.
+""")
+        self.assertEqual(out, "3\n"*5)
+        # 가장 깊을 때 쌓인 프레임 수만큼만 만들어지고, 값 스택에는 값이 남지 않음
+        self.assertEqual(len(vm.frames), 1)
+        self.assertEqual(len(vm.free_frames), 4)
+        self.assertEqual(vm.stack, [])
+
+    def test_locals_on_value_stack(self):
+        """함수의 지역 변수가 값 스택의 인자 자리에 그대로 놓이는지 테스트합니다."""
+        code = """함수 둘째는 가와 나로 다음
+    합은 가와 나를 더한 것이 된다.
+    결과 값은 합이 된다. 그리고 끝난다.
+문단을 실행한다.
+목록은 [1 다음 2 다음 3]이 된다.
+"""
+        program = CompilationSession().compile_source(code)
+        compile_ahead(program[1], max_workers=1)
+        vm = VM(*program)
+        vm.run()
+        func = next(c for c in program[1] if isinstance(c, Func))
+        array = vm.global_list[-1]
+        vm.stack += [7, array, 4, 5]
+        vm.push_frame(func, 2)
+        self.assertEqual(vm.frame.base, 2)
+        self.assertEqual(vm.stack, [7, array, 4, 5, None])
+        vm.stack.append(9)
+        vm.pop_frame()
+        self.assertEqual(vm.stack, [7, array, 9])
+
+    def test_zero_argument_call(self):
+        """매개변수가 없는 함수를 불러도 스택에 있던 값이 지워지지 않는지 테스트합니다."""
+        code = """함수 하나는 다음
+    결과 값은 1이 된다. 그리고 끝난다.
+문단을 실행한다.
+2와 (하나한 것)을 더한 것을 출력한다.
+"가"와 (입력한 것)을 더한 것을 출력한다.
+"""
+        for opt_level in (0, 1):
+            with self.subTest(opt_level=opt_level):
+                _, out = run_program(code, opt_level=opt_level, stdin="나\n")
+                self.assertEqual(out, "3\n가나\n")
+
+class TestInlineCaches(unittest.TestCase):
+
+    COUNTER = """유형 계수기는 다음
+    변수 수가 있다.
+    함수 올린다는 자신으로 다음
+        자신의 수는 자신의 수와 1을 더한 것이 된다.
+    문단을 실행한다.
+값을 가진다.
+"""
+
+    def test_monomorphic_hits(self):
+        """같은 유형의 객체만 오면 처음 한 번만 캐시가 틀리는지 테스트합니다."""
+        code = self.COUNTER + """셈은 계수기가 된다.
+셈의 수는 0이 된다.
+횟수는 0이 된다.
+계속 횟수가 10보다 작다인 동안 다음
+    셈 안에서 올린다.
+    횟수는 횟수와 1을 더한 것이 된다.
+문단을 반복한다.
+셈의 수를 출력한다.
+"""
+        for vm_class in (VM, FastVM):
+            with self.subTest(vm_class=vm_class.__name__):
+                vm, out = run_program(code, vm_class)
+                self.assertEqual(out, "10\n")
+                stats = vm.inline_cache_stats()
+                self.assertEqual(stats["LoadMethod"], (9, 1))
+                # 메서드 안의 명령 하나와 최상위 코드의 명령 하나
+                self.assertEqual(stats["LoadField"], (9, 2))
+                self.assertEqual(stats["StoreField"], (9, 2))
+
+    def test_polymorphic(self):
+        """한 명령에 여러 유형의 객체가 와도 유형마다 맞는 메서드를 쓰는지 테스트합니다."""
+        code = """유형 동물은 다음
+    변수 이름이 있다.
+    함수 소리를_낸다는 자신으로 다음
+        자신의 이름을 출력한다.
+    문단을 실행한다.
+값을 가진다.
+유형 강아지는 동물의 자식이고 다음
+    함수 소리를_낸다는 자신으로 다음
+        "멍멍"을 출력한다.
+    문단을 실행한다.
+값을 가진다.
+함수 부른다는 대상으로 다음
+    대상 안에서 소리를_낸다.
+문단을 실행한다.
+고양이는 동물이 된다.
+고양이의 이름은 "나비"가 된다.
+개는 강아지가 된다.
+개의 이름은 "바둑이"가 된다.
+고양이로 부른다. 개로 부른다. 고양이로 부른다. 개로 부른다.
+사전은 {"이름"은 "사전"}이 된다.
+사전의 이름을 출력한다.
+"""
+        for vm_class in (VM, FastVM):
+            with self.subTest(vm_class=vm_class.__name__):
+                vm, out = run_program(code, vm_class)
+                self.assertEqual(out, "나비\n멍멍\n나비\n멍멍\n사전\n")
+                self.assertEqual(vm.inline_cache_stats()["LoadMethod"], (2, 2))
+
+    def test_polymorphic_fields(self):
+        """필드 캐시가 파이썬 타입이 아니라 객체를 만든 유형으로 맞고 틀리는지 테스트합니다."""
+        code = """유형 동물은 다음
+    변수 이름이 있다.
+값을 가진다.
+유형 강아지는 동물의 자식이고 다음
+값을 가진다.
+함수 이름_출력은 대상으로 다음
+    대상의 이름을 출력한다.
+문단을 실행한다.
+고양이는 동물이 된다.
+고양이의 이름은 "나비"가 된다.
+개는 강아지가 된다.
+개의 이름은 "바둑이"가 된다.
+고양이로 이름_출력한다. 개로 이름_출력한다.
+고양이로 이름_출력한다. 개로 이름_출력한다.
+사전은 {"이름"은 "사전"}이 된다.
+사전으로 이름_출력한다.
+"""
+        for vm_class in (VM, FastVM):
+            with self.subTest(vm_class=vm_class.__name__):
+                vm, out = run_program(code, vm_class)
+                self.assertEqual(out, "나비\n바둑이\n나비\n바둑이\n사전\n")
+                stats = vm.inline_cache_stats()
+                # 동물과 강아지에서 처음 한 번씩 틀리고, 사전은 캐시하지 않음
+                self.assertEqual(stats["LoadField"], (2, 2))
+                self.assertEqual(stats["StoreField"], (0, 2))
+
+    def test_cache_state_not_pickled(self):
+        """인라인 캐시와 통계가 .콜c 캐시에 저장되지 않는지 테스트합니다."""
+        code = self.COUNTER + """셈은 계수기가 된다.
+셈의 수는 0이 된다.
+셈 안에서 올린다.
+셈 안에서 올린다.
+"""
+        vm, _ = run_program(code)
+        origin = next(v for v in vm.global_list if isinstance(v, Class) and v.is_type)
+        method_code = origin.get_method("올린").code
+        self.assertEqual(vm.inline_cache_stats()["StoreField"], (1, 2))
+
+        for inst in pickle.loads(pickle.dumps(method_code + vm.global_code)):
+            if hasattr(inst, "hits"):
+                self.assertEqual((inst.hits, inst.misses), (0, 0))
+                self.assertIsNone(inst.cache_origin)
+                self.assertEqual(inst.entries, {})
+        loaded = pickle.loads(pickle.dumps(LoadMethod("올린")))
+        self.assertEqual(loaded.method, "올린")
+        self.assertIsNone(loaded.cache_func)
+
+    def test_method_compiled_once(self):
+        """객체가 유형의 메서드를 복사하지 않고 같이 써서 한 번만 컴파일하는지 테스트합니다."""
+        code = self.COUNTER + """철수는 계수기가 된다. 철수의 수는 0이 된다.
+영희는 계수기가 된다. 영희의 수는 5가 된다.
+철수 안에서 올린다. 영희 안에서 올린다.
+철수의 수를 출력한다. 영희의 수를 출력한다.
+"""
+        vm, out = run_program(code)
+        self.assertEqual(out, "1\n6\n")
+        counters = [v for v in vm.global_list if isinstance(v, Class)]
+        origin = next(v for v in counters if v.is_type)
+        method = origin.get_method("올린")
+        self.assertTrue(method.is_compiled())
+        for obj in counters:
+            if not obj.is_type:
+                self.assertIs(obj.origin, origin)
+                self.assertIs(obj.get_method("올린"), method)
+
+    def test_instances_share_methods_not_fields(self):
+        """메서드를 같이 쓰는 객체들도 필드는 따로 가지고 맞는 메서드를 부르는지 테스트합니다."""
+        code = """유형 동물은 다음
+    변수 이름이 있다.
+    변수 나이가 있다.
+    함수 소개한다는 자신으로 다음
+        자신의 이름을 출력한다.
+        자신의 나이를 출력한다.
+    문단을 실행한다.
+    함수 나이_먹는다는 자신으로 다음
+        자신의 나이는 자신의 나이와 1을 더한 것이 된다.
+    문단을 실행한다.
+값을 가진다.
+유형 강아지는 동물의 자식이고 다음
+    함수 소개한다는 자신으로 다음
+        "멍멍"을 출력한다.
+        자신의 나이를 출력한다.
+    문단을 실행한다.
+값을 가진다.
+냥은 동물이 된다.
+냥의 이름은 "나비"가 된다. 냥의 나이는 1이 된다.
+범은 동물이 된다.
+범의 이름은 "호랑"이 된다. 범의 나이는 10이 된다.
+멍은 강아지가 된다.
+멍의 나이는 3이 된다.
+냥 안에서 나이_먹는다. 냥 안에서 나이_먹는다. 범 안에서 나이_먹는다.
+냥 안에서 소개한다. 범 안에서 소개한다. 멍 안에서 소개한다.
+"""
+        for vm_class in (VM, FastVM):
+            with self.subTest(vm_class=vm_class.__name__):
+                vm, out = run_program(code, vm_class)
+                self.assertEqual(out, "나비\n3\n호랑\n11\n멍멍\n3\n")
+                objs = [v for v in vm.global_list
+                        if isinstance(v, Class) and not v.is_type]
+                self.assertEqual(len(objs), 3)
+                cat, tiger, dog = objs
+                self.assertIsNot(cat.var, tiger.var)
+                self.assertIs(cat.get_method("소개"), tiger.get_method("소개"))
+                self.assertIs(cat.get_method("나이_먹는"), tiger.get_method("나이_먹는"))
+                self.assertIsNot(cat.get_method("소개"), dog.get_method("소개"))
+
 if __name__ == '__main__':
     unittest.main()